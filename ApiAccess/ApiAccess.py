@@ -1,10 +1,15 @@
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import yaml
 import os
+from requests.adapters import HTTPAdapter
 from alpaca.trading.client import TradingClient
 from alpaca.data.historical import StockHistoricalDataClient, CryptoHistoricalDataClient
 from alpaca.data.live import StockDataStream, CryptoDataStream
 from alpaca.data.enums import DataFeed
+from ApiAccess.RateLimiter import RateLimiter, Priority, current_priority, request_priority
 
 class ClientType(Enum):
     TRADE = 1
@@ -12,17 +17,127 @@ class ClientType(Enum):
     CRYPTO_HISTORY = 3
     STOCK_STREAM = 4
     CRYPTO_STREAM = 5
+    STOCK_HISTORY_RAW = 6
+
+
+class PooledClient:
+    """Process-wide shared client that records call count, errors and latency per endpoint.
+
+    Every call takes a token from `ClientManager.rate_limiter` first. Its priority is the one
+    set with `request_priority` on the calling thread, else the default of the method.
+    Market data clients page long requests internally (one REST `get` per page), so they
+    take a token per page instead of per call.
+    """
+
+    # request_priority로 지정하지 않은 호출의 우선순위
+    METHOD_PRIORITY = {'submit_order': Priority.ORDER, 'get_order_by_client_id': Priority.ORDER,
+                       'get_orders': Priority.ORDER, 'cancel_order_by_id': Priority.ORDER,
+                       'close_position': Priority.ORDER,
+                       'get_all_positions': Priority.POSITION, 'get_account': Priority.POSITION,
+                       'get_stock_latest_bar': Priority.RECENT_BARS}
+    PAGED_TYPES = (ClientType.STOCK_HISTORY, ClientType.STOCK_HISTORY_RAW, ClientType.CRYPTO_HISTORY)
+
+    def __init__(self, client, client_type):
+        self._client = client
+        self._client_type = client_type
+        # FakeAlpaca client에는 `get`이 없음 (호출당 한 번만 집계)
+        self._per_page = client_type in self.PAGED_TYPES and callable(getattr(client, 'get', None))
+        if self._per_page:
+            page_get = client.get
+
+            def get(*args, **kwargs):
+                priority = current_priority()
+                ClientManager.acquire_token(priority if priority is not None else Priority.HISTORY)
+                return page_get(*args, **kwargs)
+            client.get = get
+
+    @property
+    def client(self):
+        return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            priority = current_priority()
+            if priority is None:
+                priority = self.METHOD_PRIORITY.get(name, Priority.HISTORY)
+            if not self._per_page:
+                ClientManager.acquire_token(priority)
+            started = time.perf_counter()
+            failed = False
+            try:
+                # 페이지 요청이 같은 우선순위로 토큰을 받도록
+                with request_priority(priority):
+                    return attr(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                ClientManager.record_call(f"{self._client_type.name}.{name}", time.perf_counter() - started, failed)
+        return call
 
 
 class ClientManager:
+    fake_market = None  # use_fake_market()으로 설정하면 모든 client가 FakeAlpaca로 대체됨
+    pooled_types = (ClientType.TRADE, ClientType.STOCK_HISTORY, ClientType.STOCK_HISTORY_RAW, ClientType.CRYPTO_HISTORY)
+    pool_size = 32  # client별 keep-alive 연결 수 (동시 요청 수 이상으로)
+    rate_limit_per_minute = 200  # Alpaca 기본 요금제의 계정 전체 분당 호출 한도
+    rate_limiter = None  # 라이브 트레이더가 set_rate_limit()으로 켬
+    _keys = None
+    _pool = {}
+    _stats = {}
+    _lock = threading.RLock()
+
     def __init__(self, relative_location=''):
         self.relative_location = relative_location
-        self.keys = self._load_keys()
+        self.keys = {} if ClientManager.fake_market is not None else self._load_keys()
+
+    @classmethod
+    def use_fake_market(cls, market):
+        """Route every get_client call to the given FakeMarket (None restores the real Alpaca clients).
+
+        The rate limiter follows the market's `rate_limit`; None removes it.
+        """
+        with cls._lock:
+            cls.fake_market = market
+            cls._pool = {}
+            # FakeMarket의 호출 한도에 맞춤 (한도가 없거나 실제 client로 돌아가면 제한하지 않음)
+            rate_limit = getattr(market, 'rate_limit', None)
+            cls.rate_limiter = RateLimiter(per_minute=rate_limit) if rate_limit is not None else None
 
-    def _load_keys(self):
-        """Load keys from the keys.yaml file."""
-        with open(f"{os.environ.get('D4')}/ApiAccess/key.yaml") as f:
-            return yaml.safe_load(f)
+    @classmethod
+    def set_rate_limit(cls, per_minute, burst=20):
+        """Replace the shared rate limiter (None disables it).
+
+        The limiter only spans one process: processes sharing the account (e.g. shard
+        workers) must each be given their part of `rate_limit_per_minute`.
+        """
+        with cls._lock:
+            cls.rate_limiter = RateLimiter(per_minute=per_minute, burst=burst) if per_minute is not None else None
+
+    @classmethod
+    def acquire_token(cls, priority):
+        """Wait for a token of the shared rate limiter (no-op when it is off)."""
+        limiter = cls.rate_limiter
+        if limiter is not None:
+            limiter.acquire(priority)
+
+    @classmethod
+    def rate_limit_stats(cls):
+        """Calls and time spent waiting for the rate limiter, per priority class."""
+        return cls.rate_limiter.summary() if cls.rate_limiter is not None else {}
+
+    @classmethod
+    def _load_keys(cls):
+        """Load keys from the keys.yaml file (read once per process)."""
+        with cls._lock:
+            if cls._keys is None:
+                with open(f"{os.environ.get('D4')}/ApiAccess/key.yaml") as f:
+                    cls._keys = yaml.safe_load(f)
+            return cls._keys
 
     def get_alpaca_paper_creds(self):
         """Retrieve Alpaca paper trading credentials."""
@@ -34,18 +149,79 @@ class ClientManager:
         return self.keys.get('fmp', {}).get('api_key')
 
     def get_client(self, client_type : ClientType):
-        """Get the appropriate client based on the type."""
+        """Get the shared client of the given type; stream clients are created per call."""
+        if client_type not in self.pooled_types:
+            return self._create_client(client_type)
+        with ClientManager._lock:
+            if client_type not in ClientManager._pool:
+                client = self._create_client(client_type)
+                ClientManager._pool[client_type] = PooledClient(client, client_type) if client is not None else None
+            return ClientManager._pool[client_type]
+
+    def _create_client(self, client_type):
+        if ClientManager.fake_market is not None:
+            return ClientManager.fake_market.get_client(client_type)
         alpaca_creds = self.get_alpaca_paper_creds()
         api_key, api_secret = alpaca_creds["api_key"], alpaca_creds["api_secret"]
         clients = {
             ClientType.TRADE: lambda: TradingClient(api_key, api_secret),
             ClientType.STOCK_HISTORY: lambda: StockHistoricalDataClient(api_key, api_secret),
+            ClientType.STOCK_HISTORY_RAW: lambda: StockHistoricalDataClient(api_key, api_secret, raw_data=True),
             ClientType.CRYPTO_HISTORY: lambda: CryptoHistoricalDataClient(),
             ClientType.STOCK_STREAM: lambda: StockDataStream(api_key=api_key, secret_key=api_secret, feed=DataFeed.SIP),
             ClientType.CRYPTO_STREAM: lambda: CryptoDataStream(api_key, api_secret),
         }
 
-        return clients.get(client_type, lambda: None)()
+        client = clients.get(client_type, lambda: None)()
+        self._configure_session(client)
+        return client
+
+    def _configure_session(self, client):
+        """Size the keep-alive connection pool of a REST client and ask for compressed responses."""
+        session = getattr(client, '_session', None)
+        if session is None:
+            return
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+
+    def prewarm(self, connections=8):
+        """Open TLS connections of the pooled REST clients ahead of the first time-critical call."""
+        for client_type in (ClientType.TRADE, ClientType.STOCK_HISTORY):
+            client = self.get_client(client_type)
+            session = getattr(client.client, '_session', None) if client is not None else None
+            base_url = getattr(client.client, '_base_url', None) if client is not None else None
+            if session is None or base_url is None:
+                continue
+
+            def touch(_):
+                started = time.perf_counter()
+                try:
+                    session.head(str(base_url), timeout=5)
+                    ClientManager.record_call(f"{client_type.name}.prewarm", time.perf_counter() - started, False)
+                except Exception as e:
+                    ClientManager.record_call(f"{client_type.name}.prewarm", time.perf_counter() - started, True)
+                    print(f"Prewarm failed for {client_type.name}: {e}")
+
+            # 동시에 여러 연결을 열어야 pool에 여러 개의 소켓이 남음
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                list(executor.map(touch, range(connections)))
+
+    @classmethod
+    def record_call(cls, endpoint, seconds, failed):
+        with cls._lock:
+            stat = cls._stats.setdefault(endpoint, dict(calls=0, errors=0, seconds=0.0, max_seconds=0.0))
+            stat['calls'] += 1
+            stat['errors'] += int(failed)
+            stat['seconds'] += seconds
+            stat['max_seconds'] = max(stat['max_seconds'], seconds)
+
+    @classmethod
+    def connection_stats(cls):
+        """Per-endpoint call count, error count, total and max latency."""
+        with cls._lock:
+            return {endpoint: dict(stat, mean_seconds=stat['seconds'] / stat['calls'] if stat['calls'] else 0.0)
+                    for endpoint, stat in cls._stats.items()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,400 @@
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+
+
+class FakeAPIError(Exception):
+    """Error raised by the fake clients, shaped like an Alpaca API error."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+class FakeBarSet:
+    """Mimics the BarSet returned by `get_stock_bars` (only `.df` is used)."""
+
+    def __init__(self, df):
+        self.df = df
+
+
+class FakeMarket:
+    """Shared state behind the fake Alpaca clients.
+
+    Serves recorded minute bars (`recorded`: symbol -> DataFrame indexed by UTC timestamps)
+    or a deterministic synthetic price path for any other symbol, keeps a paper account
+    with instantly filled market orders, and injects latency, errors and rate limits.
+    """
+
+    def __init__(self, recorded=None, symbols=None, cash=100000.0, latency=0.0, latency_jitter=0.0,
+                 error_rate=0.0, rate_limit=None, seed=0, now=None):
+        self.recorded = recorded or {}
+        self.symbols = list(symbols) if symbols is not None else list(self.recorded.keys())
+        self.cash = cash
+        self.positions = {}
+        self.orders = {}
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # 분당 최대 호출 수 (None이면 무제한)
+        self.now = now or (lambda: pd.Timestamp.now(tz='UTC'))
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.call_times = deque()
+        self.stats = {}
+
+    @classmethod
+    def from_recording(cls, directory, **kwargs):
+        """Load `<symbol>.csv` minute bar files written by `save_recording`."""
+        recorded = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.csv'):
+                df = pd.read_csv(os.path.join(directory, name), index_col=0, parse_dates=True)
+                df.index = pd.DatetimeIndex(df.index).tz_convert('UTC') if df.index.tz else pd.DatetimeIndex(df.index).tz_localize('UTC')
+                recorded[name[:-4]] = df
+        return cls(recorded=recorded, **kwargs)
+
+    @staticmethod
+    def save_recording(history, directory):
+        """Store per-symbol minute bars (as returned by `Fetcher.get_stock_history`) for later replay."""
+        os.makedirs(directory, exist_ok=True)
+        for symbol, df in history.items():
+            df[BAR_COLUMNS].to_csv(os.path.join(directory, f"{symbol}.csv"))
+
+    def get_client(self, client_type):
+        """Counterpart of `ClientManager.get_client` for the supported client types."""
+        from ApiAccess.ApiAccess import ClientType
+        clients = {
+            ClientType.TRADE: lambda: FakeTradingClient(self),
+            ClientType.STOCK_HISTORY: lambda: FakeStockHistoricalDataClient(self),
+            ClientType.STOCK_HISTORY_RAW: lambda: FakeStockHistoricalDataClient(self, raw_data=True),
+            ClientType.STOCK_STREAM: lambda: FakeStockDataStream(self),
+        }
+        return clients.get(client_type, lambda: None)()
+
+    # API call plumbing
+
+    def call(self, endpoint, fn, *args, **kwargs):
+        """Run one API call with the configured latency, rate limit and error injection."""
+        started = time.perf_counter()
+        stat = self.stats.setdefault(endpoint, dict(calls=0, errors=0, rate_limited=0, seconds=0.0))
+        try:
+            if self.latency or self.latency_jitter:
+                time.sleep(max(0.0, self.rng.gauss(self.latency, self.latency_jitter)))
+            with self.lock:
+                stat['calls'] += 1
+                if self.rate_limit is not None:
+                    wall = time.monotonic()
+                    while self.call_times and wall - self.call_times[0] > 60.0:
+                        self.call_times.popleft()
+                    if len(self.call_times) >= self.rate_limit:
+                        stat['rate_limited'] += 1
+                        raise FakeAPIError(429, 'too many requests')
+                    self.call_times.append(wall)
+                if self.error_rate and self.rng.random() < self.error_rate:
+                    stat['errors'] += 1
+                    raise FakeAPIError(500, f'injected error on {endpoint}')
+            return fn(*args, **kwargs)
+        finally:
+            stat['seconds'] += time.perf_counter() - started
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+            self.call_times.clear()
+
+    # Market data
+
+    def bars(self, symbols, time_frame, start, end):
+        """Bars for `symbols` with start <= timestamp <= end, as a (symbol, timestamp) MultiIndex frame."""
+        unit, amount = self._time_frame(time_frame)
+        start = self._utc(start)
+        end = min(self._utc(end), self.now())
+        frames = {}
+        for symbol in symbols:
+            df = self._recorded_bars(symbol, unit, amount, start, end) if symbol in self.recorded \
+                else self._synthetic_bars(symbol, unit, amount, start, end)
+            if len(df):
+                frames[symbol] = df
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, names=['symbol', 'timestamp'])
+        return df[BAR_COLUMNS]
+
+    def price(self, symbol):
+        """Last close at or before the market's current time."""
+        now = self.now()
+        if symbol in self.recorded:
+            closes = self.recorded[symbol]['close']
+            closes = closes[closes.index <= now]
+            return float(closes.iloc[-1]) if len(closes) else 0.0
+        return float(self._synthetic_close(symbol, np.array([now.value], dtype=np.int64))[0])
+
+    @staticmethod
+    def _time_frame(time_frame):
+        unit = getattr(time_frame, 'unit', None)
+        unit = getattr(unit, 'value', unit) or getattr(getattr(time_frame, 'unit_value', None), 'value', 'Min')
+        amount = getattr(time_frame, 'amount', None) or getattr(time_frame, 'amount_value', 1)
+        return unit, int(amount)
+
+    @staticmethod
+    def _utc(ts):
+        ts = pd.Timestamp(ts)
+        return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+    def _recorded_bars(self, symbol, unit, amount, start, end):
+        df = self.recorded[symbol]
+        df = df[(df.index >= start) & (df.index <= end)]
+        if unit == 'Min' and amount == 1:
+            return df[BAR_COLUMNS]
+        rule = {'Min': f'{amount}min', 'Hour': f'{amount}h', 'Day': f'{amount}D'}[unit]
+        if unit == 'Day':
+            df = df.tz_convert('America/New_York')
+        df = df.assign(trading_value=df['volume'] * df['vwap'])
+        agg = df.resample(rule).agg(dict(open='first', high='max', low='min', close='last',
+                                         volume='sum', trade_count='sum', trading_value='sum')).dropna()
+        agg['vwap'] = agg['trading_value'] / agg['volume'].where(agg['volume'] > 0)
+        return agg[BAR_COLUMNS].tz_convert('UTC')
+
+    def _synthetic_bars(self, symbol, unit, amount, start, end):
+        index = self._synthetic_index(unit, amount, start, end)
+        if not len(index):
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        step = {'Min': 60, 'Hour': 3600, 'Day': 57600}[unit] * amount * 10 ** 9
+        t = index.asi8
+        # 진행 중인 bar는 현재 시각까지의 가격으로 마감
+        close = self._synthetic_close(symbol, np.minimum(t + step, self.now().value))
+        open_ = self._synthetic_close(symbol, t)
+        high = np.maximum(open_, close) * 1.001
+        low = np.minimum(open_, close) * 0.999
+        seed = self._seed(symbol)
+        volume = np.full(len(t), float(1000 + seed % 9000) * step / (60 * 10 ** 9))
+        return pd.DataFrame(dict(open=open_, high=high, low=low, close=close, volume=volume,
+                                 trade_count=np.floor(volume / 10.0), vwap=(high + low + close) / 3.0),
+                            index=index)
+
+    @staticmethod
+    def _synthetic_index(unit, amount, start, end):
+        if unit == 'Day':
+            days = pd.date_range(start.tz_convert('America/New_York').normalize(), end.tz_convert('America/New_York'),
+                                 freq=f'{amount}D')
+            days = days[days.dayofweek < 5]
+            return days[(days >= start) & (days <= end)].tz_convert('UTC')
+        freq = f'{amount}min' if unit == 'Min' else f'{amount}h'
+        index = pd.date_range(start.ceil(freq), end, freq=freq, tz='UTC')
+        local = index.tz_convert('America/New_York')
+        minutes = local.hour * 60 + local.minute
+        if unit == 'Min':
+            in_session = (minutes >= 9 * 60 + 30) & (minutes < 16 * 60)
+        else:
+            in_session = (minutes >= 4 * 60) & (minutes < 20 * 60)
+        return index[in_session & (local.dayofweek < 5)]
+
+    @staticmethod
+    def _seed(symbol):
+        return zlib.crc32(symbol.encode())
+
+    def _synthetic_close(self, symbol, t_ns):
+        seed = self._seed(symbol)
+        base = 20.0 + seed % 480
+        phase = (seed % 1000) / 1000.0 * 2.0 * math.pi
+        t = t_ns / 1e9
+        return base * (1.0
+                       + 0.08 * np.sin(2.0 * math.pi * t / (86400 * 23) + phase)
+                       + 0.02 * np.sin(2.0 * math.pi * t / (3600 * 7) + 2.0 * phase)
+                       + 0.004 * np.sin(2.0 * math.pi * t / (60 * 37) + 3.0 * phase))
+
+    # Paper account
+
+    def submit_order(self, order_data):
+        symbol = order_data.symbol
+        qty = float(order_data.qty)
+        side = str(getattr(order_data.side, 'value', order_data.side)).lower()
+        price = self.price(symbol)
+        with self.lock:
+            position = self.positions.setdefault(symbol, dict(qty=0.0, cost=0.0))
+            if side == 'buy':
+                self.cash -= price * qty
+                position['qty'] += qty
+                position['cost'] += price * qty
+            else:
+                qty = min(qty, position['qty'])
+                if position['qty'] > 0:
+                    position['cost'] -= position['cost'] * qty / position['qty']
+                position['qty'] -= qty
+                self.cash += price * qty
+            if position['qty'] <= 0:
+                del self.positions[symbol]
+            order = SimpleNamespace(id=str(uuid.uuid4()), client_order_id=str(uuid.uuid4()), symbol=symbol,
+                                    qty=str(qty), side=side, status='filled', filled_at=self.now(),
+                                    filled_avg_price=str(price))
+            self.orders[order.client_order_id] = order
+        return order
+
+    def get_order_by_client_id(self, client_id):
+        if client_id not in self.orders:
+            raise FakeAPIError(404, f'order {client_id} not found')
+        return self.orders[client_id]
+
+    def get_all_positions(self):
+        with self.lock:
+            holdings = dict(self.positions)
+        positions = []
+        for symbol, position in holdings.items():
+            price = self.price(symbol)
+            positions.append(SimpleNamespace(symbol=symbol, qty=str(position['qty']),
+                                             current_price=str(price), market_value=str(price * position['qty']),
+                                             avg_entry_price=str(position['cost'] / position['qty']),
+                                             cost_basis=str(position['cost'])))
+        return positions
+
+    def get_account(self):
+        return SimpleNamespace(cash=str(self.cash))
+
+    def get_all_assets(self, filter=None):
+        return [SimpleNamespace(symbol=symbol, tradable=True) for symbol in self.symbols]
+
+
+class FakeTradingClient:
+    """Stand-in for `TradingClient` backed by a `FakeMarket`."""
+
+    def __init__(self, market):
+        self.market = market
+
+    def get_account(self):
+        return self.market.call('get_account', self.market.get_account)
+
+    def get_all_positions(self):
+        return self.market.call('get_all_positions', self.market.get_all_positions)
+
+    def submit_order(self, order_data):
+        return self.market.call('submit_order', self.market.submit_order, order_data)
+
+    def get_order_by_client_id(self, client_id):
+        return self.market.call('get_order_by_client_id', self.market.get_order_by_client_id, client_id)
+
+    def get_all_assets(self, filter=None):
+        return self.market.call('get_all_assets', self.market.get_all_assets, filter)
+
+
+class FakeStockHistoricalDataClient:
+    """Stand-in for `StockHistoricalDataClient` backed by a `FakeMarket`."""
+
+    def __init__(self, market, raw_data=False):
+        self.market = market
+        self.raw_data = raw_data
+
+    def get_stock_bars(self, request_params):
+        symbols = request_params.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        bars = lambda: self.market.bars(symbols, request_params.timeframe, request_params.start, request_params.end)
+        if self.raw_data:
+            return self.market.call('get_stock_bars', lambda: self._raw(bars()))
+        return self.market.call('get_stock_bars', lambda: FakeBarSet(bars()))
+
+    def get_stock_latest_bar(self, request_params):
+        symbols = request_params.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+
+        def latest():
+            now = self.market.now()
+            bars = self.market.bars(symbols, SimpleNamespace(unit='Min', amount=1), now - pd.Timedelta(minutes=5), now)
+            if bars.empty:
+                return {}
+            bars = bars.groupby(level='symbol').tail(1)
+            if self.raw_data:
+                return {symbol: bar[0] for symbol, bar in self._raw(bars).items()}
+            return {symbol: SimpleNamespace(symbol=symbol, timestamp=timestamp, **row.to_dict())
+                    for (symbol, timestamp), row in bars.iterrows()}
+        return self.market.call('get_stock_latest_bar', latest)
+
+    @staticmethod
+    def _raw(df):
+        """The `{symbol: [bar dict]}` payload a `raw_data=True` client returns."""
+        raw = {}
+        for (symbol, timestamp), row in df.iterrows():
+            raw.setdefault(symbol, []).append(dict(t=timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'), o=row['open'], h=row['high'],
+                                                   l=row['low'], c=row['close'], v=row['volume'],
+                                                   n=row['trade_count'], vw=row['vwap']))
+        return raw
+
+
+class FakeStockDataStream:
+    """Stand-in for `StockDataStream` that pushes each finished minute's bars of the subscribed symbols.
+
+    It only watches the market clock (polling every `poll_interval` real seconds), so it follows
+    wall, accelerated or stepped clocks alike. `delivery_delay` delays publication after the
+    minute boundary, in market seconds. Trade subscribers get one trade per symbol every
+    `trade_interval` market seconds at the market's current price.
+    """
+
+    def __init__(self, market, delivery_delay=1.0, poll_interval=0.01, trade_interval=1.0):
+        self.market = market
+        self.delivery_delay = pd.Timedelta(seconds=delivery_delay)
+        self.poll_interval = poll_interval
+        self.trade_interval = pd.Timedelta(seconds=trade_interval)
+        self.handler = None
+        self.symbols = []
+        self.trade_handler = None
+        self.trade_symbols = set()
+        self.running = False
+
+    def subscribe_bars(self, handler, *symbols):
+        self.handler = handler
+        self.symbols = list(symbols)
+
+    def subscribe_trades(self, handler, *symbols):
+        self.trade_handler = handler
+        self.trade_symbols.update(symbols)
+
+    def unsubscribe_trades(self, *symbols):
+        self.trade_symbols.difference_update(symbols)
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        self.running = True
+        published = self.market.now().floor('min')
+        traded = self.market.now()
+        try:
+            while self.running:
+                now = self.market.now()
+                boundary = (now - self.delivery_delay).floor('min')
+                while self.handler is not None and published < boundary:
+                    self._publish(loop, published)
+                    published += pd.Timedelta(minutes=1)
+                if self.trade_handler is not None and now - traded >= self.trade_interval:
+                    self._publish_trades(loop, now)
+                    traded = now
+                time.sleep(self.poll_interval)
+        finally:
+            loop.close()
+
+    def stop(self):
+        self.running = False
+
+    def _publish(self, loop, bar_time):
+        minute = SimpleNamespace(unit='Min', amount=1)
+        df = self.market.bars(self.symbols, minute, bar_time, bar_time)
+        if df.empty:
+            return
+        for (symbol, timestamp), row in df.iterrows():
+            bar = SimpleNamespace(symbol=symbol, timestamp=timestamp, **row.to_dict())
+            loop.run_until_complete(self.handler(bar))
+
+    def _publish_trades(self, loop, now):
+        for symbol in list(self.trade_symbols):
+            trade = SimpleNamespace(symbol=symbol, timestamp=now, price=self.market.price(symbol), size=100.0)
+            loop.run_until_complete(self.trade_handler(trade))
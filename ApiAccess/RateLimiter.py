@@ -0,0 +1,91 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Priority classes of API calls; lower values are served first."""
+    ORDER = 0
+    POSITION = 1
+    RECENT_BARS = 2
+    HISTORY = 3
+
+
+_local = threading.local()
+
+
+@contextmanager
+def request_priority(priority):
+    """Run the API calls of the current thread (and the fetches it starts) with `priority`."""
+    previous = getattr(_local, 'priority', None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority():
+    """Priority set by `request_priority` on this thread, or None."""
+    return getattr(_local, 'priority', None)
+
+
+class RateLimiter:
+    """Process-wide token bucket shared by every REST call, served by priority.
+
+    The bucket holds up to `burst` tokens and refills at `per_minute / 60` per second, so
+    sustained throughput is `per_minute` calls a minute and at most `burst` calls go out
+    back to back after an idle spell. Calls waiting for a token are granted
+    in priority order (FIFO within a class), so a burst of history requests delays orders
+    by at most one token instead of being rejected with 429s. Time spent waiting is
+    counted per class.
+    """
+
+    def __init__(self, per_minute=200, burst=20):
+        self.per_minute = per_minute
+        self.burst = min(burst, per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.stats = {priority: dict(calls=0, waited=0, wait_seconds=0.0, max_wait=0.0) for priority in Priority}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=Priority.HISTORY):
+        """Block until a token is granted to this call; returns the seconds waited."""
+        started = time.monotonic()
+        with self.condition:
+            ticket = (priority, next(self.sequence))
+            heapq.heappush(self.waiters, ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.waiters[0] == ticket and self.tokens >= 1.0:
+                    heapq.heappop(self.waiters)
+                    self.tokens -= 1.0
+                    # 다음 순서의 대기자가 자기 차례를 확인하도록 깨움
+                    self.condition.notify_all()
+                    break
+                # 맨 앞 대기자만 토큰이 찰 때까지 시간 제한을 두고 기다림
+                timeout = (1.0 - self.tokens) / self.rate if self.waiters[0] == ticket else None
+                self.condition.wait(timeout)
+            waited = time.monotonic() - started
+            stat = self.stats[priority]
+            stat['calls'] += 1
+            if waited > 1e-3:
+                stat['waited'] += 1
+                stat['wait_seconds'] += waited
+                stat['max_wait'] = max(stat['max_wait'], waited)
+        return waited
+
+    def summary(self):
+        with self.condition:
+            return {priority.name: dict(stat) for priority, stat in self.stats.items()}
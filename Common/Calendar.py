@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pandas as pd
+from Common.Lazy import LazyModule
+
+Calender = LazyModule('pandas_market_calendars')
+
+
+class SessionCalendar:
+    """NYSE session table (date, open, close in ET) shipped as a local CSV.
+
+    `open_days` reads the table instead of building the NYSE calendar of
+    pandas_market_calendars, which costs more than the rest of a short run's startup.
+    The calendar is only built when the table does not cover the requested range; the
+    extended table is written back so the next process reads it again.
+    """
+
+    def __init__(self, path=f'{os.environ.get("D4")}/Data/Calendar/nyse_sessions.csv'):
+        self.path = path
+        self.sessions = None
+
+    def load(self):
+        if self.sessions is None:
+            try:
+                self.sessions = pd.read_csv(self.path, dtype=str)
+            except (OSError, pd.errors.EmptyDataError):
+                self.sessions = pd.DataFrame(columns=['date', 'open', 'close'])
+        return self.sessions
+
+    def covers(self, start, end):
+        sessions = self.load()
+        if sessions.empty:
+            return False
+        return sessions['date'].iloc[0] <= self._date(start) and self._date(end) <= sessions['date'].iloc[-1]
+
+    @staticmethod
+    def _date(timestamp):
+        return pd.Timestamp(timestamp).strftime('%Y-%m-%d')
+
+    def build(self, start, end, timezone='America/New_York'):
+        """Extend the table to cover `[start, end]` with the NYSE calendar and save it."""
+        sessions = self.load()
+        if not sessions.empty:
+            start = min(pd.Timestamp(self._date(start)), pd.Timestamp(sessions['date'].iloc[0]))
+            end = max(pd.Timestamp(self._date(end)), pd.Timestamp(sessions['date'].iloc[-1]))
+        schedule = Calender.get_calendar('NYSE').schedule(start_date=self._date(start), end_date=self._date(end))
+        self.sessions = pd.DataFrame({'date': schedule.index.strftime('%Y-%m-%d'),
+                                      'open': schedule['market_open'].dt.tz_convert(timezone).dt.strftime('%H:%M').to_numpy(),
+                                      'close': schedule['market_close'].dt.tz_convert(timezone).dt.strftime('%H:%M').to_numpy()})
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.sessions.to_csv(self.path, index=False)
+        return self.sessions
+
+    def open_days(self, start, end):
+        """Epoch days (`ns // DAY_NS` of the local midnight) of the sessions in `[start, end]`."""
+        if not self.covers(start, end):
+            print(f"Session table does not cover {self._date(start)} ~ {self._date(end)}, building NYSE calendar")
+            self.build(start, end)
+        dates = self.sessions['date'].to_numpy()
+        dates = dates[(dates >= self._date(start)) & (dates <= self._date(end))]
+        return set(np.array(dates, dtype='datetime64[D]').astype(np.int64).tolist())
@@ -0,0 +1,106 @@
+import threading
+import time
+import pandas as pd
+
+
+class WallClock:
+    """Real time. Default clock of TimeManager and the live trader."""
+
+    def now(self, tz='UTC'):
+        return pd.Timestamp.now(tz=tz)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Clock for replaying a session faster than real time.
+
+    With `speed` set, virtual time runs `speed` times faster than the wall clock from `start`
+    and `sleep` is shortened accordingly. With `speed=None` the clock only moves when someone
+    sleeps or calls `advance`/`set`, so code driven by it runs as fast as it can compute.
+    """
+
+    def __init__(self, start, speed=100.0, timezone='America/New_York'):
+        start = pd.Timestamp(start)
+        self.start = start.tz_localize(timezone) if start.tz is None else start
+        self.speed = speed
+        self.offset = pd.Timedelta(0)
+        self.wall_start = time.monotonic()
+        self.lock = threading.Lock()
+
+    def now(self, tz='UTC'):
+        with self.lock:
+            current = self.start + self.offset
+            if self.speed is not None:
+                current += pd.Timedelta(seconds=(time.monotonic() - self.wall_start) * self.speed)
+        return current.tz_convert(tz)
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if self.speed is None:
+            self.advance(seconds)
+        else:
+            time.sleep(seconds / self.speed)
+
+    def advance(self, seconds):
+        with self.lock:
+            self.offset += pd.Timedelta(seconds=seconds)
+
+    def set(self, timestamp):
+        """Jump to `timestamp` (never backwards)."""
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tz is None:
+            timestamp = timestamp.tz_localize(self.start.tz)
+        delta = timestamp - self.now(self.start.tz)
+        if delta > pd.Timedelta(0):
+            self.advance(delta.total_seconds())
+
+
+MINUTE_NS = 60 * 10 ** 9
+HOUR_NS = 60 * MINUTE_NS
+DAY_NS = 24 * HOUR_NS
+
+
+class SessionTime:
+    """Session fields of int64 epoch-ns timestamps, for hot loops that avoid `pd.Timestamp`.
+
+    The UTC offset of the exchange timezone is looked up once per UTC day (at 12:00 UTC) and
+    cached process-wide. DST switches at 02:00 local time, so the cached offset is exact
+    for every time after 07:00 UTC, which covers all session minutes.
+    """
+
+    _offsets = {}
+
+    def __init__(self, timezone='America/New_York', session_open=(9, 30)):
+        self.timezone = str(timezone)
+        self.open_minute = session_open[0] * 60 + session_open[1]
+
+    def offset(self, ns):
+        day = ns // DAY_NS
+        key = (self.timezone, day)
+        offset = SessionTime._offsets.get(key)
+        if offset is None:
+            noon = pd.Timestamp(day * DAY_NS + 12 * HOUR_NS, tz='UTC').tz_convert(self.timezone)
+            offset = SessionTime._offsets[key] = int(noon.utcoffset().total_seconds()) * 10 ** 9
+        return offset
+
+    def local_ns(self, ns):
+        return ns + self.offset(ns)
+
+    def session_day(self, ns):
+        """Local calendar day as days since the epoch."""
+        return self.local_ns(ns) // DAY_NS
+
+    def minute_of_day(self, ns):
+        return (self.local_ns(ns) % DAY_NS) // MINUTE_NS
+
+    def minute_of_session(self, ns):
+        """Minutes since the session open (negative before the open)."""
+        return self.minute_of_day(ns) - self.open_minute
+
+    def to_timestamp(self, ns):
+        """Timezone-aware timestamp, for logging and export only."""
+        return pd.Timestamp(ns, tz='UTC').tz_convert(self.timezone)
@@ -98,7 +98,8 @@ def r2(num):
 class Printer:
     @staticmethod
     def store_prophecy_history(prophecy_history, filename):
-        prophecy_history['time'] = prophecy_history['time'].apply(lambda x: x.tz_convert('America/New_York'))
+        # 엔진 내부의 epoch ns 시간은 저장할 때만 시각으로 변환
+        prophecy_history['time'] = pd.to_datetime(prophecy_history['time'], utc=True).dt.tz_convert('America/New_York')
 
         prophecy_history.rename(columns={'time': '시간',
                                       'symbol': '종목',
@@ -0,0 +1,36 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """Module proxy that imports `name` on first attribute access.
+
+    Heavy dependencies (pandas_ta, scipy, pandas_market_calendars, openpyxl) are only
+    needed once a run actually computes indicators or exports results, so importing them
+    at module level makes every short sweep or test process pay for them.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        if attribute in ('_name', '_module', '_lock'):
+            raise AttributeError(attribute)  # copy/pickle로 __init__ 없이 생성된 경우
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
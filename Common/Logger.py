@@ -3,7 +3,9 @@ from datetime import datetime
 import os
 import pandas as pd
 import pytz
-from openpyxl import load_workbook
+from Common.Lazy import LazyModule
+
+openpyxl = LazyModule('openpyxl')
 
 
 class Logger:
@@ -94,7 +96,7 @@ def search_and_export_to_excel(filename, start, end,):
     writer.close()
 
     # 기본 Sheet 제거
-    workbook = load_workbook(output_excel)
+    workbook = openpyxl.load_workbook(output_excel)
     if 'Sheet' in workbook.sheetnames:  # 기본 시트가 존재할 경우 삭제
         workbook.remove(workbook['Sheet'])
     workbook.save(output_excel)
@@ -0,0 +1,198 @@
+import asyncio
+import random
+import threading
+import time
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor
+from ApiAccess.RateLimiter import request_priority, current_priority
+
+
+BarRequest = namedtuple('BarRequest', ['symbols', 'start', 'end', 'time_frame'])
+# 종목별 최신 분봉 하나 (latest bar 엔드포인트); [start, end] 밖의 오래된 봉은 버림
+LatestBarRequest = namedtuple('LatestBarRequest', ['symbols', 'start', 'end'])
+
+
+class AsyncBarFetcher:
+    """Asyncio fetch layer for bar requests.
+
+    An event loop runs in a background thread and drives `api_fetcher.get_stock_history`
+    calls on a persistent worker pool. Concurrency is bounded by a semaphore, each request
+    has its own timeout, and `deadline` bounds a whole batch: requests still running when it
+    expires are cancelled and reported as errors. Synchronous code uses `fetch_many`;
+    coroutines can await `fetch`/`fetch_all` on `self.loop` directly.
+
+    The SDK calls are blocking, so a timeout or cancellation only abandons the awaiting
+    future: the HTTP call already running in a worker thread keeps that thread (and its
+    slot) until it returns. Each instance owns a loop thread and a pool; call `close` when
+    it is no longer used.
+
+    With `hedge=True` a request still running after the p95 of recent request latencies
+    gets a duplicate, and whichever answers first wins. The duplicate is only sent while
+    the pool has an idle thread, since the losing call is abandoned rather than stopped and
+    keeps its thread (and rate-limit token) until it returns; such calls are counted in
+    `stats['abandoned']`. Timed-out requests enter the latency window at their timeout.
+    Failed requests are retried up to `retries` times with jittered exponential backoff, as
+    long as the batch deadline leaves room for another attempt.
+    """
+
+    def __init__(self, api_fetcher, max_concurrency=16, timeout=30.0, backoff=0.2, latency_window=200, min_samples=20):
+        self.api_fetcher = api_fetcher
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.backoff = backoff
+        self.latencies = deque(maxlen=latency_window)
+        self.min_samples = min_samples
+        self.stats = dict(requests=0, hedges=0, hedge_wins=0, hedges_skipped=0, retries=0, failures=0, abandoned=0)
+        self.busy = 0  # worker pool에 제출되어 아직 끝나지 않은 호출 수 (버려진 호출 포함)
+        self.busy_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='bar-fetch')
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.tasks = set()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def _call_with_priority(priority, fn, *args):
+        """Run `fn` on a worker thread with the rate-limit priority of the thread that asked for it."""
+        if priority is None:
+            return fn(*args)
+        with request_priority(priority):
+            return fn(*args)
+
+    def _submit(self, fn, *args):
+        with self.busy_lock:
+            self.busy += 1
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self.busy_lock:
+            self.busy -= 1
+
+    def has_idle_thread(self):
+        with self.busy_lock:
+            return self.busy < self.max_concurrency
+
+    async def fetch(self, request, timeout=None, priority=None):
+        """Fetch one request; returns the api fetcher's result (per-symbol frames or a (symbol, timestamp) frame)."""
+        timeout = timeout or self.timeout
+        async with self.semaphore:
+            started = time.perf_counter()
+            if isinstance(request, LatestBarRequest):
+                future = self._submit(self._call_with_priority, priority, self.api_fetcher.get_latest_bars,
+                                      request.symbols, request.start, request.end)
+            else:
+                future = self._submit(self._call_with_priority, priority, self.api_fetcher.get_stock_history,
+                                      request.symbols, request.start, request.end, request.time_frame)
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future, loop=self.loop), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.latencies.append(timeout)  # 제한시간 초과도 p95에 반영
+                if not future.cancel() and not future.done():
+                    # 이미 실행 중인 SDK 호출은 멈출 수 없음
+                    self.stats['abandoned'] += 1
+                raise
+            self.latencies.append(time.perf_counter() - started)
+            return result
+
+    def p95(self):
+        """95th percentile of recent request latencies in seconds, None until `min_samples` are in."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    async def fetch_hedged(self, request, timeout=None, ends_at=None, retries=0, priority=None):
+        """Fetch one request with a hedged duplicate past the p95 latency and bounded jittered retries."""
+        self.stats['requests'] += 1
+        for attempt in range(retries + 1):
+            try:
+                return await self._fetch_first(request, timeout, priority)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                backoff = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                estimate = self.p95() or 0.0
+                if attempt == retries or (ends_at is not None and time.monotonic() + backoff + estimate >= ends_at):
+                    self.stats['failures'] += 1
+                    raise
+                self.stats['retries'] += 1
+                await asyncio.sleep(backoff)
+
+    async def _fetch_first(self, request, timeout, priority):
+        hedge_after = self.p95()
+        primary = asyncio.ensure_future(self.fetch(request, timeout, priority))
+        if hedge_after is None:
+            return await primary
+        done, _ = await asyncio.wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+        if not self.has_idle_thread():
+            # 중복 요청이 버려진 호출 뒤에 줄 서지 않도록 빈 스레드가 있을 때만 hedge
+            self.stats['hedges_skipped'] += 1
+            return await primary
+        self.stats['hedges'] += 1
+        hedge = asyncio.ensure_future(self.fetch(request, timeout, priority))
+        attempts = [primary, hedge]
+        try:
+            while attempts:
+                done, _ = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    attempts.remove(task)
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    if not attempts:
+                        raise task.exception()
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def fetch_all(self, requests, timeout=None, deadline=None, hedge=False, retries=0, priority=None):
+        """Fetch all requests concurrently; returns ([(request, result)], [(request, error)])."""
+        if hedge or retries:
+            ends_at = time.monotonic() + deadline if deadline is not None else None
+            tasks = [asyncio.ensure_future(self.fetch_hedged(request, timeout, ends_at, retries, priority)) for request in requests]
+        else:
+            tasks = [asyncio.ensure_future(self.fetch(request, timeout, priority)) for request in requests]
+        if not tasks:
+            return [], []
+        self.tasks.update(tasks)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            results, errors = [], []
+            for request, task in zip(requests, tasks):
+                if task in pending or task.cancelled():
+                    errors.append((request, asyncio.TimeoutError('batch deadline exceeded')))
+                elif task.exception() is not None:
+                    errors.append((request, task.exception()))
+                else:
+                    results.append((request, task.result()))
+            return results, errors
+        finally:
+            self.tasks.difference_update(tasks)
+
+    def fetch_many(self, requests, timeout=None, deadline=None, hedge=False, retries=0):
+        """Blocking facade over `fetch_all` for synchronous callers; requests keep the caller's `request_priority`."""
+        future = asyncio.run_coroutine_threadsafe(
+            self.fetch_all(list(requests), timeout, deadline, hedge, retries, current_priority()), self.loop)
+        return future.result()
+
+    def cancel_all(self):
+        """Cancel every request that is still waiting or running."""
+        def cancel():
+            for task in list(self.tasks):
+                task.cancel()
+        self.loop.call_soon_threadsafe(cancel)
+
+    def close(self):
+        """Cancel pending requests and stop the loop thread; calls already running finish in their threads."""
+        self.cancel_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.executor.shutdown(wait=False)
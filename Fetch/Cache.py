@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+import pandas as pd
+
+
+class BarCache:
+    """Disk-backed cache of bar responses with size-bounded LRU eviction.
+
+    Entries are keyed by (symbols, timeframe, start, end, feed, adjustment) and stored as
+    gzip-compressed pickles. A hit refreshes the file's mtime, and the least recently used
+    files are evicted once the directory grows past `max_bytes`. Windows that end within
+    `safety` of now (plus one bar) are never cached, since their last bars can still change.
+    """
+
+    BAR_DURATION = {'Min': pd.Timedelta(minutes=1), 'Hour': pd.Timedelta(hours=1), 'Day': pd.Timedelta(days=1),
+                    'Week': pd.Timedelta(weeks=1), 'Month': pd.Timedelta(days=31)}
+
+    def __init__(self, directory=f'{os.environ.get("D4")}/Data/Cache/Bars', max_bytes=2 * 1024 ** 3,
+                 safety=pd.Timedelta(minutes=15)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.safety = safety
+        self.lock = threading.Lock()
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(symbols, time_frame, start, end, feed, adjustment):
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        parts = [','.join(sorted(set(symbols))), str(getattr(time_frame, 'value', time_frame)),
+                 BarCache._utc(start).isoformat(), BarCache._utc(end).isoformat(),
+                 str(getattr(feed, 'value', feed)), str(getattr(adjustment, 'value', adjustment))]
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    @staticmethod
+    def _utc(ts):
+        ts = pd.Timestamp(ts)
+        return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+    def cacheable(self, time_frame, end):
+        unit = getattr(getattr(time_frame, 'unit', None), 'value', 'Day')
+        amount = int(getattr(time_frame, 'amount', 1))
+        bar_end = self._utc(end) + self.BAR_DURATION.get(unit, pd.Timedelta(days=1)) * amount
+        return bar_end + self.safety < pd.Timestamp.now(tz='UTC')
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl.gz")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            df = pd.read_pickle(path, compression='gzip')
+            os.utime(path)
+        except (FileNotFoundError, EOFError):
+            self._count(hit=False)
+            return None
+        except Exception as e:
+            print(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return df
+
+    def _count(self, hit):
+        # fetcher worker 스레드들이 동시에 조회하므로 lock 안에서 집계
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def hit_rate(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def put(self, key, bars):
+        """Store a response: a bar frame, or the {symbol: frame} dict of the raw decoder."""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        pd.to_pickle(bars, tmp_path, compression={'method': 'gzip', 'compresslevel': 1})
+        os.replace(tmp_path, path)
+        with self.lock:
+            if self.size is None:
+                self.size = self._scan_size()
+            else:
+                self.size += os.path.getsize(path)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith('.pkl.gz'))
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is back under 90% of its budget."""
+        entries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.pkl.gz')),
+                         key=lambda entry: entry.stat().st_mtime)
+        self.size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.size <= self.max_bytes * 0.9:
+                break
+            self.size -= entry.stat().st_size
+            self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
 from ApiAccess.ApiAccess import ClientType, ClientManager
-from alpaca.data.requests import StockBarsRequest
+from Fetch.AsyncFetch import AsyncBarFetcher, BarRequest
+from Fetch.Cache import BarCache
+from alpaca.data.requests import StockBarsRequest, StockLatestBarRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.data.enums import DataFeed, Adjustment
+import numpy as np
 import pandas as pd
 import os
 import pytz
@@ -11,49 +14,134 @@ import pytz
 class Fetcher:
     """Combines API fetching, local data handling, and processing."""
 
-    def __init__(self):
+    def __init__(self, max_concurrency=16, timeout=30.0):
         self.api_fetcher = ApiDataFetcher()
         self.local_handler = LocalDataFetcher()
         self.processor = HistoryProcessor()
+        self.async_fetcher = AsyncBarFetcher(self.api_fetcher, max_concurrency=max_concurrency, timeout=timeout)
+
+    def close(self):
+        """Stop the event-loop thread and worker pool of the async fetcher."""
+        self.async_fetcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def get_stock_history(self, symbols, start, end, time_frame, bar_window=1, min_num_bars=0, timezone='America/New_York', local_data=False):
         """Retrieve stock history from API or local data."""
         if local_data:
             history = self.local_handler.get_stock_history_from_local_data(symbols, start, end, time_frame, timezone)
-        else:
-            df_history = self.api_fetcher.get_stock_history(symbols, start, end, time_frame)
-            if df_history.empty:
-                return {}
-            grouped = df_history.groupby(level='symbol')
-            history = {symbol: group.reset_index(level='symbol', drop=True) for symbol, group in grouped}
+            if bar_window > 1:
+                history = {k: self.processor.merge_to_a_single_bar(v, bar_window) for k, v in history.items()}
+            return self.processor.remove_symbols_with_small_num_bars(history, min_num_bars)
+
+        history, errors = self.get_stock_history_many([BarRequest(symbols, start, end, time_frame)],
+                                                      bar_window=bar_window, min_num_bars=min_num_bars)
+        if errors:
+            raise errors[0][1]
+        return history
+
+    def get_stock_history_many(self, requests, bar_window=1, min_num_bars=0, timeout=None, deadline=None, hedge=False, retries=0):
+        """Fetch several BarRequests concurrently; returns (per-symbol history, [(request, error)])."""
+        results, errors = self.async_fetcher.fetch_many(requests, timeout=timeout, deadline=deadline, hedge=hedge, retries=retries)
+        history = {}
+        for _, df_history in results:
+            self.processor.merge_into(history, self.processor.split_by_symbol(df_history))
 
         if bar_window > 1:
             history = {k: self.processor.merge_to_a_single_bar(v, bar_window) for k, v in history.items()}
 
-        return self.processor.remove_symbols_with_small_num_bars(history, min_num_bars)
+        return self.processor.remove_symbols_with_small_num_bars(history, min_num_bars), errors
+
+    def get_stock_history_gaps(self, gaps, time_frame, planner):
+        """Fetch per-symbol gap ranges, one planned batch per distinct set of gaps.
+
+        Returns (per-symbol history, set of failed (symbol, gap start)).
+        """
+        groups = {}
+        for symbol, symbol_gaps in gaps.items():
+            groups.setdefault(tuple(symbol_gaps), []).append(symbol)
+        requests, request_gap = [], {}
+        for symbol_gaps, group in groups.items():
+            for gap_start, gap_end in symbol_gaps:
+                for request in planner.plan(group, gap_start, gap_end, time_frame):
+                    requests.append(request)
+                    request_gap[id(request)] = gap_start
+        fetched, errors = self.get_stock_history_many(requests)
+        failed = set()
+        for request, e in errors:
+            print(f"Error fetching data for symbols {request.symbols}: {e}")
+            failed.update((symbol, request_gap[id(request)]) for symbol in request.symbols)
+        return fetched, failed
 
 
 class ApiDataFetcher:
-    """Handles fetching data from Alpaca APIs."""
-    def __init__(self):
+    """Handles fetching data from Alpaca APIs.
+
+    With `raw=True` bars are requested as raw JSON and decoded straight into per-symbol
+    frames by `HistoryProcessor.decode_raw_bars`, skipping the SDK's per-bar model objects,
+    its MultiIndex frame and the groupby split.
+    """
+    def __init__(self, use_cache=True, raw=True, cache=None, cache_fake=False):
         self.client_manager = ClientManager()
+        self.cache = cache or (BarCache() if use_cache else None)
+        self.raw = raw
+        self.cache_fake = cache_fake  # FakeMarket 응답도 캐시 (캐시 경로 점검용)
 
     def get_stock_history(self, symbols, start, end, time_frame):
-        stock_client = self.client_manager.get_client(ClientType.STOCK_HISTORY)
         time_margin = pd.Timedelta(seconds=10)
+        start = start - time_margin
+        # FakeMarket 데이터는 캐시하지 않음
+        use_cache = (self.cache is not None and (ClientManager.fake_market is None or self.cache_fake)
+                     and self.cache.cacheable(time_frame, end))
+        if use_cache:
+            key = self.cache.key(symbols, time_frame, start, end, DataFeed.SIP, Adjustment.SPLIT)
+            df_history = self.cache.get(key)
+            if df_history is not None:
+                return df_history
+
+        stock_client = self.client_manager.get_client(ClientType.STOCK_HISTORY_RAW if self.raw else ClientType.STOCK_HISTORY)
         request_params = StockBarsRequest(
             symbol_or_symbols=symbols,
             timeframe=time_frame,
-            start=(start-time_margin).to_pydatetime(),
+            start=start.to_pydatetime(),
             end=end.to_pydatetime(),
             feed=DataFeed.SIP,
             adjustment=Adjustment.SPLIT
         )
-        df_history = stock_client.get_stock_bars(request_params).df
-        if not df_history.empty:
-            df_history['trading_value'] = df_history['volume'] * df_history['vwap']
+        if self.raw:
+            df_history = HistoryProcessor.decode_raw_bars(stock_client.get_stock_bars(request_params))
+        else:
+            df_history = stock_client.get_stock_bars(request_params).df
+            if not df_history.empty:
+                df_history['trading_value'] = df_history['volume'] * df_history['vwap']
+        if use_cache:
+            self.cache.put(key, df_history)
         return df_history
 
+    def get_latest_bars(self, symbols, start, end):
+        """Latest minute bar of every symbol in one call, as per-symbol frames.
+
+        Symbols whose latest bar lies outside `[start, end]` (no trade in the window) are
+        left out, as a bar window request over the same range would.
+        """
+        time_margin = pd.Timedelta(seconds=10)
+        stock_client = self.client_manager.get_client(ClientType.STOCK_HISTORY_RAW if self.raw else ClientType.STOCK_HISTORY)
+        latest = stock_client.get_stock_latest_bar(StockLatestBarRequest(symbol_or_symbols=symbols, feed=DataFeed.SIP))
+        if self.raw:
+            history = HistoryProcessor.decode_raw_bars({symbol: [bar] for symbol, bar in latest.items()})
+        else:
+            history = {symbol: pd.DataFrame({name: [getattr(bar, name)] for name in ('open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap')},
+                                            index=pd.DatetimeIndex([pd.Timestamp(bar.timestamp)], name='timestamp'))
+                       for symbol, bar in latest.items()}
+            for df in history.values():
+                df['trading_value'] = df['volume'] * df['vwap']
+        start, end = start - time_margin, end
+        return {symbol: df for symbol, df in history.items() if start <= df.index[-1] <= end}
+
 
 
 class LocalDataFetcher:
@@ -97,6 +185,45 @@ class LocalDataFetcher:
 class HistoryProcessor:
     """Processes and transforms financial data."""
 
+    RAW_BAR_FIELDS = (('o', 'open'), ('h', 'high'), ('l', 'low'), ('c', 'close'), ('v', 'volume'),
+                      ('n', 'trade_count'), ('vw', 'vwap'))
+
+    @staticmethod
+    def decode_raw_bars(raw):
+        """Decode a raw `{symbol: [{'t', 'o', 'h', ...}]}` bar payload into per-symbol frames."""
+        history = {}
+        for symbol, bars in raw.items():
+            if not bars:
+                continue
+            count = len(bars)
+            timestamps = np.array([bar['t'].rstrip('Z') for bar in bars], dtype='datetime64[ns]')
+            columns = {name: np.fromiter((bar.get(key, np.nan) for bar in bars), dtype=np.float64, count=count)
+                       for key, name in HistoryProcessor.RAW_BAR_FIELDS}
+            columns['trading_value'] = columns['volume'] * columns['vwap']
+            history[symbol] = pd.DataFrame(columns, index=pd.DatetimeIndex(timestamps, name='timestamp').tz_localize('UTC'))
+        return history
+
+    @staticmethod
+    def split_by_symbol(df_history):
+        """Split a (symbol, timestamp) MultiIndex frame into per-symbol frames; decoded raw bars pass through."""
+        if isinstance(df_history, dict):
+            return df_history
+        if df_history.empty:
+            return {}
+        grouped = df_history.groupby(level='symbol')
+        return {symbol: group.reset_index(level='symbol', drop=True) for symbol, group in grouped}
+
+    @staticmethod
+    def merge_into(history, new_history):
+        """Merge per-symbol frames into `history`, keeping bars in time order without duplicates."""
+        for symbol, df in new_history.items():
+            if symbol in history:
+                merged = pd.concat([history[symbol], df])
+                history[symbol] = merged[~merged.index.duplicated(keep='last')].sort_index()
+            else:
+                history[symbol] = df
+        return history
+
     @staticmethod
     def merge_to_a_single_bar(df, bar_window):
         """Merge multiple rows into single bars based on the window size."""
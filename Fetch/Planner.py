@@ -0,0 +1,45 @@
+import math
+import numpy as np
+import pandas as pd
+from Fetch.AsyncFetch import BarRequest
+
+
+class BarRequestPlanner:
+    """Plans bar downloads as symbol batches × time slices.
+
+    The number of bars a request returns is estimated from the time frame and the number of
+    weekdays in the range (SIP bars cover 04:00-20:00 ET). Requests are sized so that each
+    one fits in a single page of `page_limit` bars, so the SDK never has to follow page
+    tokens sequentially and the whole plan runs as one round of parallel requests.
+    """
+
+    BARS_PER_DAY = {'Min': 16 * 60, 'Hour': 16, 'Day': 1, 'Week': 1, 'Month': 1}
+
+    def __init__(self, page_limit=10000, max_symbols=200):
+        self.page_limit = page_limit
+        self.max_symbols = max_symbols  # 심볼 목록이 URL에 들어가므로 요청당 심볼 수 제한
+
+    @staticmethod
+    def _time_frame(time_frame):
+        unit = getattr(time_frame, 'unit', 'Min')
+        return getattr(unit, 'value', unit), int(getattr(time_frame, 'amount', 1))
+
+    def estimate_bars(self, time_frame, start, end):
+        """Upper bound of bars one symbol returns for `[start, end]`."""
+        unit, amount = self._time_frame(time_frame)
+        weekdays = int(np.busday_count(pd.Timestamp(start).date(), pd.Timestamp(end).date() + pd.Timedelta(days=1)))
+        return max(1, math.ceil(weekdays * self.BARS_PER_DAY.get(unit, 1) / amount))
+
+    def plan(self, symbols, start, end, time_frame):
+        symbols = list(symbols)
+        if not symbols:
+            return []
+        per_symbol = self.estimate_bars(time_frame, start, end)
+        num_slices = max(1, math.ceil(per_symbol / self.page_limit))
+        per_slice = math.ceil(per_symbol / num_slices)
+        batch_size = max(1, min(self.max_symbols, self.page_limit // per_slice))
+
+        edges = pd.date_range(start, end, periods=num_slices + 1) if num_slices > 1 else [start, end]
+        return [BarRequest(symbols[i:i + batch_size], edges[j], edges[j + 1], time_frame)
+                for i in range(0, len(symbols), batch_size)
+                for j in range(num_slices)]
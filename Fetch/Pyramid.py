@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from Common.Clock import SessionTime, MINUTE_NS, DAY_NS
+
+
+class BarPyramid:
+    """Bars of several resolutions per symbol, rolled up incrementally from the minute feed.
+
+    Each level (e.g. '1m', '5m', '15m', '1h', '1d') keeps the last `capacity` bars of every
+    symbol in one preallocated ring, `values[level]` of shape (symbols, capacity, fields).
+    `push` takes one bar per symbol and updates every level whose resolution is a multiple
+    of the source resolution in one vectorized step: a bar in the same bucket as the last one
+    is merged into it, a bar in a later bucket opens a new slot. Intraday buckets are
+    aligned to the epoch (hours match the API hour bars), '1d' to the local session day.
+    Bars are stamped with the start of their bucket.
+    """
+
+    FIELDS = ['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap', 'trading_value']
+    OPEN, HIGH, LOW, CLOSE, VOLUME, TRADE_COUNT, VWAP, TRADING_VALUE = range(len(FIELDS))
+    DAY = 24 * 60
+    LEVELS = {'1m': 1, '5m': 5, '15m': 15, '1h': 60, '1d': DAY}
+    CAPACITY = {'1m': 240, '5m': 192, '15m': 128, '1h': 480, '1d': 60}
+
+    def __init__(self, symbols, levels=None, capacity=None, timezone='America/New_York'):
+        self.symbols = list(symbols)
+        self.slots = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.levels = dict(levels or self.LEVELS)
+        capacity = {**self.CAPACITY, **(capacity or {})}
+        self.capacity = {level: capacity.get(level, self.CAPACITY['1h']) for level in self.levels}
+        self.session = SessionTime(timezone)
+        num = len(self.symbols)
+        self.values = {level: np.zeros((num, size, len(self.FIELDS))) for level, size in self.capacity.items()}
+        self.times = {level: np.zeros((num, size), dtype=np.int64) for level, size in self.capacity.items()}
+        self.keys = {level: np.full(num, np.iinfo(np.int64).min, dtype=np.int64) for level in self.levels}
+        self.head = {level: np.full(num, -1, dtype=np.int64) for level in self.levels}
+        self.count = {level: np.zeros(num, dtype=np.int64) for level in self.levels}
+        self.pushed = np.full(num, np.iinfo(np.int64).min, dtype=np.int64)
+
+    def __contains__(self, symbol):
+        return symbol in self.slots
+
+    def _targets(self, source):
+        """Levels fed by bars of `source` minutes."""
+        return [level for level, minutes in self.levels.items() if minutes >= source and minutes % source == 0]
+
+    def _buckets(self, level, times):
+        """(bucket key, bucket start ns) of epoch-ns `times` at `level`."""
+        minutes = self.levels[level]
+        if minutes == self.DAY:
+            offsets = np.array([self.session.offset(int(ns)) for ns in times], dtype=np.int64)
+            keys = (times + offsets) // DAY_NS
+            return keys, keys * DAY_NS - offsets
+        width = minutes * MINUTE_NS
+        keys = times // width
+        return keys, keys * width
+
+    def seed(self, bars, source=60):
+        """Fill the levels fed by `source`-minute bars from per-symbol history frames."""
+        for symbol, frame in bars.items():
+            if symbol not in self.slots or frame.empty:
+                continue
+            slot = self.slots[symbol]
+            times = frame.index.asi8
+            values = frame.reindex(columns=self.FIELDS).to_numpy(dtype=np.float64)
+            for level in self._targets(source):
+                keys, starts = self._buckets(level, times)
+                first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+                merged = self._reduce(values, first)
+                size = min(len(first), self.capacity[level])
+                self.values[level][slot, :size] = merged[-size:]
+                self.times[level][slot, :size] = starts[first][-size:]
+                self.keys[level][slot] = keys[-1]
+                self.head[level][slot] = size - 1
+                self.count[level][slot] = size
+            self.pushed[slot] = times[-1]
+
+    @classmethod
+    def _reduce(cls, values, first):
+        """Merge consecutive rows of `values` into bars starting at the row indices `first`."""
+        last = np.r_[first[1:], len(values)] - 1
+        merged = np.empty((len(first), len(cls.FIELDS)))
+        merged[:, cls.OPEN] = values[first, cls.OPEN]
+        merged[:, cls.HIGH] = np.maximum.reduceat(values[:, cls.HIGH], first)
+        merged[:, cls.LOW] = np.minimum.reduceat(values[:, cls.LOW], first)
+        merged[:, cls.CLOSE] = values[last, cls.CLOSE]
+        for field in (cls.VOLUME, cls.TRADE_COUNT, cls.TRADING_VALUE):
+            merged[:, field] = np.add.reduceat(values[:, field], first)
+        cls._set_vwap(merged)
+        return merged
+
+    @classmethod
+    def _set_vwap(cls, bars):
+        volume = bars[..., cls.VOLUME]
+        bars[..., cls.VWAP] = np.divide(bars[..., cls.TRADING_VALUE], volume, out=np.zeros_like(volume), where=volume > 0)
+
+    def push(self, symbols, times, values, source=1):
+        """Roll one `source`-minute bar per symbol into the levels.
+
+        Bars not newer than the last pushed bar of their symbol are ignored, so a minute that
+        is served twice is not counted twice. Returns the pushed symbols and, per level, a
+        mask of which of them opened a new bar.
+        """
+        slots = np.array([self.slots[symbol] for symbol in symbols], dtype=np.int64)
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(slots), len(self.FIELDS))
+        fresh = times > self.pushed[slots]
+        slots, times, values = slots[fresh], times[fresh], values[fresh]
+        self.pushed[slots] = times
+        opened = {}
+        for level in self._targets(source):
+            keys, starts = self._buckets(level, times)
+            new = keys != self.keys[level][slots]
+            self._open(level, slots[new], starts[new], values[new])
+            self._merge(level, slots[~new], values[~new])
+            self.keys[level][slots] = keys
+            opened[level] = new
+        return [symbol for symbol, is_fresh in zip(symbols, fresh) if is_fresh], opened
+
+    def _open(self, level, slots, starts, values):
+        head = (self.head[level][slots] + 1) % self.capacity[level]
+        self.head[level][slots] = head
+        self.count[level][slots] = np.minimum(self.count[level][slots] + 1, self.capacity[level])
+        self.values[level][slots, head] = values
+        self.times[level][slots, head] = starts
+
+    def _merge(self, level, slots, values):
+        if not len(slots):
+            return
+        head = self.head[level][slots]
+        bars = self.values[level][slots, head]
+        bars[:, self.HIGH] = np.maximum(bars[:, self.HIGH], values[:, self.HIGH])
+        bars[:, self.LOW] = np.minimum(bars[:, self.LOW], values[:, self.LOW])
+        bars[:, self.CLOSE] = values[:, self.CLOSE]
+        for field in (self.VOLUME, self.TRADE_COUNT, self.TRADING_VALUE):
+            bars[:, field] += values[:, field]
+        self._set_vwap(bars)
+        self.values[level][slots, head] = bars
+
+    def _order(self, level, slot):
+        """Ring indices of the bars of `slot` in time order."""
+        count, head, size = self.count[level][slot], self.head[level][slot], self.capacity[level]
+        return (np.arange(head - count + 1, head + 1)) % size
+
+    def last(self, symbol, level):
+        """(bucket start ns, field values) of the latest bar of `symbol` at `level`."""
+        slot = self.slots[symbol]
+        head = self.head[level][slot]
+        return self.times[level][slot, head], self.values[level][slot, head]
+
+    def frame(self, symbol, level):
+        """Bars of `symbol` at `level` as a frame indexed by UTC bar start."""
+        slot = self.slots[symbol]
+        order = self._order(level, slot)
+        index = pd.DatetimeIndex(self.times[level][slot, order].astype('datetime64[ns]'), name='timestamp').tz_localize('UTC')
+        return pd.DataFrame(self.values[level][slot, order], index=index, columns=self.FIELDS)
+
+    def memory_bytes(self):
+        return sum(array.nbytes for arrays in (self.values, self.times) for array in arrays.values())
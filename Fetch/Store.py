@@ -0,0 +1,142 @@
+import os
+import threading
+import pandas as pd
+
+
+class BarStore:
+    """Local per-symbol bar store that remembers which time ranges it has already fetched.
+
+    Each symbol is one pickle holding its bars and a list of covered `[start, end)` ranges.
+    Ranges that were requested but returned no bars (holidays, halts) stay covered, so they
+    are not requested again; ranges whose request failed never become covered.
+    """
+
+    def __init__(self, directory=f'{os.environ.get("D4")}/Data/Local/Store/1Hour'):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, symbol):
+        return os.path.join(self.directory, f"{symbol.replace('/', '_')}.pkl")
+
+    def load(self, symbol):
+        """Return (bars, coverage); (None, []) when nothing is stored."""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None, []
+        try:
+            stored = pd.read_pickle(path)
+            return stored['bars'], stored['coverage']
+        except Exception as e:
+            print(f"Ignoring unreadable store for {symbol}: {e}")
+            return None, []
+
+    def save(self, symbol, bars, coverage):
+        path = self._path(symbol)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        pd.to_pickle(dict(bars=bars, coverage=coverage), tmp_path)
+        os.replace(tmp_path, path)
+
+    def drop(self, symbol):
+        path = self._path(symbol)
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def add_coverage(coverage, start, end):
+        """Merge `[start, end)` into a sorted list of disjoint ranges."""
+        if end <= start:
+            return list(coverage)
+        merged = []
+        for s, e in sorted(list(coverage) + [(start, end)]):
+            if merged and s <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+            else:
+                merged.append((s, e))
+        return merged
+
+    @staticmethod
+    def missing(coverage, start, end, seam=None):
+        """Sub-ranges of `[start, end]` not covered yet, in time order.
+
+        With `seam`, a range right after stored bars starts that much earlier, so the last
+        stored bar is fetched again and can be checked with `is_stale`.
+        """
+        gaps = []
+        cursor = start
+        for s, e in sorted(coverage):
+            if e <= cursor:
+                continue
+            if s >= end:
+                break
+            if s > cursor:
+                gaps.append((cursor, s))
+            cursor = max(cursor, e)
+        if cursor < end:
+            gaps.append((cursor, end))
+        if seam is not None:
+            gaps = [(gap_start - seam if gap_start > start else gap_start, gap_end) for gap_start, gap_end in gaps]
+        return gaps
+
+    @staticmethod
+    def is_stale(bars, coverage, fetched, tolerance=1e-3):
+        """Whether refetched bars disagree with stored complete bars (e.g. a new split adjustment)."""
+        if bars is None or fetched is None or not coverage:
+            return False
+        overlap = bars.index.intersection(fetched.index)
+        overlap = overlap[overlap < coverage[-1][1]]
+        if not len(overlap):
+            return False
+        old, new = bars.loc[overlap, 'close'], fetched.loc[overlap, 'close']
+        return bool(((old - new).abs() > tolerance * new.abs()).any())
+
+
+class DailyBarStore:
+    """Single-file store of daily bars for the whole equity universe.
+
+    Universe selection reads thousands of symbols at once, so all of them live in one pickle
+    of per-symbol frames plus per-symbol coverage, in the same layout as `BarStore`.
+    """
+
+    def __init__(self, path=f'{os.environ.get("D4")}/Data/Local/Store/1Day/bars.pkl'):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def load(self):
+        """Return ({symbol: bars}, {symbol: coverage}); empty dicts when nothing is stored."""
+        if not os.path.exists(self.path):
+            return {}, {}
+        try:
+            stored = pd.read_pickle(self.path)
+            return stored['bars'], stored['coverage']
+        except Exception as e:
+            print(f"Ignoring unreadable daily bar store: {e}")
+            return {}, {}
+
+    def save(self, bars, coverage):
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        pd.to_pickle(dict(bars=bars, coverage=coverage), tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+class AssetListCache:
+    """Asset list kept on disk and reloaded from the API once it is older than `ttl`."""
+
+    def __init__(self, path=f'{os.environ.get("D4")}/Data/Local/Assets/us_equity.pkl', ttl=pd.Timedelta(hours=12)):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def get(self, loader):
+        if os.path.exists(self.path):
+            age = pd.Timestamp.now() - pd.Timestamp.fromtimestamp(os.path.getmtime(self.path))
+            if age < self.ttl:
+                try:
+                    return pd.read_pickle(self.path)
+                except Exception as e:
+                    print(f"Ignoring unreadable asset list cache: {e}")
+        assets = loader()
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        assets.to_pickle(tmp_path)
+        os.replace(tmp_path, self.path)
+        return assets
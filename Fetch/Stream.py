@@ -0,0 +1,77 @@
+import threading
+import pandas as pd
+from ApiAccess.ApiAccess import ClientType, ClientManager
+
+
+class BarStreamer:
+    """Keeps the latest minute bar per symbol from a `StockDataStream` bar subscription.
+
+    The stream runs in a background thread. `recent` returns the buffered bars in the same
+    per-symbol frame layout as `Fetcher.get_stock_history`, so they merge into the hourly
+    history unchanged.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.latest = {}
+        self.symbols = []
+        self.lock = threading.Condition()
+        self.thread = None
+
+    def start(self, symbols):
+        if self.stream is None:
+            self.stream = ClientManager().get_client(ClientType.STOCK_STREAM)
+        self.symbols = list(symbols)
+        self.stream.subscribe_bars(self._on_bar, *self.symbols)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.stream.run()
+        except Exception as e:
+            print(f"Bar stream stopped: {e}")
+
+    def stop(self):
+        if self.stream is not None and self.thread is not None:
+            self.stream.stop()
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    async def _on_bar(self, bar):
+        timestamp = pd.Timestamp(bar.timestamp)
+        timestamp = timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp.tz_convert('UTC')
+        row = dict(open=float(bar.open), high=float(bar.high), low=float(bar.low), close=float(bar.close),
+                   volume=float(bar.volume), trade_count=float(bar.trade_count or 0), vwap=float(bar.vwap or 0))
+        row['trading_value'] = row['volume'] * row['vwap']
+        with self.lock:
+            self.latest[bar.symbol] = (timestamp, row)
+            self.lock.notify_all()
+
+    def arrived(self, symbols, minute):
+        """Symbols whose bar of the minute ending at `minute` has arrived."""
+        bar_time = minute.floor('min') - pd.Timedelta(minutes=1)
+        with self.lock:
+            return [symbol for symbol in symbols
+                    if symbol in self.latest and self.latest[symbol][0] >= bar_time]
+
+    def is_minute_complete(self, symbols, minute, fraction=1.0):
+        symbols = list(symbols)
+        return len(self.arrived(symbols, minute)) >= fraction * len(symbols)
+
+    def wait_for_minute(self, symbols, minute, timeout, fraction=1.0):
+        with self.lock:
+            return self.lock.wait_for(lambda: self.is_minute_complete(symbols, minute, fraction), timeout)
+
+    def recent(self, symbols, current):
+        """Buffered bars inside the live fetch window `[current - 1min, current]`, one row frame per symbol."""
+        window_start = current - pd.Timedelta(minutes=1, seconds=10)
+        recent = {}
+        with self.lock:
+            for symbol in symbols:
+                if symbol not in self.latest:
+                    continue
+                timestamp, row = self.latest[symbol]
+                if window_start <= timestamp <= current:
+                    recent[symbol] = pd.DataFrame([row], index=pd.DatetimeIndex([timestamp], name='timestamp'))
+        return recent
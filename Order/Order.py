@@ -1,5 +1,4 @@
 import math
-import time
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 from Status.Status import AccountLocal, AccountLive
@@ -90,7 +89,7 @@ class BuyerLive(BuyerBase):
                                  stop_trailing=buy_symbol_df['stop_trailing'].iloc[-1])
         try:
             order=self.account.trading_client.submit_order(order_data=market_order_data)
-            order_list.orders[buy_symbol]=order.client_order_id
+            order_list.add(buy_symbol, order.client_order_id)
         except Exception as e:
             self.logger(f"Buy error occurred for {buy_symbol}: {e}")
 
@@ -106,7 +105,7 @@ class BuyerLive(BuyerBase):
                         f"{r2(price)}, "
                         f"{-r2(cost)}, {r2(0.0)}")
         self.account.positions.add_new_asset(market_order_info)
-        time.sleep(1)
+        self.time_manager.clock.sleep(1)
         self.account.update()
 
     def _get_qty(self, price):
@@ -125,6 +124,10 @@ class SellerBase(metaclass=SingletonMeta):
     def sell(self, prophecy, sell_symbol):
         pass
 
+    def settle(self, sell_symbols, lock):
+        """Finish sells made with `settle=False`; the simulated account has nothing to wait for."""
+        pass
+
 
 class SellerLocal(SellerBase):
 
@@ -132,7 +135,7 @@ class SellerLocal(SellerBase):
         super().__init__(logger, time_manager)
         self.account = AccountLocal()
 
-    def sell(self, prophecy, sell_symbol, order_list):
+    def sell(self, prophecy, sell_symbol, order_list, settle=True):
         if not len(prophecy) or sell_symbol not in self.account.positions.assets.keys():
             return False
         price = self.account.positions.assets[sell_symbol]['price']
@@ -156,7 +159,12 @@ class SellerLive(SellerBase):
         super().__init__(logger, time_manager)
         self.account = AccountLive()
 
-    def sell(self, prophecy, sell_symbol, order_list):
+    def sell(self, prophecy, sell_symbol, order_list, settle=True):
+        """Submit a market sell of the whole position.
+
+        With `settle=False` the wait for the fill and the position update are left to
+        `settle`, so the caller can wait without holding the order manager's lock.
+        """
         try:
             if not len(prophecy) or sell_symbol not in self.account.positions.assets.keys():
                 return False
@@ -182,7 +190,7 @@ class SellerLive(SellerBase):
             )
 
             order = self.account.trading_client.submit_order(order_data=market_order_data)
-            order_list.orders[sell_symbol] = order.client_order_id
+            order_list.add(sell_symbol, order.client_order_id)
         except Exception as e:
             self.logger(f"Sell error 3 occurred for {sell_symbol}: {e}")
             x = 1
@@ -193,11 +201,23 @@ class SellerLive(SellerBase):
             self.logger(f"{self.time_manager.current}, SELL, {sell_symbol}, {r2(qty)}, {r2(price)}, "
                         f"{r2(avg_price)}, "
                         f"{r2(market_value)}, {r2(market_value - cost)}")
-            time.sleep(1)
-            self.account.positions.remove_asset(sell_symbol)
-            self.account.update()
+            if settle:
+                self.time_manager.clock.sleep(1)
+                self.account.positions.remove_asset(sell_symbol)
+                self.account.update()
             return True
 
         except Exception as e:
             self.logger(f"Sell error 4 occurred for {sell_symbol}: {e}")
-            x=1
\ No newline at end of file
+            x=1
+
+    def settle(self, sell_symbols, lock):
+        """Wait for the fills outside `lock`, then drop the sold positions under it."""
+        self.time_manager.clock.sleep(1)
+        with lock:
+            try:
+                for sell_symbol in sell_symbols:
+                    self.account.positions.remove_asset(sell_symbol)
+                self.account.update()
+            except Exception as e:
+                self.logger(f"Sell settle error occurred for {sell_symbols}: {e}")
\ No newline at end of file
@@ -0,0 +1,133 @@
+import queue
+import threading
+import pandas as pd
+from ApiAccess.ApiAccess import ClientType, ClientManager
+
+
+class StopMonitor:
+    """Sells a held symbol as soon as one of its trades prints below its stop threshold.
+
+    Subscribes to trades of held symbols only and keeps `max(stop_value, stop_trailing)` per
+    symbol, updated through the positions' stop listeners whenever `Maengja` moves a stop.
+    The stream handler only compares a price with a dict entry; sells run on a worker thread
+    through the order manager's `SellerLive`, under the order manager's lock, so they never
+    interleave with the minute cycle's own orders.
+
+    A symbol is marked as fired when its sell is queued and stays marked while the sell or
+    an order of the symbol is pending, so later trades below the stop do not queue it again.
+    The mark is cleared when the position goes away, when its order closes without the
+    position going away, or when the sell could not be submitted at all.
+
+    `stream` may be a data stream that already runs elsewhere (e.g. the bar stream); a
+    monitor that creates its own stream also runs it.
+    """
+
+    def __init__(self, order_manager, stream=None):
+        self.order_manager = order_manager
+        self.positions = order_manager.account.positions
+        self.stream = stream
+        self.owns_stream = stream is None
+        self.thresholds = {}
+        self.subscribed = set()
+        self.fired = set()
+        self.queued = set()  # 큐에 들어가 아직 처리되지 않은 매도
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.stream_thread = None
+        self.worker = None
+        self.stops = []
+
+    def start(self):
+        if self.stream is None:
+            self.stream = ClientManager().get_client(ClientType.STOCK_STREAM)
+        self.positions.stop_listeners.append(self.on_stop_changed)
+        self.sync()
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+        if self.owns_stream:
+            self.stream_thread = threading.Thread(target=self._run_stream, daemon=True)
+            self.stream_thread.start()
+
+    def _run_stream(self):
+        try:
+            self.stream.run()
+        except Exception as e:
+            print(f"Trade stream stopped: {e}")
+
+    def stop(self):
+        if self.on_stop_changed in self.positions.stop_listeners:
+            self.positions.stop_listeners.remove(self.on_stop_changed)
+        if self.owns_stream and self.stream_thread is not None:
+            self.stream.stop()
+            self.stream_thread.join(timeout=5)
+        self.queue.put(None)
+        if self.worker is not None:
+            self.worker.join(timeout=5)
+
+    def sync(self):
+        """Follow the held symbols: (un)subscribe trades and refresh every threshold."""
+        held = dict(self.positions.assets)
+        with self.lock:
+            new = [symbol for symbol in held if symbol not in self.subscribed]
+            gone = [symbol for symbol in self.subscribed if symbol not in held]
+            for symbol in gone:
+                self.thresholds.pop(symbol, None)
+                self.fired.discard(symbol)
+            # 주문이 닫혔는데 아직 보유 중이면 (취소/거부 등) 다시 발동할 수 있게 함
+            orders = self.order_manager.order_list.orders
+            for symbol in [symbol for symbol in self.fired if symbol not in self.queued and symbol not in orders]:
+                self.fired.discard(symbol)
+            self.subscribed = set(held)
+        if new:
+            self.stream.subscribe_trades(self._on_trade, *new)
+        if gone:
+            self.stream.unsubscribe_trades(*gone)
+        for symbol, asset in held.items():
+            self.on_stop_changed(symbol, asset)
+
+    def on_stop_changed(self, symbol, asset):
+        threshold = max(float(asset.get('stop_value', 0.0) or 0.0), float(asset.get('stop_trailing', 0.0) or 0.0))
+        with self.lock:
+            self.thresholds[symbol] = threshold
+
+    async def _on_trade(self, trade):
+        with self.lock:
+            threshold = self.thresholds.get(trade.symbol)
+            if threshold is None or trade.symbol in self.fired or not trade.price < threshold:
+                return
+            self.fired.add(trade.symbol)
+            self.queued.add(trade.symbol)
+        self.queue.put((trade.symbol, float(trade.price), pd.Timestamp(trade.timestamp), threshold))
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            symbol, price, timestamp, threshold = item
+            prophecy = pd.DataFrame(dict(time=[timestamp.value], symbol=[symbol], price=[price], sell=[True],
+                                         sell_reason=['|TickStop|']))
+            order_manager = self.order_manager
+            sold = False
+            pending = False
+            try:
+                with order_manager.lock:
+                    pending = symbol in order_manager.order_list.orders
+                    if pending:
+                        continue
+                    sold = order_manager.seller.sell(prophecy, symbol, order_manager.order_list, settle=False)
+                if sold:
+                    # 체결 대기는 lock 밖에서 (분 사이클 주문을 막지 않음)
+                    order_manager.seller.settle([symbol], order_manager.lock)
+                latency = (pd.Timestamp.now(tz='UTC') - timestamp).total_seconds() if timestamp.tz else None
+                self.stops.append(dict(symbol=symbol, price=price, threshold=threshold, time=timestamp,
+                                       sold=bool(sold), latency=latency))
+                print(f"Tick stop {symbol}: trade {price} < {threshold}, sold={bool(sold)}")
+            except Exception as e:
+                print(f"Tick stop sell error for {symbol}: {e}")
+            finally:
+                with self.lock:
+                    self.queued.discard(symbol)
+                    if not sold and not pending and symbol not in order_manager.order_list.orders:
+                        # 주문을 내지 못했으면 다음 체결가에서 다시 발동할 수 있게 함
+                        self.fired.discard(symbol)
@@ -0,0 +1,149 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+
+class LiveJournal:
+    """Write-ahead journal of the live state that only exists in memory, in one SQLite file (WAL).
+
+    Stops set at buy time (`PositionLive.assets_info`) and open orders (`OrderList.orders`)
+    are written as they change, so a crash right after an order keeps them; on restore,
+    orders the broker no longer knows or has closed are dropped. Once per minute
+    `checkpoint` stores the written prophecy notes, the latest indicator levels and the
+    trigger gate bands in one transaction; indicator series are only rewritten when a
+    symbol's series grew by a new hour bar. A restarted trader restores positions and
+    orders unconditionally and the strategy state only if it is at most `max_age` old.
+    """
+
+    SCHEMA = ["CREATE TABLE IF NOT EXISTS assets_info (symbol TEXT PRIMARY KEY, stop_value REAL, stop_key TEXT, stop_trailing REAL)",
+              "CREATE TABLE IF NOT EXISTS orders (symbol TEXT PRIMARY KEY, client_order_id TEXT)",
+              "CREATE TABLE IF NOT EXISTS notes (symbol TEXT PRIMARY KEY, time INTEGER, note TEXT)",
+              "CREATE TABLE IF NOT EXISTS indicators (symbol TEXT PRIMARY KEY, latest TEXT, series BLOB, band TEXT)",
+              "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"]
+
+    def __init__(self, path=f'{os.environ.get("D4")}/Data/Journal/live_state.sqlite', max_age=pd.Timedelta(minutes=30)):
+        self.path = path
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # WAL에서는 커밋 순서가 보장되고 fsync는 체크포인트 때만
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.lock = threading.Lock()  # StopMonitor 스레드와 분 사이클이 같은 연결을 사용
+        self.series_lengths = {}
+        self.checkpoints = 0
+
+    def _execute(self, sql, parameters=()):
+        with self.lock:
+            self.connection.execute(sql, parameters)
+
+    def put_asset(self, symbol, info):
+        self._execute("INSERT OR REPLACE INTO assets_info VALUES (?, ?, ?, ?)",
+                      (symbol, float(info['stop_value']), str(info['stop_key']), float(info['stop_trailing'])))
+
+    def drop_asset(self, symbol):
+        self._execute("DELETE FROM assets_info WHERE symbol = ?", (symbol,))
+
+    def put_order(self, symbol, client_order_id):
+        self._execute("INSERT OR REPLACE INTO orders VALUES (?, ?)", (symbol, str(client_order_id)))
+
+    def drop_order(self, symbol):
+        self._execute("DELETE FROM orders WHERE symbol = ?", (symbol,))
+
+    @staticmethod
+    def _plain(value):
+        return value.item() if isinstance(value, np.generic) else value
+
+    def checkpoint(self, current_ns, buffer, indicators, gate=None):
+        """Store the notes written this minute and the indicator state of their symbols."""
+        symbols = [buffer.symbols[slot] for slot in np.flatnonzero(buffer.written)]
+        note_rows, indicator_rows = [], []
+        for symbol in symbols:
+            note = {name: self._plain(value) for name, value in buffer.note(symbol).to_dict().items()}
+            note_rows.append((symbol, int(note['time']), json.dumps(note)))
+            series = indicators.series.get(symbol, {})
+            lengths = tuple(len(values) for values in series.values())
+            # 시간봉 안에서는 마지막 값만 바뀌고 평가 때 다시 계산되므로 새 시간봉이 생길 때만 기록
+            blob = pickle.dumps(series) if self.series_lengths.get(symbol) != lengths else None
+            self.series_lengths[symbol] = lengths
+            band = gate.bands.get(symbol) if gate is not None else None
+            band = json.dumps([band[0].isoformat(), float(band[1]), float(band[2])]) if band is not None else None
+            indicator_rows.append((symbol, json.dumps(indicators.latest.get(symbol, {})), blob, band))
+        with self.lock:
+            with self.connection:
+                self.connection.execute("BEGIN")
+                self.connection.executemany("INSERT OR REPLACE INTO notes VALUES (?, ?, ?)", note_rows)
+                self.connection.executemany(
+                    "INSERT INTO indicators VALUES (?, ?, ?, ?) ON CONFLICT(symbol) DO UPDATE SET "
+                    "latest = excluded.latest, band = excluded.band, series = COALESCE(excluded.series, series)",
+                    indicator_rows)
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('saved_ns', ?)", (str(int(current_ns)),))
+        self.checkpoints += 1
+
+    def saved_ns(self):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'saved_ns'").fetchone()
+        return int(row[0]) if row is not None else None
+
+    def restore_live(self, positions, order_list):
+        """Put the journaled stops and still open orders back; returns (assets, orders) restored."""
+        with self.lock:
+            assets = self.connection.execute("SELECT * FROM assets_info").fetchall()
+            orders = self.connection.execute("SELECT * FROM orders").fetchall()
+        for symbol, stop_value, stop_key, stop_trailing in assets:
+            positions.assets_info[symbol] = dict(stop_value=stop_value, stop_key=stop_key, stop_trailing=stop_trailing)
+        restored = 0
+        for symbol, client_order_id in orders:
+            # 이전 세션의 취소/만료/거부된 주문이 남으면 해당 종목의 매매가 계속 막힘
+            try:
+                order = order_list.trading_client.get_order_by_client_id(client_order_id)
+                is_open = order.symbol == symbol and not order_list.is_closed(order)
+            except Exception as e:
+                print(f"Journal: dropping order {client_order_id} of {symbol}: {e}")
+                is_open = False
+            if is_open:
+                order_list.orders[symbol] = client_order_id
+                restored += 1
+            else:
+                self.drop_order(symbol)
+        return len(assets), restored
+
+    def restore_strategies(self, current_ns, buffer, indicators, gate=None):
+        """Put the journaled notes, indicator levels/series and gate bands back if they are fresh enough.
+
+        Returns the number of symbols restored (0 when the journal is empty or stale).
+        """
+        saved_ns = self.saved_ns()
+        if saved_ns is None or current_ns - saved_ns > self.max_age.value:
+            return 0
+        with self.lock:
+            notes = self.connection.execute("SELECT symbol, note FROM notes").fetchall()
+            rows = self.connection.execute("SELECT * FROM indicators").fetchall()
+        for symbol, note in notes:
+            if symbol in buffer.slots:
+                slot = buffer.note(symbol)
+                for name, value in json.loads(note).items():
+                    if name in slot and name != 'symbol':
+                        slot[name] = value
+        restored = 0
+        for symbol, latest, series, band in rows:
+            if symbol not in buffer.slots:
+                continue
+            indicators.latest[symbol] = json.loads(latest)
+            if series is not None:
+                indicators.series[symbol] = pickle.loads(series)
+                self.series_lengths[symbol] = tuple(len(values) for values in indicators.series[symbol].values())
+            if gate is not None and band is not None:
+                hour, lower, upper = json.loads(band)
+                gate.bands[symbol] = (pd.Timestamp(hour), lower, upper)
+            restored += 1
+        return restored
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -77,6 +77,13 @@ class PositionBase(metaclass=SingletonMeta):
         self.assets = {}
         self.value = 0.0
         self.logger = Logger(logfile)
+        self.stop_listeners = []
+
+    def notify_stop(self, symbol):
+        """Tell listeners (e.g. StopMonitor) that the stop values of `symbol` changed."""
+        if symbol in self.assets:
+            for listener in self.stop_listeners:
+                listener(symbol, self.assets[symbol])
 
 class PositionLocal(PositionBase):
     """Simulated position class."""
@@ -130,10 +137,13 @@ class PositionLive(PositionBase):
         self.trading_client = ClientManager().get_client(ClientType.TRADE)
         self.assets_info = {}
         self.Trailing = (1.0-0.01)
+        self.journal = None  # LiveJournal (assets_info를 변경 즉시 기록)
 
     def add_new_asset(self, new_asset):
         symbol = new_asset['symbol']
         self.assets_info[symbol] = dict(stop_value=new_asset['stop_value'], stop_key=new_asset['stop_key'], stop_trailing=new_asset['stop_trailing'])
+        if self.journal is not None:
+            self.journal.put_asset(symbol, self.assets_info[symbol])
 
     def remove_asset(self, symbol):
         """Remove an asset from the positions."""
@@ -141,6 +151,8 @@ class PositionLive(PositionBase):
             symbols = self.assets_info.keys()
             if symbol in symbols:
                 del self.assets_info[symbol]
+                if self.journal is not None:
+                    self.journal.drop_asset(symbol)
         except Exception as e:
             self.logger(f"remove_asset error occurred for {symbol}: {e}")
             x=1
@@ -200,10 +212,31 @@ class PositionLive(PositionBase):
 
 class OrderList(metaclass=SingletonMeta):
     """Class for managing trading orders."""
+
+    # 더 이상 체결될 수 없는 주문 상태
+    CLOSED_STATUSES = {'filled', 'canceled', 'expired', 'rejected', 'replaced'}
+
     def __init__(self, live):
         self.trading_client = ClientManager().get_client(ClientType.TRADE)
         self.orders = {}
         self.live = live
+        self.journal = None  # LiveJournal (주문을 변경 즉시 기록)
+
+    def add(self, symbol, client_order_id):
+        self.orders[symbol] = client_order_id
+        if self.journal is not None:
+            self.journal.put_order(symbol, client_order_id)
+
+    def remove(self, symbol):
+        del self.orders[symbol]
+        if self.journal is not None:
+            self.journal.drop_order(symbol)
+
+    @classmethod
+    def is_closed(cls, order):
+        """Whether `order` is filled or otherwise final (canceled, expired, rejected, replaced)."""
+        status = getattr(order, 'status', None)
+        return order.filled_at is not None or str(getattr(status, 'value', status)).lower() in cls.CLOSED_STATUSES
 
     def update(self):
         if not self.live:
@@ -212,7 +245,7 @@ class OrderList(metaclass=SingletonMeta):
         for symbol, uid in self.orders.items():
             my_order = self.trading_client.get_order_by_client_id(uid)
             assert(my_order.symbol == symbol)
-            if my_order.filled_at!=None:
+            if self.is_closed(my_order):
                 del_arr.append(symbol)
         for el in del_arr:
-            del self.orders[el]
+            self.remove(el)
@@ -0,0 +1,88 @@
+import math
+import threading
+import pandas as pd
+
+
+class TriggerGate:
+    """Skips `Maengja.update` for symbols whose new minute bar cannot fire a buy trigger.
+
+    A buy needs one of the touch conditions of `detect_upward_breakout` (bb1/bb2 lower band
+    or an SMA, plus margin) to fire. After a full evaluation, the gate derives for each
+    symbol a price band `(price - r, price + r)` inside which none of them can fire. The
+    thresholds themselves move with the current hour's close, so `r` is computed from
+    their Lipschitz bounds in that close: `1/n + k/sqrt(n-1)` for a Bollinger band of length
+    `n` and width `k`, and `1/period` for an SMA. While the minute bars of the same hour
+    stay inside the band, the symbol's decision is `buy=False` and it is not evaluated.
+
+    Held symbols, symbols with an open order (`exempt`), symbols without a band and the
+    first minute of a new hour bar are always evaluated, since sell triggers and stop values
+    depend on more than the touch levels.
+    """
+
+    def __init__(self):
+        self.bands = {}
+        self.lock = threading.Lock()
+        self.evaluated = 0
+        self.skipped = 0
+
+    @staticmethod
+    def triggers(params):
+        """(threshold indicator, margin, Lipschitz bound) of every buy touch condition."""
+        triggers = []
+        for key, metric in (('BB_1', 'bb1_lower'), ('BB_2', 'bb2_lower')):
+            length, std = params[key]['length'], params[key]['std']
+            triggers.append((metric, params[key]['buy_margin'], 1 / length + std / math.sqrt(length - 1)))
+        for period in params['SMA']['periods']:
+            triggers.append((f'SMA_{period}', params['SMA']['margin'], 1 / period))
+        return triggers
+
+    @staticmethod
+    def radius(threshold, margin, lipschitz, price, low):
+        """Largest price move from `price` that cannot make the touch condition fire."""
+        if pd.isna(threshold):
+            return 0.0
+        level = threshold + price * margin
+        if level >= price:
+            # 가격이 기준선 아래: 종가가 기준선을 넘어서야 발동
+            return (level - price) / (lipschitz + 1 - margin)
+        if low > level:
+            # 시간봉 저가가 기준선 위: 저가가 기준선까지 내려와야 발동
+            return min((low - level) / (lipschitz + margin), (price - level) / (1 + lipschitz + margin))
+        return 0.0
+
+    def update(self, symbol, sage, data, recent):
+        """Store the band of `symbol` from the indicators of its last full evaluation."""
+        try:
+            price = recent['close'].iloc[-1]
+            low = data['low'].iloc[-1]
+            radius = min(self.radius(sage.indicator(metric), margin, lipschitz, price, low)
+                         for metric, margin, lipschitz in self.triggers(sage.params))
+        except (KeyError, IndexError):
+            radius = 0.0
+        with self.lock:
+            self.bands[symbol] = (data.index[-1], price - radius, price + radius) if radius > 0 else None
+
+    def should_evaluate(self, symbol, sage, data, recent, exempt=()):
+        if symbol in sage.positions.assets or symbol in exempt:
+            return True
+        band = self.bands.get(symbol)
+        if band is None:
+            return True
+        hour, lower, upper = band
+        if data.index[-1] != hour or abs(data.index[-1] - recent.index[-1]) > pd.Timedelta(hours=4):
+            return True
+        return not (lower < recent['low'].iloc[-1] and recent['high'].iloc[-1] < upper)
+
+    def select(self, symbols, sages, history, recent, exempt=()):
+        """Symbols that need a full evaluation this minute (`exempt` symbols always do)."""
+        selected = [symbol for symbol in symbols
+                    if self.should_evaluate(symbol, sages[symbol], history[symbol], recent[symbol], exempt)]
+        with self.lock:
+            self.evaluated += len(selected)
+            self.skipped += len(symbols) - len(selected)
+        return selected
+
+    def summary(self):
+        total = self.evaluated + self.skipped
+        return dict(evaluated=self.evaluated, skipped=self.skipped,
+                    skip_ratio=self.skipped / total if total else 0.0)
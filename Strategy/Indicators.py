@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class IndicatorStore:
+    """Indicator values of every symbol, kept apart from the shared history frames.
+
+    Band and SMA levels are only read for the last bar, so only their latest value is kept
+    per symbol. RSI and the price oscillator are searched for peaks and dips, so they are
+    kept as whole series. With `dtype=np.float32` a series is stored in float32 when the
+    round trip stays within the relative `tolerance`, and in float64 otherwise.
+    """
+
+    def __init__(self, dtype=np.float64, tolerance=1e-5):
+        self.dtype = np.dtype(dtype)
+        self.tolerance = tolerance
+        self.latest = {}
+        self.series = {}
+        self.fallbacks = 0
+
+    def set(self, symbol, name, value):
+        self.latest.setdefault(symbol, {})[name] = float(value)
+
+    def get(self, symbol, name):
+        return self.latest.get(symbol, {}).get(name, np.nan)
+
+    def set_series(self, symbol, name, values):
+        values = np.asarray(values, dtype=np.float64)
+        if self.dtype != np.float64:
+            compact = values.astype(self.dtype)
+            if self.precision_ok(values, compact, self.tolerance):
+                values = compact
+            else:
+                self.fallbacks += 1
+        self.series.setdefault(symbol, {})[name] = values
+
+    def get_series(self, symbol, name):
+        return self.series.get(symbol, {}).get(name)
+
+    def drop(self, symbol):
+        self.latest.pop(symbol, None)
+        self.series.pop(symbol, None)
+
+    @staticmethod
+    def precision_ok(values, compact, tolerance):
+        """Whether `compact` stays within the relative `tolerance` of `values` (NaNs ignored)."""
+        finite = np.isfinite(values)
+        if not finite.any():
+            return True
+        reference = values[finite]
+        error = np.abs(compact[finite].astype(np.float64) - reference)
+        return bool((error <= tolerance * np.maximum(np.abs(reference), 1e-12)).all())
+
+    def memory_bytes(self):
+        series_bytes = sum(array.nbytes for arrays in self.series.values() for array in arrays.values())
+        latest_bytes = sum(len(values) for values in self.latest.values()) * np.dtype(np.float64).itemsize
+        return series_bytes + latest_bytes
@@ -0,0 +1,40 @@
+import math
+
+
+class LookbackPlanner:
+    """Derives the history window of `DataManager` from the lookback a strategy declares.
+
+    A strategy class exposes `lookback(params)` returning
+    `dict(required=bars, warmup=bars)`: `required` is the number of bars below which its
+    indicators cannot be computed at all (the `min_num_bars` filter), `warmup` the number
+    of bars after which they no longer depend on where the history starts (e.g. the
+    recursive average of RSI). History is kept at `max(required, warmup)` bars, and the
+    fetch window is that many bars converted to calendar hours with `bars_per_day`. Hour
+    bars of thinly traded symbols do not cover every extended-hours slot, so
+    `bars_per_day` is set well below the 16 slots of 04:00-20:00 ET. The default 9 keeps
+    the 480-bar window at 1944 h, under the former fixed 2000 h: symbols need about 8.5 hour
+    bars per trading day to stay in the history (8.3 before), and liquid symbols download
+    no more than they did. Lower it to keep thinner symbols at the cost of a longer download.
+    """
+
+    def __init__(self, bars_per_day=9, holidays_margin_days=5):
+        self.bars_per_day = bars_per_day
+        self.holidays_margin_days = holidays_margin_days
+
+    def num_bars(self, strategy, params=None):
+        lookback = strategy.lookback(params)
+        return lookback['required'], max(lookback['required'], lookback['warmup'])
+
+    def period_hours(self, num_bars):
+        """Calendar hours that hold `num_bars` hour bars, with weekends and holidays."""
+        trading_days = math.ceil(num_bars / self.bars_per_day)
+        calendar_days = math.ceil(trading_days * 7 / 5) + self.holidays_margin_days
+        return calendar_days * 24
+
+    def history_param(self, strategy, params=None, bar_window=1):
+        """`history_param` of `DataManager` for `strategy` (bar counts in `bar_window`-hour bars)."""
+        required, keep = self.num_bars(strategy, params)
+        return {'period': self.period_hours(keep * bar_window),
+                'bar_window': bar_window,
+                'min_num_bars': required,
+                'max_num_bars': keep}
@@ -1,39 +1,68 @@
+import copy
 import pandas as pd
-import pandas_ta as ta
-from scipy.signal import find_peaks
 import numpy as np
 from Status.Status import PositionLocal, PositionLive
 from itertools import product
 from Common.Common import SingletonMeta
+from Common.Lazy import LazyModule
+from Common.Clock import SessionTime, HOUR_NS
+from Strategy.Prophecy import ProphecyBuffer
+from Strategy.Indicators import IndicatorStore
+
+ta = LazyModule('pandas_ta')
+signal = LazyModule('scipy.signal')
+
+FOUR_HOURS_NS = 4 * HOUR_NS
 
 class Maengja:
 
-    def __init__(self, symbol):
+    PARAMS = dict(BB_1=dict(length=20, std=2, buy_margin=0.01),
+                  BB_2=dict(length=4, std=4, buy_margin=0.01),
+                  Trailing=(1.00-0.00),
+                  Price_Oscillator=dict(length=14),
+                  RSI=dict(length=14, hill_window=32, hills=3),
+                  SMA=dict(margin=0.01, periods=[5, 20, 60, 120, 240, 480]))
+    # RSI는 재귀 평균이라 길이의 10배 정도 지나야 시작점 영향이 사라짐
+    RSI_WARMUP = 10
+
+    def __init__(self, symbol, note=None, indicators=None):
         self.symbol = symbol
-        self.note = {'time': [], 'symbol': []}
+        self.note = note if note is not None else ProphecyBuffer([symbol]).note(symbol)
+        self.indicators = indicators if indicators is not None else IndicatorStore()
         self.current_hour = None
         self.current_minute = None
         self.market_end_time = (15, 59)
+        self.market_end_minute = self.market_end_time[0] * 60 + self.market_end_time[1]
+        self.session = SessionTime('America/New_York')
+        self.is_end_of_day = False
         self.positions = PositionLive() if SingletonMeta.is_instantiated(PositionLive) else PositionLocal()
-        self.params = dict(BB_1=dict(length=20, std=2, buy_margin=0.01),
-                           BB_2=dict(length=4, std=4, buy_margin=0.01),
-                           Trailing=(1.00-0.00),
-                           Price_Oscillator=dict(length=14),
-                           RSI=dict(length=14, hill_window=32, hills=3),
-                           SMA=dict(margin=0.01, periods=[5, 20, 60, 120, 240, 480]),
-                           note_list_limit=3)
+        self.params = copy.deepcopy(self.PARAMS)
         self.sma_cols = [f'SMA_{period}' for period in self.params['SMA']['periods']]
         self.data_ = None
         self.recent_ = None
 
+    @classmethod
+    def lookback(cls, params=None):
+        """Hour bars the indicators need: `required` to compute them, `warmup` to settle them."""
+        params = params or cls.PARAMS
+        required = max(params["BB_1"]["length"], params["BB_2"]["length"], params["Price_Oscillator"]["length"],
+                       params["RSI"]["length"], params["RSI"]["hill_window"], max(params["SMA"]["periods"]))
+        warmup = params["RSI"]["length"] * cls.RSI_WARMUP + params["RSI"]["hill_window"]
+        return dict(required=required, warmup=warmup)
+
+    def indicator(self, name):
+        """Latest value of an indicator level (bb*/SMA_*) of this symbol."""
+        return self.indicators.get(self.symbol, name)
+
     def update(self, data, recent):
         try:
             self.calculate_indicators(data)
             self.update_position_stop_value(data, recent)
             self.current_hour = data.index[-1]
-            self.current_minute = recent.index[-1]
-            self.note['time'].append(self.current_minute)
-            self.note['symbol'].append(self.symbol)
+            self.current_minute = recent.index.asi8[-1]
+            self.is_end_of_day = self.session.minute_of_day(self.current_minute) == self.market_end_minute
+            self.note.reset()
+            self.note['time'] = self.current_minute
 
             self.detect_bb_upward_breakout(data, recent, 'bb1_lower', self.params['BB_1']['buy_margin'])
             self.detect_bb_upward_breakout(data, recent, 'bb2_lower', self.params['BB_2']['buy_margin'])
@@ -47,8 +76,6 @@ class Maengja:
             self.resistance_upward_breakout(data, recent)
             self.top_resist_downward_break(data, recent)
             self.update_sell_signal()
-
-            self.trim_notes()
         except Exception as e:
             print(f"Error updating Maengja for symbol {self.symbol}: {e}")
 
@@ -81,9 +108,8 @@ class Maengja:
             print("Insufficient data to calculate indicators.")
             return
 
-        # 마지막 데이터만 선택
-        last_close = data['close'].iloc[-1]
-        last_index = data.index[-1]
+        # 지표는 history 프레임이 아닌 IndicatorStore에 저장
+        close = data['close']
 
         # 볼린저 밴드 계산 (마지막 데이터만)
         try:
@@ -98,21 +124,21 @@ class Maengja:
             bb_2.index = bb_columns
 
             for col, prefix in product(bb_columns, ['bb1_', 'bb2_']):
-                data.loc[last_index, f'{prefix}{col}'] = bb_1[col] if prefix == 'bb1_' else bb_2[col]
+                self.indicators.set(self.symbol, f'{prefix}{col}', bb_1[col] if prefix == 'bb1_' else bb_2[col])
         except Exception as e:
             print(f"Error calculating Bollinger Bands: {e}")
 
         # SMA for PO (마지막 데이터만)
         try:
-            data['SMA_for_PO'] = ta.sma(data['close'], length=self.params["Price_Oscillator"]["length"])
+            sma_for_po = ta.sma(close, length=self.params["Price_Oscillator"]["length"])
             # Price Oscillator (전체 범위 계산)
-            data['Price_Oscillator'] = ((data['close'] - data['SMA_for_PO']) / data['SMA_for_PO']) * 100.0
+            self.indicators.set_series(self.symbol, 'Price_Oscillator', ((close - sma_for_po) / sma_for_po) * 100.0)
         except Exception as e:
             print(f"Error calculating Price Oscillator: {e}")
 
         # RSI (전체 범위 계산)
         try:
-            data['RSI'] = ta.rsi(data['close'], length=self.params["RSI"]["length"])
+            self.indicators.set_series(self.symbol, 'RSI', ta.rsi(close, length=self.params["RSI"]["length"]))
         except Exception as e:
             print(f"Error calculating RSI: {e}")
 
@@ -120,8 +146,8 @@ class Maengja:
         try:
             for period in self.params["SMA"]["periods"]:
                 if period <= len(data):
-                    sma = ta.sma(data['close'].iloc[-period:], length=period).iloc[-1]
-                    data.loc[last_index, f'SMA_{period}'] = sma
+                    sma = ta.sma(close.iloc[-period:], length=period).iloc[-1]
+                    self.indicators.set(self.symbol, f'SMA_{period}', sma)
         except Exception as e:
             print(f"Error calculating SMA for period {period}: {e}")
 
@@ -136,16 +162,16 @@ class Maengja:
                     self.positions.assets[symbol]['stop_trailing'] = self.positions.assets[symbol]['price'] * self.params['Trailing']
                 # update stop_value
                 stop_key = self.positions.assets[symbol]['stop_key']
-                if stop_key == '':
-                    continue
-                self.positions.assets[symbol]['stop_value'] = data[stop_key].iloc[-1]
+                if stop_key != '':
+                    self.positions.assets[symbol]['stop_value'] = self.indicator(stop_key)
+                self.positions.notify_stop(symbol)
 
     def detect_bb_upward_breakout(self, data, recent, metric, margin):
-        self.note.setdefault(f'bullish_breakout_{metric}',[]).append(False)
-        bullish_breakout_margin = self.detect_upward_breakout(data, recent, metric, margin)
-        self.note.setdefault(f'bullish_breakout_{metric}_margin',[]).append(bullish_breakout_margin)
+        self.note[f'bullish_breakout_{metric}'] = False
+        bullish_breakout_margin = self.detect_upward_breakout(data, recent, self.indicator(metric), margin)
+        self.note[f'bullish_breakout_{metric}_margin'] = bullish_breakout_margin
         touch = bullish_breakout_margin
-        self.note.setdefault(f'touch_{metric}',[]).append(touch)
+        self.note[f'touch_{metric}'] = touch
 
     def breakthrough_metric_upward_two_level(self, data, recent, metric, margin):
         # bullish_breakout = (
@@ -153,61 +179,60 @@ class Maengja:
         #         or self.detect_upward_breakout_keeping(data, recent, metric, 0.0, f'bullish_breakout_{metric}',
         #                                                f'touch_{metric}')
         # )
-        # self.note.setdefault(f'bullish_breakout_{metric}',[]).append(bullish_breakout)
-        self.note.setdefault(f'bullish_breakout_{metric}',[]).append(False)
-        bullish_breakout_margin = self.detect_upward_breakout(data, recent, metric, margin)
-        self.note.setdefault(f'bullish_breakout_{metric}_margin',[]).append(bullish_breakout_margin)
+        # self.note[f'bullish_breakout_{metric}'] = bullish_breakout
+        self.note[f'bullish_breakout_{metric}'] = False
+        bullish_breakout_margin = self.detect_upward_breakout(data, recent, self.indicator(metric), margin)
+        self.note[f'bullish_breakout_{metric}_margin'] = bullish_breakout_margin
         # touch = bullish_breakout and bullish_breakout_margin
         touch = bullish_breakout_margin
-        self.note.setdefault(f'touch_{metric}',[]).append(touch)
+        self.note[f'touch_{metric}'] = touch
 
     @staticmethod
-    def detect_upward_breakout(data, recent, metric, offset=0.0):
-        threshold = data[metric].iloc[-1]
+    def detect_upward_breakout(data, recent, threshold, offset=0.0):
         threshold_with_offset = threshold + recent['close'].iloc[-1] * offset
         price = recent['close'].iloc[-1]
         current_low = data['low'].iloc[-1]
         if (current_low <= threshold_with_offset) and (price > threshold_with_offset):
             return True
         else:
-            time_diff = abs(data.index[-1] - recent.index[-1])
-            if time_diff > pd.Timedelta(hours=4):
+            time_diff = abs(data.index.asi8[-1] - recent.index.asi8[-1])
+            if time_diff > FOUR_HOURS_NS:
                 prev_close = data['close'].iloc[-1]
                 if (prev_close <= threshold_with_offset) and (price > threshold_with_offset):
                     return True
         return False
 
     def detect_upward_breakout_keeping(self, data, recent, metric, offset, bullish_breakout_metric, touch_metric):
-        threshold = data[metric].iloc[-1]
+        threshold = self.indicator(metric)
         threshold_with_offset = threshold + recent['close'].iloc[-1] * offset
         price = recent['close'].iloc[-1]
         bullish_breakout_keeping = (
                 price > threshold_with_offset
-                and self.note.get(bullish_breakout_metric, [False])[-1]
+                and self.note.get(bullish_breakout_metric, False)
         )
-        if self.note.get(touch_metric, [False])[-1]:
+        if self.note.get(touch_metric, False):
             bullish_breakout_keeping = False
         return bullish_breakout_keeping
 
     def get_po_divergence(self, data):
-        if 'PO_divergence' not in data.columns:
-            data['PO_divergence'] = np.zeros(len(data), dtype=float)
-        peaks, dips = self.get_peaks_and_dips(data['close'], 2)
+        close = data['close'].to_numpy()
+        peaks, dips = self.get_peaks_and_dips(close, 2)
         if len(peaks) == 0 or len(dips) == 0:
-            data.loc[self.current_hour, 'PO_divergence'] = 0.0
-            self.note.setdefault('PO_divergence', []).append(0.0)
+            self.indicators.set(self.symbol, 'PO_divergence', 0.0)
+            self.note['PO_divergence'] = 0.0
             return
         peak_first = peaks[0] < dips[0]
         dip_first = peaks[0] > dips[0]
-        close_peaks = data['close'].iloc[peaks].to_list()
-        close_dips = data['close'].iloc[dips].to_list()
-        po_peaks = data['Price_Oscillator'].iloc[peaks].to_list()
-        po_dips = data['Price_Oscillator'].iloc[dips].to_list()
+        price_oscillator = self.indicators.get_series(self.symbol, 'Price_Oscillator')
+        close_peaks = close[peaks].tolist()
+        close_dips = close[dips].tolist()
+        po_peaks = price_oscillator[peaks].tolist()
+        po_dips = price_oscillator[dips].tolist()
         bullish = self.is_bullish_divergence(close_dips, po_dips)
         bearish = self.is_bearish_divergence(close_peaks, po_peaks)
         position = self.decide_divergence_position(bullish, bearish, peak_first, dip_first)
-        data.loc[self.current_hour, 'PO_divergence'] = position
-        self.note.setdefault('PO_divergence', []).append(position)
+        self.indicators.set(self.symbol, 'PO_divergence', position)
+        self.note['PO_divergence'] = position
 
     def get_peaks_and_dips(self, series, num_peaks):
         return self._compute_peaks_and_dips(series, len(series), num_peaks)
@@ -217,12 +242,13 @@ class Maengja:
 
     @staticmethod
     def _compute_peaks_and_dips(series, window, num_peaks=None):
-        windowed_series = series.iloc[-window:]
-        peaks, _ = find_peaks(windowed_series)
-        dips, _ = find_peaks(-windowed_series)
-        if series.iloc[-1] > series.iloc[-2]:
+        series = np.asarray(series)
+        windowed_series = series[-window:]
+        peaks, _ = signal.find_peaks(windowed_series)
+        dips, _ = signal.find_peaks(-windowed_series)
+        if series[-1] > series[-2]:
             peaks = np.append(peaks, len(windowed_series) - 1)
-        elif series.iloc[-1] < series.iloc[-2]:
+        elif series[-1] < series[-2]:
             dips = np.append(dips, len(windowed_series) - 1)
         if num_peaks is not None:
             peaks = peaks[-num_peaks:]
@@ -258,67 +284,63 @@ class Maengja:
         return 0
 
     def check_rsi(self, data, window, num_hills):
-        if 'RSI_check' not in data.columns:
-            data['RSI_check'] = np.full(len(data), 0, dtype=float)
         if len(data) < window:
-            data.loc[self.current_hour, 'RSI_check'] = 0.0
-            self.note.setdefault('RSI_check', []).append(0.0)
+            self.indicators.set(self.symbol, 'RSI_check', 0.0)
+            self.note['RSI_check'] = 0.0
             return
-        current_rsi = data['RSI'].iloc[-1]
+        rsi = self.indicators.get_series(self.symbol, 'RSI')
+        current_rsi = rsi[-1]
         position = 0
         if current_rsi < 30:
-            _, dips = self.get_peaks_and_dips_in_window(data['RSI'], window)
-            if (data['RSI'].iloc[dips] < 30).sum() >= num_hills:
+            _, dips = self.get_peaks_and_dips_in_window(rsi, window)
+            if (rsi[dips] < 30).sum() >= num_hills:
                 position += 1
         elif current_rsi > 70:
-            peaks, _ = self.get_peaks_and_dips_in_window(data['RSI'], window)
-            if (data['RSI'].iloc[peaks] > 70).sum() >= num_hills:
+            peaks, _ = self.get_peaks_and_dips_in_window(rsi, window)
+            if (rsi[peaks] > 70).sum() >= num_hills:
                 position -= 1
-        data.loc[self.current_hour, 'RSI_check'] = position
-        self.note.setdefault('RSI_check', []).append(position)
+        self.indicators.set(self.symbol, 'RSI_check', position)
+        self.note['RSI_check'] = position
 
     def check_sma_alignment(self, data):
-        if 'SMA_align_strength' not in data.columns:
-            data['SMA_align_strength'] = np.full(len(data), 0.0, dtype=float)
-        current_sma = [data[col].iloc[-1] for col in self.sma_cols]
+        current_sma = [self.indicator(col) for col in self.sma_cols]
         align_strength = sum(
             (1 if current_sma[i] > current_sma[i + 1] else -1)
             for i in range(len(current_sma) - 1)
         )
         align_strength /= len(current_sma) - 1  # 정규화 (-1 ~ +1 범위)
-        data.loc[self.current_hour, 'SMA_align_strength'] = align_strength
-        self.note.setdefault('SMA_align_strength', []).append(align_strength)
+        self.indicators.set(self.symbol, 'SMA_align_strength', align_strength)
+        self.note['SMA_align_strength'] = align_strength
 
     def check_sma_breakthrough(self, data, recent, margin):
         sma_below_close_name = ''
         sma_below_close_value = 0
         bullish_breakouts = 0
         for sma_name in self.sma_cols:
-            sma_value = data[sma_name].iloc[-1]
-            if self.detect_upward_breakout(data, recent, sma_name, margin):
+            sma_value = self.indicator(sma_name)
+            if self.detect_upward_breakout(data, recent, sma_value, margin):
                 bullish_breakouts += 1
                 if sma_value > sma_below_close_value:
                     sma_below_close_name = sma_name
                     sma_below_close_value = sma_value
-        self.note.setdefault('check_SMA_breakthrough', []).append(bullish_breakouts)
-        self.note.setdefault('SMA_below_close', []).append(sma_below_close_name)
+        self.note['check_SMA_breakthrough'] = bullish_breakouts
+        self.note['SMA_below_close'] = sma_below_close_name
 
     def update_buy_signal(self, data, recent):
-        is_aligned = self.note['SMA_align_strength'][-1] > 0.99
-        is_bb1_touch = self.note['touch_bb1_lower'][-1]
-        is_bb2_touch = self.note['touch_bb2_lower'][-1]
+        is_aligned = self.note['SMA_align_strength'] > 0.99
+        is_bb1_touch = self.note['touch_bb1_lower']
+        is_bb2_touch = self.note['touch_bb2_lower']
         is_at_least_one_touch = is_bb1_touch or is_bb2_touch
-        is_sma_breakthrough = self.note['check_SMA_breakthrough'][-1] > 0.1
-        is_po_divergence_bearish = self.note['PO_divergence'][-1] < 0
-        is_rsi_check_bearish = self.note['RSI_check'][-1] < 0
+        is_sma_breakthrough = self.note['check_SMA_breakthrough'] > 0.1
+        is_po_divergence_bearish = self.note['PO_divergence'] < 0
+        is_rsi_check_bearish = self.note['RSI_check'] < 0
         is_bearish = is_po_divergence_bearish or is_rsi_check_bearish
 
         # 장종료시 매수 취소
-        now = self.note['time'][-1].tz_convert('America/New_York')
-        is_now_end_of_day =(now.hour, now.minute) == self.market_end_time
+        is_now_end_of_day = self.is_end_of_day
         buy = is_aligned and (is_at_least_one_touch or is_sma_breakthrough) and (not is_bearish)
         buy = buy and not is_now_end_of_day
-        self.note.setdefault('buy', []).append(buy)
+        self.note['buy'] = buy
 
         buy_reason_parts = []
         if is_bb1_touch:
@@ -328,28 +350,28 @@ class Maengja:
         if is_sma_breakthrough:
             buy_reason_parts.append('sma')
         buy_reason = '-'.join(buy_reason_parts)
-        self.note.setdefault('buy_reason', []).append(buy_reason)
+        self.note['buy_reason'] = buy_reason
 
         buy_strength = (
                 int(is_bb1_touch) +
                 int(is_bb2_touch) +
                 int(is_sma_breakthrough) +
-                self.note['PO_divergence'][-1] +
-                self.note['RSI_check'][-1]
+                self.note['PO_divergence'] +
+                self.note['RSI_check']
         )
-        self.note.setdefault('buy_strength', []).append(buy_strength)
+        self.note['buy_strength'] = buy_strength
 
         stop_value_hubos = []
         stop_key_hubos = []
         if is_bb1_touch:
-            stop_value_hubos.append(data['bb1_lower'].iloc[-1] * self.params['Trailing'])
+            stop_value_hubos.append(self.indicator('bb1_lower') * self.params['Trailing'])
             stop_key_hubos.append('bb1_lower')
         if is_bb2_touch:
-            stop_value_hubos.append(data['bb2_lower'].iloc[-1] * self.params['Trailing'])
+            stop_value_hubos.append(self.indicator('bb2_lower') * self.params['Trailing'])
             stop_key_hubos.append('bb2_lower')
         if is_sma_breakthrough:
-            sma_name = self.note['SMA_below_close'][-1]
-            stop_value_hubos.append(data[sma_name].iloc[-1]  * self.params['Trailing'])
+            sma_name = self.note['SMA_below_close']
+            stop_value_hubos.append(self.indicator(sma_name) * self.params['Trailing'])
             stop_key_hubos.append(sma_name)
 
         if self.symbol in self.positions.assets:
@@ -375,86 +397,86 @@ class Maengja:
         else:
             stop_trailing = 0.0
 
-        self.note.setdefault('price', []).append(recent['close'].iloc[-1])
-        self.note.setdefault('stop_value', []).append(stop_value)
-        self.note.setdefault('stop_key', []).append(stop_key)
-        self.note.setdefault('stop_trailing', []).append(stop_trailing)
-        self.note.setdefault('trading_value', []).append(data.loc[self.current_hour, 'trading_value'])
+        self.note['price'] = recent['close'].iloc[-1]
+        self.note['stop_value'] = stop_value
+        self.note['stop_key'] = stop_key
+        self.note['stop_trailing'] = stop_trailing
+        self.note['trading_value'] = data.loc[self.current_hour, 'trading_value']
 
     def detect_stoploss_downward_breakout(self, recent):
         if self.symbol not in self.positions.assets:
-            self.note.setdefault('stoploss_downward_breakout', []).append(False)
+            self.note['stoploss_downward_breakout'] = False
             return
         threshold = max(self.positions.assets[self.symbol]['stop_value'], self.positions.assets[self.symbol]['stop_trailing'])
         price = recent['close'].iloc[-1]
         bearish_breakout = price < threshold
-        self.note.setdefault('stoploss_downward_breakout', []).append(bearish_breakout)
+        self.note['stoploss_downward_breakout'] = bearish_breakout
 
     def resistance_upward_breakout(self, data, recent):
         if self.symbol not in self.positions.assets:
-            self.note.setdefault('resistance_upward_breakout', []).append(False)
-            self.note.setdefault('new_stop_value_hubo', []).append(0.0)
-            self.note.setdefault('new_stop_key_hubo', []).append('')
+            self.note['resistance_upward_breakout'] = False
+            self.note['new_stop_value_hubo'] = 0.0
+            self.note['new_stop_key_hubo'] = ''
             return
         resistance_upward_breakout = False
         current_stop_key = self.positions.assets[self.symbol]['stop_key']
-        current_stop_value = data[current_stop_key].iloc[-1] if current_stop_key != '' else 0.0
+        current_stop_value = self.indicator(current_stop_key) if current_stop_key != '' else 0.0
         new_stop_value_hubo = current_stop_value
         new_stop_key_hubo = current_stop_key
         resistance_metrics = self.sma_cols + ['bb1_upper', 'bb2_upper']
         for metric in resistance_metrics:
-            metric_value = data[metric].iloc[-1]
+            metric_value = self.indicator(metric)
             if metric_value > current_stop_value:
-                if self.detect_upward_breakout(data, recent, metric, 0):
+                if self.detect_upward_breakout(data, recent, metric_value, 0):
                     resistance_upward_breakout = True
                     new_stop_value_hubo = metric_value * self.params['Trailing']
                     new_stop_key_hubo = metric
-        self.note.setdefault('resistance_upward_breakout', []).append(resistance_upward_breakout)
-        self.note.setdefault('new_stop_value_hubo', []).append(new_stop_value_hubo)
-        self.note.setdefault('new_stop_key_hubo', []).append(new_stop_key_hubo)
+        self.note['resistance_upward_breakout'] = resistance_upward_breakout
+        self.note['new_stop_value_hubo'] = new_stop_value_hubo
+        self.note['new_stop_key_hubo'] = new_stop_key_hubo
 
     def top_resist_downward_break(self, data, recent):
         if self.symbol not in self.positions.assets:
-            self.note.setdefault('top_resist_downward_break', []).append(False)
+            self.note['top_resist_downward_break'] = False
             return
         resistance_metrics = self.sma_cols + ['bb1_upper', 'bb2_upper']
-        resistances = [data[metric].iloc[-1] for metric in resistance_metrics]
+        resistances = [self.indicator(metric) for metric in resistance_metrics]
         high = recent['high'].iloc[-1]
         price = recent['close'].iloc[-1]
         is_high_resist_free = all(high > resistance for resistance in resistances)
         bearish_breakout = any(high > resistance >= price for resistance in resistances)
         top_resist_downward_break = is_high_resist_free and bearish_breakout
-        self.note.setdefault('top_resist_downward_break', []).append(top_resist_downward_break)
+        self.note['top_resist_downward_break'] = top_resist_downward_break
 
     def update_sell_signal(self):
         if self.symbol not in self.positions.assets:
-            self.note.setdefault('sell', []).append(False)
-            self.note.setdefault('sell_reason', []).append('')
-            self.note.setdefault('keep_profit', []).append(False)
+            self.note['sell'] = False
+            self.note['sell_reason'] = ''
+            self.note['keep_profit'] = False
             return
 
         #1. 손절가 매도
-        do_stop_loss = self.note['stoploss_downward_breakout'][-1]
+        do_stop_loss = self.note['stoploss_downward_breakout']
 
         #2. 저항선 돌파시 익절 또는 보유. 보유시 손절지표 교체
-        is_resistance_upward_breakout = self.note['resistance_upward_breakout'][-1]
-        is_po_divergence_bullish = self.note['PO_divergence'][-1] > 0
-        is_rsi_check_bullish = self.note['RSI_check'][-1] > 0
+        is_resistance_upward_breakout = self.note['resistance_upward_breakout']
+        is_po_divergence_bullish = self.note['PO_divergence'] > 0
+        is_rsi_check_bullish = self.note['RSI_check'] > 0
         is_bearish = (not is_po_divergence_bullish) or (not is_rsi_check_bullish)
         do_take_profit = is_resistance_upward_breakout and is_bearish
         do_keep_profit = is_resistance_upward_breakout and (not is_bearish)
         if do_keep_profit:
-            change_stop_loss = self.note.get('new_stop_value_hubo',0)[-1] >= self.positions.assets[self.symbol]['stop_value']
+            change_stop_loss = self.note['new_stop_value_hubo'] >= self.positions.assets[self.symbol]['stop_value']
             if change_stop_loss:
-                self.positions.assets[self.symbol]['stop_value'] = self.note.get('new_stop_value_hubo',0)[-1]
-                self.positions.assets[self.symbol]['stop_key'] = self.note.get('new_stop_key_hubo','')[-1]
+                self.positions.assets[self.symbol]['stop_value'] = self.note['new_stop_value_hubo']
+                self.positions.assets[self.symbol]['stop_key'] = self.note['new_stop_key_hubo']
+                self.positions.notify_stop(self.symbol)
 
         #3. 최상위저항선 하향돌파시 매도
-        top_resist_downward_break = self.note['top_resist_downward_break'][-1]
+        top_resist_downward_break = self.note['top_resist_downward_break']
 
         #4. 장종료시 매도
-        now = self.note['time'][-1].tz_convert('America/New_York')
-        is_now_end_of_day = (now.hour, now.minute) == self.market_end_time
+        is_now_end_of_day = self.is_end_of_day
 
         # 매도신호 정리
         sell = (
@@ -462,7 +484,7 @@ class Maengja:
                 and not do_keep_profit
                 )
         sell = sell or is_now_end_of_day
-        self.note.setdefault('sell', []).append(sell)
+        self.note['sell'] = sell
 
         sell_reasons = []
         if do_stop_loss:
@@ -475,10 +497,5 @@ class Maengja:
             sell_reasons.append('EndMarket')
         sell_reason = '|' + '|'.join(sell_reasons) + '|' if sell_reasons else ''
 
-        self.note.setdefault('sell_reason', []).append(sell_reason)
-        self.note.setdefault('keep_profit', []).append(do_keep_profit)
-
-    def trim_notes(self):
-        for key in self.note:
-            if len(self.note[key]) > self.params["note_list_limit"]:
-                self.note[key] = self.note[key][-self.params["note_list_limit"]:]
\ No newline at end of file
+        self.note['sell_reason'] = sell_reason
+        self.note['keep_profit'] = do_keep_profit
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+class ProphecyBuffer:
+    """Fixed-schema prophecy columns backed by preallocated arrays, one row slot per symbol.
+
+    Each `Maengja` writes its minute's note into its own slot through a `NoteSlot`, so no
+    per-symbol frames are built. `table` assembles the minute's prophecy from the written
+    slots with one gather per column. The table owns its data: callers keep prophecies
+    across minutes (e.g. `prophecy_history`), so it must not share the slot arrays that
+    the next minute overwrites.
+    """
+
+    # (column, dtype, default) in the column order of the prophecy history export
+    SCHEMA = [('time', np.int64, 0), ('symbol', object, ''),
+              ('bullish_breakout_bb1_lower', bool, False), ('bullish_breakout_bb1_lower_margin', bool, False),
+              ('touch_bb1_lower', bool, False),
+              ('bullish_breakout_bb2_lower', bool, False), ('bullish_breakout_bb2_lower_margin', bool, False),
+              ('touch_bb2_lower', bool, False),
+              ('PO_divergence', np.float64, 0.0), ('RSI_check', np.float64, 0.0),
+              ('SMA_align_strength', np.float64, 0.0), ('check_SMA_breakthrough', np.int64, 0),
+              ('SMA_below_close', object, ''),
+              ('buy', bool, False), ('buy_reason', object, ''), ('buy_strength', np.float64, 0.0),
+              ('price', np.float64, 0.0), ('stop_value', np.float64, 0.0), ('stop_key', object, ''),
+              ('stop_trailing', np.float64, 0.0), ('trading_value', np.float64, 0.0),
+              ('stoploss_downward_breakout', bool, False), ('resistance_upward_breakout', bool, False),
+              ('new_stop_value_hubo', np.float64, 0.0), ('new_stop_key_hubo', object, ''),
+              ('top_resist_downward_break', bool, False),
+              ('sell', bool, False), ('sell_reason', object, ''), ('keep_profit', bool, False)]
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.slots = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.columns = {name: np.full(len(self.symbols), default, dtype=dtype) for name, dtype, default in self.SCHEMA}
+        self.columns['symbol'][:] = self.symbols
+        self.written = np.zeros(len(self.symbols), dtype=bool)
+
+    def note(self, symbol):
+        return NoteSlot(self, self.slots[symbol])
+
+    def begin_minute(self):
+        self.written[:] = False
+
+    def mark_written(self, symbol):
+        self.written[self.slots[symbol]] = True
+
+    def table(self):
+        """Prophecy of the current minute: one row per written slot."""
+        if self.written.all():
+            return pd.DataFrame({name: column.copy() for name, column in self.columns.items()})
+        rows = np.flatnonzero(self.written)
+        return pd.DataFrame({name: column[rows] for name, column in self.columns.items()})
+
+
+class NoteSlot:
+    """Dict-like view of one symbol's row in a `ProphecyBuffer`."""
+
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+
+    def __getitem__(self, key):
+        return self.buffer.columns[key][self.index]
+
+    def __setitem__(self, key, value):
+        self.buffer.columns[key][self.index] = value
+
+    def __contains__(self, key):
+        return key in self.buffer.columns
+
+    def get(self, key, default=None):
+        return self[key] if key in self.buffer.columns else default
+
+    def reset(self):
+        """Restore the defaults of every column except the symbol."""
+        for name, _, default in ProphecyBuffer.SCHEMA:
+            if name != 'symbol':
+                self.buffer.columns[name][self.index] = default
+
+    def to_dict(self):
+        return {name: column[self.index] for name, column in self.buffer.columns.items()}
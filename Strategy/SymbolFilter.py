@@ -7,9 +7,11 @@ from alpaca.data.requests import StockBarsRequest, CryptoBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.data.enums import DataFeed
 from ApiAccess.ApiAccess import ClientType, ClientManager
+from Fetch.Fetch import Fetcher
+from Fetch.Planner import BarRequestPlanner
+from Fetch.Store import BarStore, DailyBarStore, AssetListCache
 import Common.Common as Common
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import csv
 
 class AssetFilter:
@@ -31,13 +33,16 @@ class AssetFilter:
 class EquityFilter(AssetFilter):
     """Filter US equities based on trading volume and value."""
 
-    def __init__(self, renew=False, asset_filter_num=250, russel_filter_num=250, start_timestamp=pd.Timestamp.now(), max_workers=1):
+    def __init__(self, renew=False, asset_filter_num=250, russel_filter_num=250, start_timestamp=pd.Timestamp.now(), max_workers=1,
+                 asset_ttl=pd.Timedelta(hours=12)):
         super().__init__('US_EQUITY', f'{os.environ.get("D4")}/Data/Symbols/symbols_us_{start_timestamp}.csv')
         self.renew = renew
         self.start_timestamp = start_timestamp
         self.asset_filter_num = asset_filter_num
         self.russel_filter_num = russel_filter_num
         self.max_workers = max_workers
+        self.assets = AssetListCache(ttl=asset_ttl)
+        self.store = DailyBarStore()
 
     @staticmethod
     def get_symbols():
@@ -69,70 +74,80 @@ class EquityFilter(AssetFilter):
 
     # 병렬화된 get_bars_slow 함수
     def get_bars(self, symbols):
-        """Fetch 60-day stock bar data for given symbols using parallel processing."""
-        stock_client = ClientManager().get_client(ClientType.STOCK_HISTORY)
-        request_size = 1024
-
-        def fetch_batch(i):
-            batch = symbols[i * request_size: (i + 1) * request_size]
-            request_params = StockBarsRequest(
-                symbol_or_symbols=batch,
-                timeframe=TimeFrame.Day,
-                start=self.start_timestamp - timedelta(days=120),  # 120
-                end=self.start_timestamp,
-                feed=DataFeed.SIP
-            )
-            daily_bars = stock_client.get_stock_bars(request_params).df
-            return daily_bars.groupby(level='symbol').tail(60)
-
-        num_batches = math.ceil(len(symbols) / request_size)
-        df_daily_bars = pd.DataFrame()
-
-        # 병렬 실행
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(fetch_batch, i): i for i in range(num_batches)}
-
-            for future in as_completed(futures):
-                batch_index = futures[future]
-                try:
-                    batch_bars = future.result()
-                    df_daily_bars = pd.concat([df_daily_bars, batch_bars])
-                    print(f"Successfully fetched batch {batch_index}")
-                except Exception as e:
-                    print(f"Error fetching batch {batch_index}: {e}")
-
-        return df_daily_bars
+        """Return the last 60 daily bars of each symbol, fetching only days the local store does not hold."""
+        end = self.start_timestamp if self.start_timestamp.tz else self.start_timestamp.tz_localize('America/New_York')
+        start = end - timedelta(days=120)
+        bars = self.update_daily_bars(symbols, start, end)
+        window = {symbol: bars[symbol][(bars[symbol].index >= start) & (bars[symbol].index <= end)].tail(60)
+                  for symbol in symbols if symbol in bars}
+        window = {symbol: df for symbol, df in window.items() if not df.empty}
+        if not window:
+            return pd.DataFrame()
+        return pd.concat(window, names=['symbol', 'timestamp'])
+
+    def update_daily_bars(self, symbols, start, end):
+        """Bring the daily bar store up to date for `[start, end]`; returns every stored bar as {symbol: bars}."""
+        complete_until = end.normalize()  # 당일 daily bar는 아직 완성되지 않음
+        persist = ClientManager.fake_market is None  # FakeMarket 데이터는 저장하지 않음
+        bars, coverage = self.store.load() if persist else ({}, {})
+
+        planner = BarRequestPlanner()
+        gaps = {symbol: BarStore.missing(coverage.get(symbol, []), start, end, seam=timedelta(days=5)) for symbol in symbols}
+        gaps = {symbol: symbol_gaps for symbol, symbol_gaps in gaps.items() if symbol_gaps}
+        # 호출마다 만드는 fetcher의 이벤트 루프 스레드와 worker pool은 with 블록을 나가며 정리
+        with Fetcher(max_concurrency=self.max_workers) as fetcher:
+            fetched, failed = fetcher.get_stock_history_gaps(gaps, TimeFrame.Day, planner)
+
+            # 분할 조정으로 과거 가격이 바뀐 종목은 저장분을 버리고 전체 구간을 다시 받음
+            stale = [symbol for symbol in fetched if BarStore.is_stale(bars.get(symbol), coverage.get(symbol), fetched[symbol])]
+            if stale:
+                for symbol in stale:
+                    bars.pop(symbol, None)
+                    coverage.pop(symbol, None)
+                    fetched.pop(symbol)
+                refetched, refailed = fetcher.get_stock_history_gaps({symbol: [(start, end)] for symbol in stale}, TimeFrame.Day, planner)
+                fetched.update(refetched)
+                failed.update(refailed)
+                gaps.update({symbol: [(start, end)] for symbol in stale})
+
+        fetcher.processor.merge_into(bars, fetched)
+        for symbol, symbol_gaps in gaps.items():
+            for gap_start, gap_end in symbol_gaps:
+                if (symbol, gap_start) not in failed:
+                    coverage[symbol] = BarStore.add_coverage(coverage.get(symbol, []), gap_start, min(gap_end, complete_until))
+        if persist:
+            self.store.save(bars, coverage)
+        print(f"Daily bars: {len(symbols) - len(gaps)} symbols from the local store, {len(gaps)} updated, {len(stale)} refetched")
+        return bars
 
+    @staticmethod
+    def top_by_trading_value(daily_bars, symbols, num):
+        """Top-`num` of `symbols` by mean daily trading value."""
+        if daily_bars.empty:
+            return []
+        trading_value = daily_bars['volume'] * daily_bars['vwap']
+        mean_trading_value = trading_value.groupby(level='symbol').mean()
+        mean_trading_value = mean_trading_value[mean_trading_value.index.isin(symbols)]
+        return mean_trading_value.sort_values(ascending=False).head(num).index.tolist()
 
     def filter_symbols(self):
-        """Filter US equities and return top 5% by trading value."""
+        """Filter US equities and return the top symbols by trading value among all assets and Russell 2000."""
         if not self.renew:
             return self.read_existing_symbols()
 
-        tradable_assets = self.get_symbols()
+        tradable_assets = self.assets.get(self.get_symbols)
         symbols = tradable_assets.index.to_list()
-        daily_bars = self.get_bars(symbols)
 
-        # Calculate trading value
-        daily_bars['trading_value'] = daily_bars['volume'] * daily_bars['vwap']
-        mean_trading_value = daily_bars.groupby(level='symbol')['trading_value'].mean()
-        sorted_symbols = mean_trading_value.sort_values(ascending=False)
-
-        # Select and write top-k assets
-        threshold = self.asset_filter_num # int(len(sorted_symbols) * self.asset_filter_rate)
-        top_symbols = sorted_symbols.head(threshold).index.tolist()
-
-        # Do the same for Russel 2000
+        # Russel 2000 종목도 같은 daily bar 저장소에서 한 번에 받음
         folder_path = os.path.join(os.environ.get('D4'), 'Data/ExtData')
         russel = "IWM_holdings.csv"
         russel_csv = os.path.join(folder_path,russel)
         symbol_russel = self.get_tickers_from_csv(russel_csv)
-        daily_bars_russel = self.get_bars(symbol_russel)
-        daily_bars_russel['trading_value'] = daily_bars_russel['volume'] * daily_bars_russel['vwap']
-        mean_trading_value_russel = daily_bars_russel.groupby(level='symbol')['trading_value'].mean()
-        sorted_symbols_russel = mean_trading_value_russel.sort_values(ascending=False)
-        threshold_russel = self.russel_filter_num # int(len(sorted_symbols_russel) * self.asset_filter_rate)
-        top_symbols_russel = sorted_symbols_russel.head(threshold_russel).index.tolist()
+        daily_bars = self.get_bars(list(dict.fromkeys(symbols + symbol_russel)))
+
+        # Select and write top-k assets
+        top_symbols = self.top_by_trading_value(daily_bars, symbols, self.asset_filter_num)
+        top_symbols_russel = self.top_by_trading_value(daily_bars, symbol_russel, self.russel_filter_num)
         final_top_symbols = list(set(top_symbols + top_symbols_russel))
 
         self.write_symbols_to_file(final_top_symbols)
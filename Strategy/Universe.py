@@ -0,0 +1,108 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from Strategy.SymbolFilter import EquityFilter
+
+
+class UniverseTable:
+    """Point-in-time universe: top-k membership of every symbol on every trading day.
+
+    The table is a date × symbol int16 frame holding each member's trading-value rank among
+    all assets (1 = largest) and 0 for non-members. The row of a date is computed from bars
+    of earlier days only, so a backtest starting on that date sees no future data.
+    """
+
+    def __init__(self, ranks, asset_filter_num, russel_filter_num):
+        self.ranks = ranks
+        self.asset_filter_num = asset_filter_num
+        self.russel_filter_num = russel_filter_num
+
+    @staticmethod
+    def load(path=f'{os.environ.get("D4")}/Data/Symbols/universe_us.pkl'):
+        """Return the stored table, or None when it has not been built."""
+        if not os.path.exists(path):
+            return None
+        stored = pd.read_pickle(path)
+        return UniverseTable(stored['ranks'], stored['asset_filter_num'], stored['russel_filter_num'])
+
+    def save(self, path=f'{os.environ.get("D4")}/Data/Symbols/universe_us.pkl'):
+        pd.to_pickle(dict(ranks=self.ranks, asset_filter_num=self.asset_filter_num,
+                          russel_filter_num=self.russel_filter_num), path)
+
+    @staticmethod
+    def _date(timestamp):
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tz is not None:
+            timestamp = timestamp.tz_convert('America/New_York').tz_localize(None)
+        return timestamp.normalize()
+
+    def covers(self, timestamp, asset_filter_num, russel_filter_num):
+        """Whether the table has a row for the trading day of `timestamp` (no rows carried past its last day)."""
+        if self.ranks.empty or (asset_filter_num, russel_filter_num) != (self.asset_filter_num, self.russel_filter_num):
+            return False
+        date = self._date(timestamp)
+        return self.ranks.index[0] <= date <= self.ranks.index[-1]
+
+    def symbols_at(self, timestamp):
+        """Members on the last trading day at or before `timestamp`, largest trading value first."""
+        date = self._date(timestamp)
+        row = self.ranks.iloc[self.ranks.index.searchsorted(date, side='right') - 1]
+        row = row[row > 0]
+        return row.sort_values().index.tolist()
+
+
+class UniverseBuilder:
+    """Builds a `UniverseTable` from the daily bar store in one vectorized pass.
+
+    Uses the same selection as `EquityFilter.filter_symbols`: the top `asset_filter_num`
+    tradable assets and the top `russel_filter_num` IWM holdings by mean trading value over
+    the last `window` trading days.
+    """
+
+    def __init__(self, asset_filter_num=250, russel_filter_num=250, window=60, max_workers=16):
+        self.asset_filter_num = asset_filter_num
+        self.russel_filter_num = russel_filter_num
+        self.window = window
+        self.max_workers = max_workers
+
+    def trading_value(self, equity_filter, symbols, start, end):
+        """Daily trading value as a date × symbol frame, with the lookback before `start` included."""
+        bars = equity_filter.update_daily_bars(symbols, start - timedelta(days=2 * self.window), end)
+        values = {symbol: (df['volume'] * df['vwap']).tz_convert('America/New_York')
+                  for symbol, df in bars.items() if symbol in set(symbols) and not df.empty}
+        trading_value = pd.DataFrame(values)
+        trading_value.index = trading_value.index.tz_localize(None).normalize()
+        return trading_value.groupby(level=0).last().sort_index()
+
+    def rank(self, trading_value, symbols, num):
+        """Rank of each symbol in `symbols` per day (1 = largest), NaN outside the top `num`."""
+        columns = trading_value.columns.intersection(symbols)
+        ranks = trading_value[columns].rank(axis=1, ascending=False, method='first')
+        return ranks.where(ranks <= num)
+
+    def build(self, start, end):
+        equity_filter = EquityFilter(start_timestamp=end, max_workers=self.max_workers)
+        symbols = equity_filter.assets.get(equity_filter.get_symbols).index.to_list()
+        russel_csv = os.path.join(os.environ.get('D4'), 'Data/ExtData', 'IWM_holdings.csv')
+        symbol_russel = equity_filter.get_tickers_from_csv(russel_csv)
+        universe = list(dict.fromkeys(symbols + symbol_russel))
+
+        trading_value = self.trading_value(equity_filter, universe, start, end)
+        # 전일까지의 bar만 사용해 당일 universe를 정함 (look-ahead 방지)
+        mean_trading_value = trading_value.rolling(self.window, min_periods=1).mean().shift(1)
+        mean_trading_value = mean_trading_value.loc[UniverseTable._date(start):]
+
+        # Russel에서만 뽑힌 종목은 전체 순위 뒤에 이어 붙임
+        ranks = self.rank(mean_trading_value, symbols, self.asset_filter_num)
+        ranks = ranks.combine_first(self.rank(mean_trading_value, symbol_russel, self.russel_filter_num) + self.asset_filter_num)
+        ranks = ranks.fillna(0)
+        ranks = ranks.loc[:, (ranks > 0).any()].astype(np.int16)
+        print(f"Universe table: {len(ranks)} days, {ranks.shape[1]} symbols ever selected")
+        return UniverseTable(ranks, self.asset_filter_num, self.russel_filter_num)
+
+
+if __name__ == "__main__":
+    table = UniverseBuilder(max_workers=16).build(pd.Timestamp('2022-01-01', tz='America/New_York'), pd.Timestamp.now(tz='America/New_York'))
+    table.save()
+    print(table.symbols_at(pd.Timestamp('2024-11-01 09:31:00'))[:50])
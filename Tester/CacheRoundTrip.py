@@ -0,0 +1,41 @@
+import tempfile
+import pandas as pd
+from alpaca.data.timeframe import TimeFrame
+from ApiAccess.ApiAccess import ClientManager
+from ApiAccess.FakeAlpaca import FakeMarket
+from Fetch.Cache import BarCache
+from Fetch.Fetch import ApiDataFetcher
+
+
+class CacheRoundTripTest:
+    """Fetches a past window twice through the raw bar path with the disk cache on.
+
+    The first fetch decodes the raw response and writes it to a temporary `BarCache`; the
+    second must be a cache hit returning the same per-symbol frames. FakeMarket runs skip
+    the cache by default, so `cache_fake=True` is needed to exercise `BarCache.put`.
+    """
+
+    def __init__(self, symbols=('AAPL', 'MSFT', 'NVDA'), start='2024-11-04 09:30:00', end='2024-11-08 16:00:00'):
+        self.symbols = list(symbols)
+        self.start = pd.Timestamp(start, tz='America/New_York')
+        self.end = pd.Timestamp(end, tz='America/New_York')
+        self.directory = tempfile.TemporaryDirectory()
+        ClientManager.use_fake_market(FakeMarket(symbols=self.symbols))
+        self.cache = BarCache(directory=self.directory.name)
+        self.fetcher = ApiDataFetcher(raw=True, cache=self.cache, cache_fake=True)
+
+    def run(self):
+        try:
+            first = self.fetcher.get_stock_history(self.symbols, self.start, self.end, TimeFrame.Hour)
+            second = self.fetcher.get_stock_history(self.symbols, self.start, self.end, TimeFrame.Hour)
+        finally:
+            ClientManager.use_fake_market(None)
+            self.directory.cleanup()
+        print(f"Cache hits={self.cache.hits}, misses={self.cache.misses}, symbols={sorted(second)}")
+        same = first.keys() == second.keys() and all(first[symbol].equals(second[symbol]) for symbol in first)
+        return self.cache.hits == 1 and self.cache.misses == 1 and same
+
+
+if __name__ == "__main__":
+    test = CacheRoundTripTest()
+    assert test.run(), "raw bars did not round-trip through the bar cache"
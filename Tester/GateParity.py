@@ -0,0 +1,68 @@
+import time
+import pandas as pd
+from ApiAccess.ApiAccess import ClientManager
+from ApiAccess.FakeAlpaca import FakeMarket
+from Common.Clock import VirtualClock
+from Strategy.Lookback import LookbackPlanner
+from Strategy.Maengja import Maengja
+from Trader.Managers import TimeManager, DataManagerFast, StrategyManagerFast
+
+
+class GateParityTest:
+    """Runs gated and ungated strategy evaluation side by side on the same FakeMarket minutes.
+
+    Each side has its own DataManager and StrategyManager, so history updates and indicators of one side never
+    leak into the other. Every minute the buy/sell/keep decisions of both sides must be
+    identical; mismatches are collected in `mismatches`. No orders are placed, so held
+    symbols (always evaluated by the gate) are not exercised here.
+    """
+
+    def __init__(self, symbols, session_start='2024-11-04 09:31:00', minutes=120):
+        self.clock = VirtualClock(session_start, speed=None)
+        self.market = FakeMarket(symbols=symbols, now=self.clock.now)
+        ClientManager.use_fake_market(self.market)
+        self.symbols = list(symbols)
+        self.minutes = minutes
+        self.time_manager = TimeManager(clock=self.clock)
+        history_param = LookbackPlanner().history_param(Maengja)
+        self.sides = {gated: (DataManagerFast(history_param=history_param, max_workers=12), StrategyManagerFast(gated=gated))
+                      for gated in (False, True)}
+        self.mismatches = []
+        self.seconds = {False: 0.0, True: 0.0}
+
+    @staticmethod
+    def decisions(prophecy):
+        return {key: sorted(prophecy[prophecy[key]]['symbol'].tolist()) for key in ('buy', 'sell', 'keep_profit')}
+
+    def run(self):
+        self.time_manager.sync_current()
+        start = self.time_manager.current
+        for data_manager, strategy_manager in self.sides.values():
+            symbols = data_manager.fetch_history(self.symbols, start, self.time_manager.timezone)
+            strategy_manager.initialize_strategies(list(symbols))
+
+        for minute in range(self.minutes):
+            self.clock.set(start.floor('min') + pd.Timedelta(minutes=minute + 1, seconds=5))
+            self.time_manager.sync_current()
+            current = self.time_manager.current
+            decisions = {}
+            for gated, (data_manager, strategy_manager) in self.sides.items():
+                recent = data_manager.update_recent_data(list(strategy_manager.sages), current, self.time_manager.timezone)
+                started = time.perf_counter()
+                decisions[gated] = self.decisions(strategy_manager.evaluate(data_manager.history, recent))
+                self.seconds[gated] += time.perf_counter() - started
+            if decisions[False] != decisions[True]:
+                self.mismatches.append((current, decisions[False], decisions[True]))
+                print(f"{current}: ungated={decisions[False]} gated={decisions[True]}")
+
+        for data_manager, _ in self.sides.values():
+            data_manager.close()
+        print(f"Gate: {self.sides[True][1].gate.summary()}")
+        print(f"Evaluation seconds: ungated={self.seconds[False]:.2f}, gated={self.seconds[True]:.2f}")
+        print(f"{len(self.mismatches)} mismatching minutes out of {self.minutes}")
+        return not self.mismatches
+
+
+if __name__ == "__main__":
+    test = GateParityTest([f"SYN{i:05d}" for i in range(200)])
+    assert test.run(), "gated evaluation changed decisions"
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+class ImportBenchmark:
+    """Measures the startup cost of importing the trader modules in fresh processes.
+
+    Each run imports `module` in a new interpreter and reports the wall time of the import
+    and which of the lazily imported heavy dependencies got loaded anyway. The benchmark
+    fails when the median import time exceeds `budget` seconds or a lazy dependency is
+    imported at module load.
+    """
+
+    LAZY = ['pandas_ta', 'scipy.signal', 'pandas_market_calendars', 'openpyxl']
+
+    def __init__(self, module='Trader.Managers', runs=5, budget=3.0):
+        self.module = module
+        self.runs = runs
+        self.budget = budget
+        self.results = []
+
+    def measure(self):
+        code = ("import json, sys, time\n"
+                "started = time.perf_counter()\n"
+                f"import {self.module}\n"
+                "seconds = time.perf_counter() - started\n"
+                f"print(json.dumps(dict(seconds=seconds, loaded=[name for name in {self.LAZY!r} if name in sys.modules])))\n")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        result['process_seconds'] = time.perf_counter() - started
+        return result
+
+    def run(self):
+        self.results = [self.measure() for _ in range(self.runs)]
+        seconds = sorted(result['seconds'] for result in self.results)
+        median = seconds[len(seconds) // 2]
+        loaded = sorted({name for result in self.results for name in result['loaded']})
+        print(f"import {self.module}: median={median:.3f}s, min={seconds[0]:.3f}s, max={seconds[-1]:.3f}s "
+              f"(budget {self.budget:.1f}s)")
+        if loaded:
+            print(f"Eagerly imported: {loaded}")
+        return median <= self.budget and not loaded
+
+
+if __name__ == "__main__":
+    benchmark = ImportBenchmark()
+    assert benchmark.run(), "trader import exceeded the startup budget"
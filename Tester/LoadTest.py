@@ -0,0 +1,92 @@
+import time
+import pandas as pd
+from ApiAccess.ApiAccess import ClientManager
+from ApiAccess.FakeAlpaca import FakeMarket
+from Common.Clock import VirtualClock
+from Common.Logger import Logger
+from Status.Status import AccountLive
+from Trader.Managers import OrderManager
+from Trader.TraderLive import TraderLive
+
+
+class LiveLoadTest:
+    """Runs TraderLive cycles against a FakeMarket while growing the symbol universe.
+
+    Each step initializes a fresh TraderLive on `num_symbols` synthetic symbols, runs
+    `minutes` consecutive live cycles and records their wall-clock duration. The test stops
+    at the first universe size whose slowest cycle misses the minute deadline.
+    """
+
+    def __init__(self, session_start='2024-11-04 10:00:00', minutes=3, deadline=55.0,
+                 latency=0.05, latency_jitter=0.02, error_rate=0.0, rate_limit=None):
+        self.clock = VirtualClock(session_start, speed=None)
+        self.minutes = minutes
+        self.deadline = deadline
+        self.market = FakeMarket(latency=latency, latency_jitter=latency_jitter, error_rate=error_rate,
+                                 rate_limit=rate_limit,
+                                 now=self.clock.now)
+        ClientManager.use_fake_market(self.market)
+        self.results = []
+
+    @staticmethod
+    def synthetic_symbols(num_symbols):
+        return [f"SYN{i:05d}" for i in range(num_symbols)]
+
+    def run_universe(self, num_symbols):
+        symbols = self.synthetic_symbols(num_symbols)
+        self.market.symbols = symbols
+        self.market.reset_stats()
+        start = self.clock.now('America/New_York')
+
+        trader = TraderLive(clock=self.clock, journal=False)
+        time_manager = trader.time_manager
+        time_manager.set_period(start.tz_localize(None), (start + pd.Timedelta(minutes=self.minutes + 1)).tz_localize(None))
+        time_manager.sync_current()
+
+        init_started = time.perf_counter()
+        trader.data_manager.fetch_history(symbols, time_manager.current, time_manager.timezone)
+        init_seconds = time.perf_counter() - init_started
+        trader.symbol_manager.update(list(trader.data_manager.history.keys()))
+
+        trader.logger = Logger("loadtest_live_trader.csv")
+        trader.account = AccountLive("loadtest_live_account.csv", time_manager)
+        trader.order_manager = OrderManager(live=True, one_time_invest_ratio=0.05, max_buy_per_min=2,
+                                            max_ratio_per_asset=0.10, logfile="loadtest_live_order.csv",
+                                            time_manager=time_manager)
+        trader.strategy_manager.initialize_strategies(trader.symbol_manager.symbols)
+
+        cycles = []
+        for minute in range(self.minutes):
+            # 각 분의 :05 시점으로 이동 (TraderLive.run의 스케줄과 동일)
+            self.clock.set(start.floor('min') + pd.Timedelta(minutes=minute + 1, seconds=5))
+            cycle_started = time.perf_counter()
+            trader._live_trade()
+            cycles.append(time.perf_counter() - cycle_started)
+        trader.data_manager.close()
+
+        result = dict(num_symbols=num_symbols, init_seconds=init_seconds,
+                      mean_cycle=sum(cycles) / len(cycles), max_cycle=max(cycles),
+                      api_calls=sum(stat['calls'] for stat in self.market.stats.values()),
+                      api_errors=sum(stat['errors'] + stat['rate_limited'] for stat in self.market.stats.values()))
+        self.results.append(result)
+        return result
+
+    def run(self, sizes=(25, 50, 100, 200, 400, 800, 1600, 3200)):
+        """Scale the universe until the slowest cycle exceeds the deadline; return the breaking size."""
+        for num_symbols in sizes:
+            result = self.run_universe(num_symbols)
+            print(f"symbols={result['num_symbols']}, init={result['init_seconds']:.2f}s, "
+                  f"mean_cycle={result['mean_cycle']:.2f}s, max_cycle={result['max_cycle']:.2f}s, "
+                  f"calls={result['api_calls']}, errors={result['api_errors']}")
+            if result['max_cycle'] > self.deadline:
+                print(f"Deadline {self.deadline}s missed at {num_symbols} symbols")
+                return num_symbols
+        print(f"Deadline {self.deadline}s held up to {sizes[-1]} symbols")
+        return None
+
+
+if __name__ == "__main__":
+    load_test = LiveLoadTest()
+    load_test.run()
+    print(pd.DataFrame(load_test.results))
+    Logger.close_all()
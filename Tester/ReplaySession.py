@@ -0,0 +1,49 @@
+import os
+import time
+from ApiAccess.ApiAccess import ClientManager
+from ApiAccess.FakeAlpaca import FakeMarket
+from Common.Clock import VirtualClock
+from Common.Logger import Logger
+from Trader.Managers import SymbolManager
+from Trader.TraderLive import TraderLive
+
+
+class RecordedSymbolManager(SymbolManager):
+    """Uses the symbols of the recording instead of running EquityFilter."""
+
+    def __init__(self, symbols):
+        super().__init__(max_symbols=-1)
+        self.symbols = list(symbols)
+
+    def initialize_symbols(self, start_timestamp):
+        return self.symbols
+
+
+def replay(recording_dir, start, end, speed=100.0, data_mode='rest', file_name="trader_replay_maengja"):
+    """Drive the unmodified TraderLive.run over a recorded session on a virtual clock.
+
+    The recording must hold minute bars from the start of the history warm-up window, since
+    hour bars are aggregated from it. `speed=None` steps the clock only through the trader's
+    own sleeps, i.e. as fast as the code can run. `data_mode='stream'` feeds minute bars
+    through the fake bar stream. Returns the wall-clock seconds it took.
+    """
+    clock = VirtualClock(start, speed=speed)
+    market = FakeMarket.from_recording(recording_dir, now=clock.now)
+    ClientManager.use_fake_market(market)
+
+    trader = TraderLive(clock=clock, data_mode=data_mode, journal=False)
+    trader.symbol_manager = RecordedSymbolManager(market.symbols)
+
+    started = time.perf_counter()
+    trader.run(start, end, file_name)
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {start} ~ {end} in {elapsed:.1f}s (speed={speed})")
+    for endpoint, stat in market.stats.items():
+        print(f"{endpoint}: calls={stat['calls']}, errors={stat['errors']}, seconds={stat['seconds']:.2f}")
+    return elapsed
+
+
+if __name__ == "__main__":
+    recording = os.path.join(os.environ.get('D4'), 'Data/Recording/2024-11-04')
+    replay(recording, '2024-11-04 09:30:00', '2024-11-04 16:00:00', speed=100.0)
+    Logger.close_all()
@@ -1,67 +1,119 @@
+import threading
+import numpy as np
 import pandas as pd
 import pytz
 from alpaca.data.timeframe import TimeFrame
 
 from Common.Common import DataFrameUtils
+from Common.Clock import WallClock, SessionTime, MINUTE_NS
+from Common.Calendar import SessionCalendar
+from ApiAccess.ApiAccess import ClientManager
+from ApiAccess.RateLimiter import Priority, request_priority
 from Fetch.Fetch import Fetcher
+from Fetch.AsyncFetch import BarRequest, LatestBarRequest
+from Fetch.Planner import BarRequestPlanner
+from Fetch.Pyramid import BarPyramid
+from Fetch.Store import BarStore
+from Fetch.Stream import BarStreamer
 from Order.Order import BuyerLocal, BuyerLive, SellerLocal, SellerLive
 from Status.Status import AccountLocal, AccountLive, OrderList
 from Strategy.Maengja import Maengja
+from Strategy.Gate import TriggerGate
+from Strategy.Indicators import IndicatorStore
+from Strategy.Prophecy import ProphecyBuffer
 from Strategy.SymbolFilter import EquityFilter
-import pandas_market_calendars as Calender
+from Strategy.Universe import UniverseTable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from Common.Logger import Logger
 from itertools import islice
+from collections import Counter
 
 
 class TimeManager:
+    """Session time of the trader.
 
-    def __init__(self, timezone='America/New_York'):
+    The engine runs on `current_ns` (int64 epoch ns) with the precomputed `session_day` and
+    `minute_of_day` fields; `current` converts it to a timezone-aware timestamp for logging
+    and for callers at the API boundary.
+    """
+
+    def __init__(self, timezone='America/New_York', clock=None):
         self.timezone = pytz.timezone(timezone)
+        self.clock = clock or WallClock()
+        self.session = SessionTime(timezone)
         self.start = None
-        self.current = None
         self.end = None
-        self.open_dates = None
+        self.end_ns = None
+        self.current_ns = None
+        self.session_day = None
+        self.minute_of_day = None
+        self._current = None
+        self.open_days = None
         self.open_time = (9, 31)
         self.close_time = (15, 59)
+        self.open_minute = self.open_time[0] * 60 + self.open_time[1]
+        self.close_minute = self.close_time[0] * 60 + self.close_time[1]
+
+    @property
+    def current(self):
+        if self.current_ns is None:
+            return None
+        if self._current is None or self._current.value != self.current_ns:
+            self._current = self.session.to_timestamp(self.current_ns)
+        return self._current
+
+    @current.setter
+    def current(self, timestamp):
+        self._set_current_ns(pd.Timestamp(timestamp).value)
+
+    def _set_current_ns(self, ns):
+        self.current_ns = ns
+        self.session_day = self.session.session_day(ns)
+        self.minute_of_day = self.session.minute_of_day(ns)
 
     def set_period(self, start, end):
         self.start = pd.Timestamp(start, tz=self.timezone).replace(microsecond=0)
-        self.current = pd.Timestamp(start, tz=self.timezone).replace(microsecond=0)
+        self.current = self.start
         self.end = pd.Timestamp(end, tz=self.timezone).replace(microsecond=0)
+        self.end_ns = self.end.value
 
     def advance_current(self, minutes=1):
-        self.current += pd.Timedelta(minutes=minutes)
+        self._set_current_ns(self.current_ns + minutes * MINUTE_NS)
 
     def sync_current(self):
-        self.current = pd.Timestamp.now(tz=self.timezone).replace(microsecond=0)
+        ns = self.clock.now(tz=self.timezone).value
+        self._set_current_ns(ns - ns % 10 ** 9)
 
     def before_end(self):
-        return self.current <= self.end
+        return self.current_ns <= self.end_ns
 
     def initialize_open_dates(self):
-        nyse = Calender.get_calendar('NYSE')
-        valid_days = nyse.valid_days(start_date=self.start, end_date=self.end,
-                                     tz=self.timezone)
-        self.open_dates = [day.date() for day in valid_days]
+        self.open_days = SessionCalendar().open_days(self.start, self.end)
 
     def is_market_open(self):
-        if not self.open_dates:
+        if not self.open_days:
             self.initialize_open_dates()
-        current_time = (self.current.hour, self.current.minute)
-        return self.current.date() in self.open_dates and self.open_time <= current_time <= self.close_time
+        return self.session_day in self.open_days and self.open_minute <= self.minute_of_day <= self.close_minute
 
 class SymbolManager:
 
-    def __init__(self, max_symbols=50, asset_filter_num=250, russel_filter_num=250, renew_symbol=False, max_workers=1):
+    def __init__(self, max_symbols=50, asset_filter_num=250, russel_filter_num=250, renew_symbol=False, max_workers=1, universe=None):
         self.symbols = []
         self.max_symbols = max_symbols
         self.asset_filter_num = asset_filter_num
         self.russel_filter_num = russel_filter_num
         self.renew_symbol = renew_symbol
         self.max_workers = max_workers
+        self.universe = universe if universe is not None else UniverseTable.load()
 
     def initialize_symbols(self, start_timestamp):
+        # 미리 계산된 universe 표가 해당 날짜를 포함하면 EquityFilter 없이 바로 선택
+        if self.universe is not None and self.universe.covers(start_timestamp, self.asset_filter_num, self.russel_filter_num):
+            self.symbols = self.universe.symbols_at(start_timestamp)[:self.max_symbols]
+            return self.symbols
+        if self.universe is not None:
+            print(f"Universe table ends {self.universe.ranks.index[-1].date() if not self.universe.ranks.empty else None}, "
+                  f"falling back to EquityFilter for {start_timestamp}")
         self.symbols = EquityFilter(renew=self.renew_symbol, asset_filter_num=self.asset_filter_num, russel_filter_num=self.russel_filter_num, start_timestamp=start_timestamp, max_workers=self.max_workers).filter_symbols()[:self.max_symbols]
         return self.symbols
 
@@ -70,37 +122,129 @@ class SymbolManager:
 
 class DataManager:
 
-    def __init__(self, history_param):
-        self.fetcher = Fetcher()
+    # price_dtype=np.float32로 저장할 가격 열 (거래량/거래대금은 누적되므로 float64 유지)
+    PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'vwap']
+
+    def __init__(self, history_param, max_concurrency=16, store=None, price_dtype=None, tolerance=1e-5, persist=False):
+        self.fetcher = Fetcher(max_concurrency=max_concurrency)
+        self.store = store or BarStore()
+        # persist=True: 라이브 전용. 과거 시점으로 도는 백테스트가 저장소 coverage를 건드리지 않도록
+        self.persist = persist
+        self.planner = BarRequestPlanner()
         self.history_param = history_param
         self.history = {}
         self.recent = {}
         self.optimize_timing = None
+        self.price_dtype = np.dtype(price_dtype) if price_dtype is not None else None
+        self.tolerance = tolerance
+        self.precision_fallbacks = set()
+        self.pyramid = None
+        # bar_window > 1: 에포크 기준 n시간 버킷 (이전의 최신 봉부터 n행씩 묶던 merge_to_a_single_bar와 경계가 다름)
+        bar_window = history_param['bar_window']
+        self.history_level = '1h' if bar_window == 1 else f'{bar_window}h'
 
     def fetch_history(self, symbols, current, timezone):
-        self.history = self.fetcher.get_stock_history(
-            symbols=symbols,
-            start=current - pd.Timedelta(hours=self.history_param['period']),
-            end=current,
-            timezone=timezone,
-            time_frame=TimeFrame.Hour,
-            bar_window=self.history_param['bar_window'],
-            min_num_bars=self.history_param['min_num_bars'],
-            local_data=False
-        )
-        return self.history
+        """Load stored hour bars and fetch only the missing tail and holes of the history window."""
+        start = current - pd.Timedelta(hours=self.history_param['period'])
+        complete_until = current.floor('h')  # 진행 중인 마지막 bar는 다음 실행 때 다시 받음
+        persist = self.persist and ClientManager.fake_market is None  # FakeMarket 데이터는 저장하지 않음
+        stored = {symbol: self.store.load(symbol) if persist else (None, []) for symbol in symbols}
+        gaps = {symbol: self.store.missing(coverage, start, current, seam=pd.Timedelta(hours=1)) for symbol, (_, coverage) in stored.items()}
+        fetched, failed = self.fetcher.get_stock_history_gaps(gaps, TimeFrame.Hour, self.planner)
+
+        # 분할 조정 등으로 저장된 가격이 달라졌으면 해당 종목은 전체 구간을 다시 받음
+        stale = [symbol for symbol in symbols if self.store.is_stale(*stored[symbol], fetched.get(symbol))]
+        if stale:
+            for symbol in stale:
+                print(f"Stored history of {symbol} no longer matches the API, refetching")
+                self.store.drop(symbol)
+                stored[symbol] = (None, [])
+                fetched.pop(symbol, None)
+            refetched, refailed = self.fetcher.get_stock_history_gaps({symbol: [(start, current)] for symbol in stale}, TimeFrame.Hour, self.planner)
+            fetched.update(refetched)
+            failed.update(refailed)
+            gaps.update({symbol: [(start, current)] for symbol in stale})
+
+        history = {}
+        for symbol in symbols:
+            bars, coverage = stored[symbol]
+            merged = self.fetcher.processor.merge_into({symbol: bars} if bars is not None else {}, {symbol: fetched[symbol]} if symbol in fetched else {})
+            for gap_start, gap_end in gaps[symbol]:
+                if (symbol, gap_start) not in failed:
+                    coverage = self.store.add_coverage(coverage, gap_start, min(gap_end, complete_until))
+            if symbol not in merged:
+                continue
+            if persist:
+                self.store.save(symbol, merged[symbol], coverage)
+            bars = merged[symbol]
+            history[symbol] = bars[(bars.index >= start) & (bars.index <= current)].copy()
+
+        self.build_pyramid(history)
+        if self.history_param['bar_window'] > 1:
+            history = {symbol: self.pyramid.frame(symbol, self.history_level) for symbol in history}
+        max_num_bars = self.history_param.get('max_num_bars')
+        if max_num_bars:
+            # 전략이 필요로 하는 만큼만 보관 (새 시간봉이 추가될 때 가장 오래된 봉이 빠짐)
+            history = {k: v.iloc[-max_num_bars:].copy() for k, v in history.items()}
+        history = self.fetcher.processor.remove_symbols_with_small_num_bars(history, self.history_param['min_num_bars'])
+
+        # 요청한 종목만으로 다시 구성 (universe에서 빠진 종목의 이전 frame을 남기지 않음)
+        self.history = {}
+        self.precision_fallbacks = set()
+        for symbol in symbols:
+            if symbol in history and not history[symbol].empty:
+                self.history[symbol] = self._compact_prices(symbol, history[symbol])
+                print(f"Successful data fetching frm {symbol}")
+            else:
+                print(f"Warning: No data returned for symbol {symbol}")
+        return self.history.keys()
+
+    def close(self):
+        """Stop the fetcher's event-loop thread and worker pool."""
+        self.fetcher.close()
+
+    def build_pyramid(self, hour_bars):
+        """Seed the bar pyramid (1m/5m/15m/1h/1d and the history resolution) from hour bars."""
+        levels = dict(BarPyramid.LEVELS)
+        levels[self.history_level] = 60 * self.history_param['bar_window']
+        size = self.history_param.get('max_num_bars') or max((len(bars) for bars in hour_bars.values()), default=1)
+        capacity = {'1h': max(BarPyramid.CAPACITY['1h'], size), self.history_level: size}
+        self.pyramid = BarPyramid(hour_bars.keys(), levels=levels, capacity=capacity)
+        self.pyramid.seed(hour_bars, source=60)
+
+    def bars(self, symbol, level):
+        """Bars of `symbol` at any pyramid level ('1m', '5m', '15m', '1h', '1d'), without refetching."""
+        return self.pyramid.frame(symbol, level)
+
+    def bars_ready(self, symbols, minute, probe_size=3):
+        """Whether the bar of the minute ending at `minute` is already served, probing a few symbols."""
+        probe = list(symbols)[:probe_size]
+        if not probe:
+            return True
+        bar_time = minute - pd.Timedelta(minutes=1)
+        with request_priority(Priority.RECENT_BARS):
+            recent = self.fetcher.get_stock_history(
+                symbols=probe,
+                start=bar_time,
+                end=minute,
+                time_frame=TimeFrame.Minute,
+                min_num_bars=1,
+                local_data=False
+            )
+        return any(df.index[-1] >= bar_time for df in recent.values())
 
     def update_recent_data(self, symbols, current, timezone):
-        self.recent = self.fetcher.get_stock_history(
-            symbols=symbols,
-            start=current - pd.Timedelta(minutes=1),
-            end=current,
-            timezone=timezone,
-            time_frame=TimeFrame.Minute,
-            bar_window=self.history_param['bar_window'],
-            min_num_bars=1,
-            local_data=False
-        )
+        with request_priority(Priority.RECENT_BARS):
+            self.recent = self.fetcher.get_stock_history(
+                symbols=symbols,
+                start=current - pd.Timedelta(minutes=1),
+                end=current,
+                timezone=timezone,
+                time_frame=TimeFrame.Minute,
+                bar_window=self.history_param['bar_window'],
+                min_num_bars=1,
+                local_data=False
+            )
         if not self.recent:
             return self.recent
 
@@ -116,58 +260,55 @@ class DataManager:
         return self.recent
 
     def merge_recent_data_into_hourly(self):
-        if not self.recent:
+        """Roll the new minute bars into the pyramid and mirror its history-level bars into the history frames."""
+        if not self.recent or self.pyramid is None:
             return
-        for symbol in self.recent:
-            hbar_time = self.history[symbol].index[-1] if symbol in self.history else None
-            mbar_time = self.recent[symbol].index[-1]
-            if hbar_time is None or mbar_time > hbar_time:
-                if self._needs_new_hour_bar(hbar_time, mbar_time):
-                    self._create_new_hour_bar(symbol)
-                else:
-                    self._update_existing_hour_bar(symbol)
-
-    @staticmethod
-    def _needs_new_hour_bar(hbar_time, mbar_time):
-        if hbar_time is None:
-            return True
-        return mbar_time.date() > hbar_time.date() or mbar_time.hour > hbar_time.hour
-
-    def _create_new_hour_bar(self, symbol):
-        new_row = self.recent[symbol].iloc[[-1]]
-        if symbol in self.history:
-            # 기존 데이터프레임이 있을 경우 오래된 데이터 삭제
-            self.history[symbol].drop(self.history[symbol].index[:1], inplace=True)
-        else:
-            # 빈 데이터프레임 생성 시 new_row와 동일한 열 구조로 초기화
-            self.history[symbol] = pd.DataFrame(columns=new_row.columns)
-
-        # 데이터 추가
-        for index, row in new_row.iterrows():
-            self.history[symbol].loc[index] = row
-            pass
-
-        # 인덱스 정렬
-        self.history[symbol].sort_index(inplace=True)
-
-
-    def _update_existing_hour_bar(self, symbol):
-        new_row = self.recent[symbol].iloc[[-1]]
-        last_index = self.history[symbol].index[-1]
-
-        self.history[symbol].loc[last_index, 'high'] = max(self.history[symbol].loc[last_index, 'high'], new_row['high'].iloc[-1])
-        self.history[symbol].loc[last_index, 'low'] = min(self.history[symbol].loc[last_index, 'low'], new_row['low'].iloc[-1])
-        self.history[symbol].loc[last_index, 'close'] = new_row['close'].iloc[-1]
-        self.history[symbol].loc[last_index, 'volume'] += new_row['volume'].iloc[-1]
-        self.history[symbol].loc[last_index, 'trade_count'] += new_row['trade_count'].iloc[-1]
-        self.history[symbol].loc[last_index, 'trading_value'] += new_row['trading_value'].iloc[-1]
-
-        if self.history[symbol].loc[last_index, 'volume'] > 0:
-            self.history[symbol].loc[last_index, 'vwap'] = (
-                self.history[symbol].loc[last_index, 'trading_value'] / self.history[symbol].loc[last_index, 'volume']
-            )
-        else:
-            self.history[symbol].loc[last_index, 'vwap'] = 0
+        symbols = [symbol for symbol in self.recent if symbol in self.pyramid and symbol in self.history]
+        if not symbols:
+            return
+        times = [self.recent[symbol].index.asi8[-1] for symbol in symbols]
+        values = [self.recent[symbol].reindex(columns=BarPyramid.FIELDS).to_numpy(dtype=np.float64)[-1] for symbol in symbols]
+        pushed, opened = self.pyramid.push(symbols, times, values)
+        for symbol, new in zip(pushed, opened[self.history_level]):
+            bar_time, bar = self.pyramid.last(symbol, self.history_level)
+            if new:
+                self._create_new_hour_bar(symbol, bar_time, bar)
+            else:
+                self._update_existing_hour_bar(symbol, bar)
+
+    def _create_new_hour_bar(self, symbol, bar_time, bar):
+        # 가장 오래된 봉을 빼고 새 봉 추가 (봉 개수 유지)
+        history = self.history[symbol]
+        history.drop(history.index[:1], inplace=True)
+        history.loc[pd.Timestamp(bar_time, tz='UTC')] = pd.Series(bar, index=BarPyramid.FIELDS)
+        if self.price_dtype is not None:
+            # 행 추가로 float64로 올라간 가격 열을 다시 압축
+            self.history[symbol] = self._compact_prices(symbol, history)
+
+    def _update_existing_hour_bar(self, symbol, bar):
+        history = self.history[symbol]
+        last_index = history.index[-1]
+        dtypes = history.dtypes
+        # 열 dtype으로 맞춰 넣어 float32 열이 float64로 올라가지 않게 함
+        for field, value in zip(BarPyramid.FIELDS, bar):
+            if field in dtypes:
+                history.loc[last_index, field] = dtypes[field].type(value)
+
+    def _compact_prices(self, symbol, bars):
+        """Cast the price columns of `bars` to `price_dtype` if the round trip stays within `tolerance`."""
+        if self.price_dtype is None or symbol in self.precision_fallbacks:
+            return bars
+        columns = [column for column in self.PRICE_COLUMNS if column in bars.columns and bars[column].dtype != self.price_dtype]
+        if not columns:
+            return bars
+        values = bars[columns].to_numpy(dtype=np.float64)
+        compact = values.astype(self.price_dtype)
+        if not IndicatorStore.precision_ok(values, compact, self.tolerance):
+            # 정밀도가 부족한 종목은 float64로 유지
+            self.precision_fallbacks.add(symbol)
+            print(f"Prices of {symbol} exceed the {self.price_dtype} tolerance, keeping float64")
+            return bars
+        return bars.astype({column: self.price_dtype for column in columns})
 
     def _optimize_dataframes(self):
         """
@@ -176,49 +317,46 @@ class DataManager:
         for symbol in self.history:
             if not self.history[symbol].empty:
                 # DataFrame 복사로 메모리 최적화
-                self.history[symbol] = self.history[symbol].copy()
+                self.history[symbol] = self._compact_prices(symbol, self.history[symbol].copy())
 
                 # 필요 시 인덱스 재설정
                 #self.history[symbol].reset_index(drop=False, inplace=True)
 
-class DataManagerFast(DataManager):
-
-    def __init__(self, history_param, max_workers):
-        super().__init__(history_param)
-        self.max_workers = max_workers  # 병렬 처리에 사용할 최대 스레드 수
+    def memory_report(self, indicators=None, budget_symbols=5000):
+        """Resident bytes of the history frames and indicators, and their projection to `budget_symbols`."""
+        symbols = len(self.history)
+        history_bytes = int(sum(bars.memory_usage(index=True, deep=True).sum() for bars in self.history.values()))
+        indicator_bytes = indicators.memory_bytes() if indicators is not None else 0
+        pyramid_bytes = self.pyramid.memory_bytes() if self.pyramid is not None else 0
+        per_symbol = (history_bytes + indicator_bytes + pyramid_bytes) / symbols if symbols else 0.0
+        return dict(symbols=symbols, history_mb=history_bytes / 2 ** 20, indicator_mb=indicator_bytes / 2 ** 20,
+                    pyramid_mb=pyramid_bytes / 2 ** 20,
+                    per_symbol_kb=per_symbol / 2 ** 10, budget_symbols=budget_symbols,
+                    budget_mb=per_symbol * budget_symbols / 2 ** 20,
+                    price_fallbacks=len(self.precision_fallbacks),
+                    indicator_fallbacks=indicators.fallbacks if indicators is not None else 0)
 
-    def fetch_history(self, symbols, current, timezone):
-        def fetch_symbol_history(symbol):
-            return symbol, self.fetcher.get_stock_history(
-                symbols=[symbol],
-                start=current - pd.Timedelta(hours=self.history_param['period']),
-                end=current,
-                timezone=timezone,
-                time_frame=TimeFrame.Hour,
-                bar_window=self.history_param['bar_window'],
-                min_num_bars=self.history_param['min_num_bars'],
-                local_data=False
-            )
+class DataManagerFast(DataManager):
 
-        # 병렬 실행
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_symbol = {executor.submit(fetch_symbol_history, symbol): symbol for symbol in symbols}
-
-            for future in as_completed(future_to_symbol):
-                symbol = future_to_symbol[future]
-                try:
-                    symbol, data_symbol = future.result()
-                    data = data_symbol[symbol]
-                    if data is not None and not data.empty:
-                        self.history[symbol] = data
-                        print(f"Successful data fetching frm {symbol}")
-                    else:
-                        print(f"Warning: No data returned for symbol {symbol}")
-                except Exception as e:
-                    print(f"Error fetching data for symbol {symbol}: {e}")
-        return self.history.keys()
+    def __init__(self, history_param, max_workers, price_dtype=None, fetch_budget=20.0, hedge=True, retries=2,
+                 latest=False, latest_chunk=1000, persist=False):
+        super().__init__(history_param, max_concurrency=max_workers, price_dtype=price_dtype, persist=persist)
+        self.max_workers = max_workers  # 병렬 처리에 사용할 최대 동시 요청 수
+        # latest=True: 라이브 전용. 현재 시각의 최신 봉을 받으므로 과거 시점 재현에는 쓰지 않음
+        self.latest = latest
+        self.latest_chunk = latest_chunk  # 심볼 목록이 URL에 들어가므로 요청당 심볼 수 제한
+        self.fetch_budget = fetch_budget  # 분 사이클 중 최근 봉 조회에 쓰는 시간 (초)
+        self.hedge = hedge
+        self.retries = retries
+        self.missed = []
+        self.missed_counts = Counter()
 
     def update_recent_data(self, symbols, current, timezone):
+        self.recent = self.fetch_recent_data(symbols, current, timezone)
+        return self.apply_recent_data(current)
+
+    def fetch_recent_data(self, symbols, current, timezone):
+        """Fetch the latest minute bars of `symbols` over REST, in parallel chunks (latest-bar calls with `latest`)."""
         def chunk_symbols(symbols, chunk_size):
             """Helper function to split symbols into chunks of size `chunk_size`."""
             iterator = iter(symbols)
@@ -228,38 +366,41 @@ class DataManagerFast(DataManager):
                     break
                 yield chunk
 
-        def update_recent_symbols_data(symbols_chunk):
-            """Fetch data for a chunk of symbols."""
-            return self.fetcher.get_stock_history(
-                symbols=symbols_chunk,
-                start=current - pd.Timedelta(minutes=1),
-                end=current,
-                timezone=timezone,
-                time_frame=TimeFrame.Minute,
+        # 비동기 병렬 실행
+        if self.latest:
+            # 종목별 최신 봉만 필요하므로 latest bar 엔드포인트로 최소 호출
+            requests = [LatestBarRequest(chunk, current - pd.Timedelta(minutes=1), current)
+                        for chunk in chunk_symbols(symbols, self.latest_chunk)]
+        else:
+            chunk_size = max(1, len(symbols) // self.max_workers)
+            requests = [BarRequest(chunk, current - pd.Timedelta(minutes=1), current, TimeFrame.Minute)
+                        for chunk in chunk_symbols(symbols, chunk_size)]
+        # 요청별 제한시간과 전체 기한 모두 분 사이클 예산에서 결정
+        with request_priority(Priority.RECENT_BARS):
+            recent, errors = self.fetcher.get_stock_history_many(
+                requests,
                 bar_window=self.history_param['bar_window'],
                 min_num_bars=1,
-                local_data=False
+                timeout=self.fetch_budget,
+                deadline=self.fetch_budget,
+                hedge=self.hedge,
+                retries=self.retries
             )
-
-        # 병렬 실행
-        recent = {}
-        chunk_size = max(1, len(symbols) // self.max_workers)
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_chunk = {executor.submit(update_recent_symbols_data, chunk): chunk for chunk in chunk_symbols(symbols, chunk_size)}
-
-            for future in as_completed(future_to_chunk):
-                symbols_chunk = future_to_chunk[future]
-                try:
-                    data_chunk = future.result()
-                    for symbol in symbols_chunk:
-                        data = data_chunk.get(symbol)
-                        if data is not None and not data.empty:
-                            recent[symbol] = data
-                except Exception as e:
-                    print(f"Error fetching data for chunk {symbols_chunk}: {e}")
-
-        self.recent = recent
-
+        self.missed = [symbol for request, _ in errors for symbol in request.symbols]
+        self.missed_counts.update(self.missed)
+        if errors:
+            reasons = Counter(type(e).__name__ for _, e in errors)
+            print(f"{len(self.missed)} symbols missed the {current} cycle "
+                  f"({len(errors)}/{len(requests)} requests failed: {dict(reasons)}): {self.missed}")
+        return recent
+
+    def fetch_summary(self):
+        async_fetcher = self.fetcher.async_fetcher
+        return dict(async_fetcher.stats, p95_seconds=async_fetcher.p95(),
+                    most_missed=self.missed_counts.most_common(5))
+
+    def apply_recent_data(self, current):
+        """Merge `self.recent` into the hourly history."""
         if not self.recent:
             return self.recent
 
@@ -275,64 +416,106 @@ class DataManagerFast(DataManager):
         return self.recent
 
 
+class DataManagerStream(DataManagerFast):
+    """Live data mode fed by the minute-bar websocket, with REST backfill for symbols the stream missed."""
+
+    def __init__(self, history_param, max_workers, streamer=None, ready_fraction=0.95, price_dtype=None, latest=False,
+                 persist=False):
+        super().__init__(history_param, max_workers, price_dtype=price_dtype, latest=latest, persist=persist)
+        self.streamer = streamer or BarStreamer()
+        self.ready_fraction = ready_fraction
+        self.backfilled = []
+
+    def start_stream(self, symbols):
+        self.streamer.start(symbols)
+
+    def stop_stream(self):
+        self.streamer.stop()
+
+    def bars_ready(self, symbols, minute, probe_size=3):
+        return self.streamer.is_minute_complete(symbols, minute, self.ready_fraction)
+
+    def update_recent_data(self, symbols, current, timezone):
+        recent = self.streamer.recent(symbols, current)
+        self.backfilled = [symbol for symbol in symbols if symbol not in recent]
+        if self.backfilled:
+            recent.update(self.fetch_recent_data(self.backfilled, current, timezone))
+        self.recent = recent
+        return self.apply_recent_data(current)
+
+
 class StrategyManager:
 
-    def __init__(self):
+    def __init__(self, indicator_dtype=np.float64):
         self.sages = {}
-        self.prophecy = pd.DataFrame()
+        self.buffer = ProphecyBuffer([])
+        self.indicators = IndicatorStore(dtype=indicator_dtype)
+        self.prophecy = self.buffer.table()
 
     def initialize_strategies(self, symbols):
-        self.sages = {symbol: Maengja(symbol) for symbol in symbols}
+        self.buffer = ProphecyBuffer(symbols)
+        self.sages = {symbol: Maengja(symbol, self.buffer.note(symbol), self.indicators) for symbol in symbols}
 
     def evaluate(self, history, recent):
-        self.prophecy = pd.DataFrame()
+        self.buffer.begin_minute()
         for symbol in recent.keys():
             if symbol not in history:
                 continue
-            note = self.sages[symbol].update(history[symbol], recent[symbol])
-            recent_note = {key: [note[key][-1]] for key in note}
-            self.prophecy = pd.concat([self.prophecy, pd.DataFrame(recent_note)], ignore_index=True)
+            self.sages[symbol].update(history[symbol], recent[symbol])
+            self.buffer.mark_written(symbol)
+        self.prophecy = self.buffer.table()
         return self.prophecy
 
 
 class StrategyManagerFast:
 
-    def __init__(self):
+    def __init__(self, gated=False, indicator_dtype=np.float64):
         self.sages = {}
-        self.prophecy = pd.DataFrame()
+        self.buffer = ProphecyBuffer([])
+        self.indicators = IndicatorStore(dtype=indicator_dtype)
+        self.prophecy = self.buffer.table()
         self.max_workers = 30
+        self.gate = TriggerGate() if gated else None
 
     def initialize_strategies(self, symbols):
-        self.sages = {symbol: Maengja(symbol) for symbol in symbols}
+        self.buffer = ProphecyBuffer(symbols)
+        self.sages = {symbol: Maengja(symbol, self.buffer.note(symbol), self.indicators) for symbol in symbols}
 
-    def evaluate(self, history, recent):
-        self.prophecy = pd.DataFrame()
-        max_threads = min(self.max_workers, len(recent))  # 심볼의 수보다 많으면 len(recent)로 조정
+    def evaluate(self, history, recent, exempt=()):
+        """Evaluate the minute; `exempt` symbols (held, open orders) are never skipped by the gate."""
+        self.buffer.begin_minute()
         recent_symbols = recent.keys()
         hist_symbols = []
         for sym in recent_symbols:
-            if sym not in history:
+            if sym not in history or sym not in self.sages:
                 continue
             hist_symbols.append(sym)
-        with ThreadPoolExecutor(max_threads) as executor:
-            futures = {
-                executor.submit(self._evaluate_symbol, symbol, history, recent): symbol
-                for symbol in hist_symbols
-            }
-            for future in as_completed(futures):
-                symbol = futures[future]
-                try:
-                    result = future.result()
-                    self.prophecy = pd.concat([self.prophecy, result], ignore_index=True)
-                except Exception as e:
-                    print(f"Error evaluating symbol {symbol}: {e}")
+        if self.gate is not None:
+            # 가격이 트리거 밴드 안에 머무는 종목은 평가 생략
+            hist_symbols = self.gate.select(hist_symbols, self.sages, history, recent, exempt)
+        if hist_symbols:
+            max_threads = min(self.max_workers, len(hist_symbols))  # 심볼의 수보다 많으면 len(hist_symbols)로 조정
+            with ThreadPoolExecutor(max_threads) as executor:
+                futures = {
+                    executor.submit(self._evaluate_symbol, symbol, history, recent): symbol
+                    for symbol in hist_symbols
+                }
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error evaluating symbol {symbol}: {e}")
+        # 각 종목이 자기 슬롯에 기록한 결과로 이번 분의 prophecy를 한 번에 구성
+        self.prophecy = self.buffer.table()
         return self.prophecy
 
     def _evaluate_symbol(self, symbol, history, recent):
 
-        note = self.sages[symbol].update(history[symbol], recent[symbol])
-        recent_note = {key: [note[key][-1]] for key in note}
-        return pd.DataFrame(recent_note)
+        self.sages[symbol].update(history[symbol], recent[symbol])
+        self.buffer.mark_written(symbol)
+        if self.gate is not None:
+            self.gate.update(symbol, self.sages[symbol], history[symbol], recent[symbol])
 
 class OrderManager:
 
@@ -344,6 +527,7 @@ class OrderManager:
         self.logfile = logfile
         self.logger = Logger(self.logfile)
         self.time_manager = time_manager
+        self.lock = threading.RLock()  # StopMonitor의 즉시 매도와 분 단위 주문을 직렬화
         if live:
             self.buyer = BuyerLive(self.trade_cfg, self.logger, self.time_manager)
             self.seller = SellerLive(self.logger, self.time_manager)
@@ -356,6 +540,16 @@ class OrderManager:
             self.order_list = OrderList(live)
 
     def execute_orders(self, prophecy, prophecy_history):
+        with self.lock:
+            sell_symbols, sold_symbols = self._execute_sells(prophecy, prophecy_history)
+        if sold_symbols:
+            # 매도 체결 대기는 lock 밖에서 한 번만 (StopMonitor의 즉시 매도를 막지 않음)
+            self.seller.settle(sold_symbols, self.lock)
+        with self.lock:
+            self._execute_buys(prophecy, prophecy_history, sell_symbols)
+
+    def _execute_sells(self, prophecy, prophecy_history):
+        sell_symbols, sold_symbols = [], []
         try:
             sell_symbols = prophecy[prophecy['sell']]['symbol'].tolist()
             self.order_list.update()
@@ -363,12 +557,15 @@ class OrderManager:
                 if self.live:
                     if symbol in self.order_list.orders:
                         continue
-                sold = self.seller.sell(prophecy, symbol, self.order_list)
+                sold = self.seller.sell(prophecy, symbol, self.order_list, settle=False)
                 if sold:
+                    sold_symbols.append(symbol)
                     DataFrameUtils.append_inplace(prophecy_history, prophecy[prophecy['symbol'] == symbol])
         except Exception as e:
             print(f"Sell execution error executing orders: {e}")
+        return sell_symbols, sold_symbols
 
+    def _execute_buys(self, prophecy, prophecy_history, sell_symbols):
         try:
             buy_hubos = prophecy[prophecy['buy']]
             sorted_buy_hubos = buy_hubos.sort_values(by=['buy_strength', 'trading_value'], ascending=[False, False])
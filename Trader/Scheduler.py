@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+import pandas as pd
+
+
+@dataclass
+class CycleRecord:
+    """Timing of one scheduled minute cycle."""
+    minute: pd.Timestamp
+    mode: str
+    started: pd.Timestamp = None
+    finished: pd.Timestamp = None
+    deadline: pd.Timestamp = None
+
+    @property
+    def lateness(self):
+        return (self.started - self.minute).total_seconds() if self.started is not None else None
+
+    @property
+    def overrun(self):
+        return self.finished is not None and self.finished > self.deadline
+
+
+class MinuteScheduler:
+    """Minute-aligned scheduler with per-cycle deadlines.
+
+    Each minute boundary T starts a cycle as soon as `ready(T)` reports the bars of the
+    finished minute, or at T + `max_wait` at the latest. The cycle must finish by
+    T + `deadline`. A cycle that can only start after `degrade_after` seconds runs with
+    mode='degraded'; one that cannot start before its deadline is skipped as stale.
+    Every cycle, including skipped ones, is kept in `records`.
+    """
+
+    FULL = 'full'
+    DEGRADED = 'degraded'
+    SKIPPED = 'skipped'
+
+    def __init__(self, clock, job, ready=None, deadline=55.0, degrade_after=20.0, max_wait=5.0,
+                 poll_interval=0.25, timezone='America/New_York'):
+        self.clock = clock
+        self.job = job
+        self.ready = ready
+        self.deadline = pd.Timedelta(seconds=deadline)
+        self.degrade_after = pd.Timedelta(seconds=degrade_after)
+        self.max_wait = pd.Timedelta(seconds=max_wait)
+        self.poll_interval = poll_interval
+        self.timezone = timezone
+        self.records = []
+        self.on_record = None
+
+    def run_until(self, end):
+        end = pd.Timestamp(end)
+        end = end.tz_localize(self.timezone) if end.tz is None else end
+        minute = self.clock.now(self.timezone).floor('min') + pd.Timedelta(minutes=1)
+        while minute <= end:
+            self._sleep_until(minute)
+            self._wait_ready(minute)
+            self._run_cycle(minute)
+            minute = self._next_minute(minute)
+
+    def _run_cycle(self, minute):
+        record = CycleRecord(minute=minute, mode=self.FULL, deadline=minute + self.deadline)
+        now = self.clock.now(self.timezone)
+        if now >= record.deadline:
+            record.mode = self.SKIPPED
+            self._record(record)
+            return
+        if now - minute > self.degrade_after:
+            record.mode = self.DEGRADED
+        record.started = now
+        try:
+            self.job(record.mode)
+        except Exception as e:
+            print(f"Error occurred in cycle {minute}: {e}")
+        record.finished = self.clock.now(self.timezone)
+        if record.overrun:
+            print(f"Cycle {minute} overran its deadline by "
+                  f"{(record.finished - record.deadline).total_seconds():.1f}s")
+        self._record(record)
+
+    def _next_minute(self, minute):
+        """Next boundary to run; boundaries whose deadline already passed are recorded as skipped."""
+        minute += pd.Timedelta(minutes=1)
+        now = self.clock.now(self.timezone)
+        while now >= minute + self.deadline:
+            self._record(CycleRecord(minute=minute, mode=self.SKIPPED, deadline=minute + self.deadline))
+            minute += pd.Timedelta(minutes=1)
+        return minute
+
+    def _sleep_until(self, timestamp):
+        remaining = (timestamp - self.clock.now(self.timezone)).total_seconds()
+        if remaining > 0:
+            self.clock.sleep(remaining)
+
+    def _wait_ready(self, minute):
+        if self.ready is None:
+            self._sleep_until(minute + self.max_wait)
+            return
+        while self.clock.now(self.timezone) < minute + self.max_wait:
+            try:
+                if self.ready(minute):
+                    return
+            except Exception as e:
+                print(f"Error checking bars of {minute}: {e}")
+            self.clock.sleep(self.poll_interval)
+
+    def _record(self, record):
+        self.records.append(record)
+        if self.on_record:
+            self.on_record(record)
+
+    def summary(self):
+        ran = [r for r in self.records if r.mode != self.SKIPPED]
+        return dict(cycles=len(self.records),
+                    degraded=sum(r.mode == self.DEGRADED for r in self.records),
+                    skipped=sum(r.mode == self.SKIPPED for r in self.records),
+                    overruns=sum(r.overrun for r in ran),
+                    max_lateness=max((r.lateness for r in ran), default=0.0),
+                    max_duration=max(((r.finished - r.started).total_seconds() for r in ran), default=0.0))
@@ -1,24 +1,39 @@
 import pandas as pd
 import pytz
 from datetime import datetime, timedelta
+from ApiAccess.ApiAccess import ClientManager
 from Common.Common import Printer, r2
 from Status.Status import AccountLive
-import schedule
-import time
-from Trader.Managers import TimeManager, SymbolManager, DataManagerFast, StrategyManagerFast, OrderManager
+from Status.Journal import LiveJournal
+from Trader.Managers import TimeManager, SymbolManager, DataManagerFast, DataManagerStream, StrategyManagerFast, OrderManager
+from Trader.Scheduler import MinuteScheduler
+from Order.StopMonitor import StopMonitor
+from Strategy.Lookback import LookbackPlanner
+from Strategy.Maengja import Maengja
 from Common.Logger import Logger, search_and_export_to_excel
 
 class TraderLive:
 
-    def __init__(self):
-        self.time_manager = TimeManager()
-        self.symbol_manager = SymbolManager(max_symbols=-1, asset_filter_rate=0.05, renew_symbol=True, max_workers=12)
-        self.data_manager = DataManagerFast(history_param={'period': 2000, 'bar_window': 1, 'min_num_bars': 480}, max_workers=12)
+    def __init__(self, clock=None, data_mode='rest', tick_stops=False, journal=True, gated=False):
+        self.time_manager = TimeManager(clock=clock)
+        if ClientManager.fake_market is None:
+            # 계정 전체 호출 한도 (FakeMarket은 자체 한도를 use_fake_market에서 설정)
+            ClientManager.set_rate_limit(ClientManager.rate_limit_per_minute)
+        self.journal = LiveJournal() if journal else None
+        self.scheduler = None
+        self.data_mode = data_mode
+        self.tick_stops = tick_stops
+        self.stop_monitor = None
+        self.symbol_manager = SymbolManager(max_symbols=-1, asset_filter_num=250, russel_filter_num=250, renew_symbol=True, max_workers=12)
+        # gated=True: 트리거 밴드 안의 미보유 종목은 평가 생략 (생략된 종목은 그 분의 prophecy 행이 없음)
+        self.gated = gated
+        self.data_manager = None
+        self.strategy_manager = None
+        self._build_managers()
 
         self.logger = None
         self.account = None
         self.order_manager = None
-        self.strategy_manager = StrategyManagerFast()
         self.prophecy_history = pd.DataFrame()
 
         self.prophecy_log_file = None
@@ -26,34 +41,86 @@ class TraderLive:
         self.order_log_file = None
         self.account_log_file = None
         self.position_log_file = None
+        self.cycle_log_file = None
+        self.cycle_logger = None
+
+    def _build_managers(self):
+        """Data and strategy managers of this process."""
+        history_param = LookbackPlanner().history_param(Maengja)
+        if self.data_mode == 'stream':
+            self.data_manager = DataManagerStream(history_param=history_param, max_workers=12, latest=True, persist=True)
+        else:
+            self.data_manager = DataManagerFast(history_param=history_param, max_workers=12, latest=True, persist=True)
+        self.strategy_manager = StrategyManagerFast(gated=self.gated)
 
     def run(self, start, end, file_name):
 
         self.initialize(start, end, file_name)
+        ClientManager().prewarm()
+
+        self.scheduler = MinuteScheduler(self.time_manager.clock, self._live_trade, ready=self._bars_ready,
+                                         deadline=55.0, degrade_after=20.0, max_wait=5.0,
+                                         poll_interval=0.05 if self.data_mode == 'stream' else 0.25)
+        self.scheduler.on_record = self._log_cycle
+        try:
+            self.scheduler.run_until(self.time_manager.end)
+        finally:
+            self._shutdown()
+        print(f"Cycle summary: {self.scheduler.summary()}")
+        self._print_fetch_summary()
+        self._print_strategy_summary()
+        for endpoint, stat in ClientManager.connection_stats().items():
+            print(f"{endpoint}: calls={stat['calls']}, errors={stat['errors']}, "
+                  f"mean={stat['mean_seconds']:.3f}s, max={stat['max_seconds']:.3f}s")
+        for priority, stat in ClientManager.rate_limit_stats().items():
+            print(f"Rate limit {priority}: calls={stat['calls']}, waited={stat['waited']}, "
+                  f"wait={stat['wait_seconds']:.2f}s, max_wait={stat['max_wait']:.2f}s")
 
-        schedule.clear()
-        schedule.every().minute.at(":05").do(self._live_trade)
+        Printer.store_prophecy_history(self.prophecy_history, self.prophecy_log_file)
 
-        self.time_manager.sync_current()
-        while self.time_manager.before_end():
-            try:
-                schedule.run_pending()
-            except Exception as e:
-                print(f"Error occurred: {e}")
-            time.sleep(1)
-            self.time_manager.sync_current()
+    def _shutdown(self):
+        if self.stop_monitor is not None:
+            self.stop_monitor.stop()
+        self._stop_data()
+        if self.journal is not None:
+            self.journal.close()
 
-        Printer.store_prophecy_history(self.prophecy_history, self.prophecy_log_file)
+    def _stop_data(self):
+        if self.data_mode == 'stream':
+            self.data_manager.stop_stream()
+        self.data_manager.close()
+
+    def _print_fetch_summary(self):
+        print(f"Fetch summary: {self.data_manager.fetch_summary()}")
+
+    def _print_strategy_summary(self):
+        print(f"Memory: {self.data_manager.memory_report(self.strategy_manager.indicators)}")
+        if self.strategy_manager.gate is not None:
+            print(f"Gate summary: {self.strategy_manager.gate.summary()}")
 
-    def _live_trade(self):
+    def _bars_ready(self, minute):
+        self.time_manager.sync_current()
+        if not self.time_manager.is_market_open():
+            return True
+        return self.data_manager.bars_ready(self.symbol_manager.symbols, minute)
+
+    def _log_cycle(self, record):
+        if not self.cycle_logger.initiated:
+            self.cycle_logger("분, 모드, 지연(초), 소요(초), 기한초과")
+            self.cycle_logger.initiated = True
+        duration = (record.finished - record.started).total_seconds() if record.finished is not None else 0.0
+        self.cycle_logger(f"{record.minute.tz_localize(None)}, {record.mode}, {r2(record.lateness or 0.0)}, "
+                          f"{r2(duration)}, {record.overrun}")
+
+    def _live_trade(self, mode=MinuteScheduler.FULL):
+        self.time_manager.sync_current()
         if self.time_manager.is_market_open():
-            self.time_manager.sync_current()
-            recent = self.data_manager.update_recent_data(
-                self.symbol_manager.symbols, self.time_manager.current, self.time_manager.timezone
-            )
-            self.account.update()
-            if recent:
-                prophecy = self.strategy_manager.evaluate(self.data_manager.history, recent)
+            symbols = self.symbol_manager.symbols
+            if mode == MinuteScheduler.DEGRADED:
+                # 지연된 사이클은 보유 종목만 평가
+                symbols = [symbol for symbol in symbols if symbol in self.account.positions.assets]
+            prophecy = self._next_prophecy(symbols)
+            if prophecy is not None:
                 buy_list = prophecy[prophecy['buy']]['symbol'].tolist()
                 sell_list = prophecy[prophecy['sell']]['symbol'].tolist()
                 keep_list = prophecy[prophecy['keep_profit']]['symbol'].tolist()
@@ -67,14 +134,36 @@ class TraderLive:
                 self.order_manager.execute_orders(prophecy, self.prophecy_history)
             self.account.update()
             self.account.print()
+            self._checkpoint()
+
+    def _checkpoint(self):
+        """Journal this minute's strategy state (notes, indicator levels, gate bands)."""
+        if self.journal is not None:
+            self.journal.checkpoint(self.time_manager.current_ns, self.strategy_manager.buffer,
+                                    self.strategy_manager.indicators, self.strategy_manager.gate)
+
+    def _next_prophecy(self, symbols):
+        """Fetch the finished minute of `symbols` and evaluate it; None when no bars came in."""
+        recent = self.data_manager.update_recent_data(
+            symbols, self.time_manager.current, self.time_manager.timezone
+        )
+        self.account.update()
+        if self.stop_monitor is not None:
+            self.stop_monitor.sync()
+        if not recent:
+            return None
+        return self.strategy_manager.evaluate(self.data_manager.history, recent, self._exempt())
 
+    def _exempt(self):
+        """Symbols the gate must always evaluate: held positions and symbols with an open order."""
+        return set(self.account.positions.assets) | set(self.order_manager.order_list.orders)
 
     def initialize(self, start, end, file_name):
         self.time_manager.set_period(start, end)
         self.time_manager.sync_current()
         symbols = self.symbol_manager.initialize_symbols(self.time_manager.current)
         self.time_manager.sync_current()
-        self.data_manager.fetch_history(symbols, self.time_manager.current, self.time_manager.timezone)
+        self._initialize_data(symbols)
 
         self.prophecy_log_file = file_name + "_prophecy" + f"_{start}_{end}_{datetime.now(pytz.timezone('America/New_York')).strftime('%Y-%m-%d %H-%M-%S')}.csv"
         self.prophecy_log_file = self.prophecy_log_file.replace(":", "-")
@@ -84,13 +173,41 @@ class TraderLive:
         self.order_log_file = self.order_log_file.replace(":", "-")
         self.account_log_file = file_name + "_account" + f"_{start}_{end}_{datetime.now(pytz.timezone('America/New_York')).strftime('%Y-%m-%d %H:%M:%S')}.csv"
         self.account_log_file = self.account_log_file.replace(":", "-")
+        self.cycle_log_file = file_name + "_cycle" + f"_{start}_{end}_{datetime.now(pytz.timezone('America/New_York')).strftime('%Y-%m-%d %H:%M:%S')}.csv"
+        self.cycle_log_file = self.cycle_log_file.replace(":", "-")
 
         self.time_manager.sync_current()
         self.logger = Logger(self.trader_log_file)
+        self.cycle_logger = Logger(self.cycle_log_file)
         self.account = AccountLive(self.account_log_file, self.time_manager)
+        if self.journal is not None:
+            # 재시작 시 매수 때 정한 손절값과 미체결 주문을 이어받음
+            self.account.positions.journal = self.journal
+            self.account.order_list.journal = self.journal
+            assets, orders = self.journal.restore_live(self.account.positions, self.account.order_list)
+            print(f"Journal: restored stops of {assets} assets and {orders} open orders")
         self.account.update()
         self.order_manager = OrderManager(live = True, one_time_invest_ratio=0.05, max_buy_per_min=2, max_ratio_per_asset=0.10, logfile=self.order_log_file, time_manager=self.time_manager)
+        self._initialize_strategies(symbols)
+        if self.tick_stops:
+            # stream 모드에서는 bar stream 연결을 같이 사용 (피드당 연결 수 제한)
+            stream = self.data_manager.streamer.stream if self.data_mode == 'stream' else None
+            self.stop_monitor = StopMonitor(self.order_manager, stream=stream)
+            self.stop_monitor.start()
+
+    def _initialize_data(self, symbols):
+        symbols_in_history = self.data_manager.fetch_history(symbols, self.time_manager.current, self.time_manager.timezone)
+        if self.data_mode == 'stream':
+            self.symbol_manager.update(list(symbols_in_history))
+            self.data_manager.start_stream(self.symbol_manager.symbols)
+
+    def _initialize_strategies(self, symbols):
         self.strategy_manager.initialize_strategies(symbols)
+        if self.journal is not None:
+            restored = self.journal.restore_strategies(self.time_manager.current_ns, self.strategy_manager.buffer,
+                                                       self.strategy_manager.indicators, self.strategy_manager.gate)
+            print(f"Journal: restored strategy state of {restored} symbols")
+        print(f"Memory: {self.data_manager.memory_report(self.strategy_manager.indicators)}")
 
 if __name__ == "__main__":
     trader = TraderLive()
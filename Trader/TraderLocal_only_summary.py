@@ -4,6 +4,8 @@ from datetime import datetime
 from Common.Common import  Printer, r2
 from Status.Status import AccountLocal
 from Trader.Managers import TimeManager, SymbolManager, DataManagerFast, StrategyManagerFast, OrderManager
+from Strategy.Lookback import LookbackPlanner
+from Strategy.Maengja import Maengja
 from Common.Logger import Logger, search_and_export_to_excel
 
 class TraderLocal:
@@ -11,7 +13,7 @@ class TraderLocal:
     def __init__(self):
         self.time_manager = TimeManager()
         self.symbol_manager = SymbolManager(max_symbols=-1, asset_filter_num=250, russel_filter_num=250, renew_symbol=False, max_workers=30)
-        self.data_manager = DataManagerFast(history_param={'period': 2000, 'bar_window': 1, 'min_num_bars': 480}, max_workers=30)
+        self.data_manager = DataManagerFast(history_param=LookbackPlanner().history_param(Maengja), max_workers=30)
 
         self.logger = None
         self.account = None
@@ -29,9 +31,12 @@ class TraderLocal:
 
         self.initialize(start, end, file_name)
 
-        while self.time_manager.before_end():
-            self._local_trade()
-            self.time_manager.advance_current()
+        try:
+            while self.time_manager.before_end():
+                self._local_trade()
+                self.time_manager.advance_current()
+        finally:
+            self.data_manager.close()
 
         Printer.store_prophecy_history(self.prophecy_history, self.prophecy_log_file)
 
@@ -0,0 +1,261 @@
+import multiprocessing
+import queue
+import time
+import pandas as pd
+import pytz
+from datetime import datetime, timedelta
+from Common.Logger import Logger, search_and_export_to_excel
+from Status.Status import PositionLocal
+from Strategy.Lookback import LookbackPlanner
+from Strategy.Maengja import Maengja
+from ApiAccess.ApiAccess import ClientManager
+from Trader.Managers import DataManagerFast, StrategyManagerFast
+from Trader.TraderLive import TraderLive
+
+# 워커가 코디네이터에 돌려주는 보유 종목 손절 필드
+STOP_FIELDS = ('stop_value', 'stop_key', 'stop_trailing')
+
+
+def rate_limit_share(num_processes):
+    """(calls per minute, burst) of one of `num_processes` processes sharing the account limit."""
+    return max(ClientManager.rate_limit_per_minute // num_processes, 1), max(20 // num_processes, 1)
+
+
+def run_shard(shard_id, symbols, history_param, max_workers, timezone, commands, results, rate_limit=None, gated=False):
+    """Worker process: owns the history and strategies of one symbol partition.
+
+    Commands from the coordinator (on `commands`):
+      ('init', current_ns)                       fetch history, build strategies, reply 'ready'
+      ('minute', current_ns, symbols, assets, ordered)
+                                                 fetch the minute, evaluate, reply 'prophecy'
+      ('bars', minute_ns)                        reply 'bars' with whether the minute's bars are served
+      ('stop',)                                  reply 'stopped' with the memory/gate/fetch summary
+    `assets` mirrors the coordinator's positions of this partition, so `Maengja` sees the
+    held symbols and their stops; stops it moves are sent back with the prophecy. `ordered`
+    are the partition's symbols with an open order; with `gated=True` the trigger gate
+    never skips them or the held symbols. `rate_limit` is this worker's (calls per minute, burst) share of the account limit.
+    """
+    if rate_limit is not None:
+        ClientManager.set_rate_limit(*rate_limit)
+    positions = PositionLocal()  # Maengja이 참조하는 포지션 (코디네이터 포지션의 복제본)
+    data_manager = DataManagerFast(history_param=history_param, max_workers=max_workers, latest=True, persist=True)
+    strategy_manager = StrategyManagerFast(gated=gated)
+    while True:
+        command = commands.get()
+        try:
+            if command[0] == 'init':
+                current = pd.Timestamp(command[1], tz=timezone)
+                symbols = list(data_manager.fetch_history(symbols, current, timezone))
+                strategy_manager.initialize_strategies(symbols)
+                results.put(('ready', shard_id, command[1], symbols))
+            elif command[0] == 'minute':
+                _, current_ns, minute_symbols, assets, ordered = command
+                positions.assets = assets
+                started = time.perf_counter()
+                recent = data_manager.update_recent_data(minute_symbols, pd.Timestamp(current_ns, tz=timezone), timezone)
+                exempt = set(assets) | set(ordered)
+                prophecy = strategy_manager.evaluate(data_manager.history, recent, exempt) if recent else None
+                stops = {symbol: {field: asset[field] for field in STOP_FIELDS if field in asset}
+                         for symbol, asset in positions.assets.items()}
+                results.put(('prophecy', shard_id, current_ns, prophecy, stops, time.perf_counter() - started))
+            elif command[0] == 'bars':
+                minute = pd.Timestamp(command[1], tz=timezone)
+                results.put(('bars', shard_id, command[1], data_manager.bars_ready(symbols, minute)))
+            elif command[0] == 'stop':
+                gate = strategy_manager.gate.summary() if strategy_manager.gate is not None else None
+                results.put(('stopped', shard_id, None, data_manager.memory_report(strategy_manager.indicators), gate,
+                             data_manager.fetch_summary()))
+                data_manager.close()
+                return
+        except Exception as e:
+            results.put(('error', shard_id, command[1] if len(command) > 1 else None, str(e)))
+
+
+class TraderSharded(TraderLive):
+    """Live trader whose symbols are split across worker processes.
+
+    Each of `num_shards` workers (`run_shard`) owns a partition of the universe with its
+    own `DataManager` and strategies, and fetches and evaluates its minute bars. This
+    process is the coordinator: it keeps the account, positions and `OrderManager`, sends
+    every minute the positions of each partition to its worker, gathers the prophecy rows
+    until `collect_timeout` and runs one `execute_orders` over all of them, so
+    `max_buy_per_min` and the cash limits stay global. Workers communicate over local
+    multiprocessing queues only. Shards that miss the timeout are skipped for the minute;
+    workers that die, or do not finish loading history within `init_timeout`, are dropped.
+
+    The coordinator journals stops and open orders like `TraderLive`. Strategy state lives
+    in the workers and is not journaled, so after a restart the workers start cold. The
+    coordinator has no data or strategy manager of its own: bar readiness is asked from
+    the workers (`bars_timeout`) and the fetch/memory summaries come back with 'stopped'.
+    """
+
+    def __init__(self, num_shards=4, clock=None, tick_stops=False, collect_timeout=40.0, max_workers_per_shard=4,
+                 init_timeout=900.0, bars_timeout=2.0, gated=False):
+        super().__init__(clock=clock, data_mode='rest', tick_stops=tick_stops, gated=gated)
+        self.num_shards = num_shards
+        self.collect_timeout = collect_timeout
+        self.init_timeout = init_timeout
+        self.bars_timeout = bars_timeout
+        # 레이트 리미터는 프로세스별이므로 코디네이터와 워커가 계정 한도를 나눠 씀
+        self.rate_limit = rate_limit_share(num_shards + 1)
+        if ClientManager.fake_market is None:
+            ClientManager.set_rate_limit(*self.rate_limit)
+        self.max_workers_per_shard = max_workers_per_shard
+        self.context = multiprocessing.get_context('spawn')
+        self.results = self.context.Queue()
+        self.commands = []
+        self.workers = []
+        self.shards = []
+        self.shard_of = {}
+        self.late = []
+        self.shard_seconds = {}
+        self.stopped = {}
+
+    def _build_managers(self):
+        # 히스토리와 전략은 워커가 보유
+        pass
+
+    @staticmethod
+    def partition(symbols, num_shards):
+        """Round-robin partition of the (trading value ranked) symbols, so each shard gets a similar mix."""
+        return [list(symbols[i::num_shards]) for i in range(num_shards)]
+
+    def _initialize_data(self, symbols):
+        history_param = LookbackPlanner().history_param(Maengja)
+        self.shards = [shard for shard in self.partition(list(symbols), self.num_shards) if shard]
+        for shard_id, shard in enumerate(self.shards):
+            commands = self.context.Queue()
+            worker = self.context.Process(target=run_shard, daemon=True,
+                                          args=(shard_id, shard, history_param, self.max_workers_per_shard,
+                                                self.time_manager.timezone.zone, commands, self.results, self.rate_limit,
+                                                self.gated))
+            worker.start()
+            self.commands.append(commands)
+            self.workers.append(worker)
+            commands.put(('init', self.time_manager.current_ns))
+
+        ready = self._collect('ready', self.time_manager.current_ns, timeout=self.init_timeout)
+        self.shards = [ready[shard_id][0] if shard_id in ready else [] for shard_id in range(len(self.shards))]
+        self.shard_of = {symbol: shard_id for shard_id, shard in enumerate(self.shards) for symbol in shard}
+        self.symbol_manager.update([symbol for shard in self.shards for symbol in shard])
+        print(f"Shards: {[len(shard) for shard in self.shards]} symbols")
+
+    def _initialize_strategies(self, symbols):
+        # 전략 인스턴스는 워커가 보유
+        pass
+
+    def _bars_ready(self, minute):
+        self.time_manager.sync_current()
+        if not self.time_manager.is_market_open() or not self.shards:
+            return True
+        for commands in self.commands:
+            commands.put(('bars', minute.value))
+        replies = self._collect('bars', minute.value, timeout=self.bars_timeout, record_late=False)
+        return any(ready for ready, in replies.values())
+
+    def _checkpoint(self):
+        # 코디네이터에는 strategy_manager가 없음 (워커 전략 상태는 journal 대상이 아님)
+        pass
+
+    def _next_prophecy(self, symbols):
+        self.account.update()
+        if self.stop_monitor is not None:
+            self.stop_monitor.sync()
+        current_ns = self.time_manager.current_ns
+        assets = self.account.positions.assets
+        ordered = set(self.order_manager.order_list.orders)
+        requested = [[] for _ in self.shards]
+        for symbol in symbols:
+            if symbol in self.shard_of:
+                requested[self.shard_of[symbol]].append(symbol)
+        for shard_id, shard_symbols in enumerate(requested):
+            if shard_symbols:
+                shard_assets = {symbol: dict(assets[symbol]) for symbol in shard_symbols if symbol in assets}
+                shard_ordered = [symbol for symbol in shard_symbols if symbol in ordered]
+                self.commands[shard_id].put(('minute', current_ns, shard_symbols, shard_assets, shard_ordered))
+
+        replies = self._collect('prophecy', current_ns, timeout=self.collect_timeout,
+                                expected={shard_id for shard_id, shard_symbols in enumerate(requested) if shard_symbols})
+        prophecies = []
+        for shard_id, (prophecy, stops, seconds) in replies.items():
+            self.shard_seconds[shard_id] = max(self.shard_seconds.get(shard_id, 0.0), seconds)
+            self._apply_stops(stops)
+            if prophecy is not None and not prophecy.empty:
+                prophecies.append(prophecy)
+        if not prophecies:
+            return None
+        return pd.concat(prophecies, ignore_index=True)
+
+    def _apply_stops(self, stops):
+        """Take over the stops the workers' strategies moved, as `Maengja` does in-process."""
+        positions = self.account.positions
+        for symbol, fields in stops.items():
+            if symbol in positions.assets:
+                positions.assets[symbol].update(fields)
+                positions.notify_stop(symbol)
+
+    def _collect(self, kind, current_ns, timeout, expected=None, record_late=True):
+        """Replies of `kind` for `current_ns` from the `expected` shards (default: all) until `timeout`."""
+        expected = set(range(len(self.shards))) if expected is None else set(expected)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        replies = {}
+        while expected - replies.keys():
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                reply = self.results.get(timeout=min(remaining, 1.0) if remaining is not None else 1.0)
+            except queue.Empty:
+                # 응답 없이 종료된 워커는 기다리지 않음
+                dead = {shard_id for shard_id in expected - replies.keys() if not self.workers[shard_id].is_alive()}
+                if dead:
+                    print(f"Shards {sorted(dead)} exited without replying")
+                    expected -= dead
+                continue
+            reply_kind, shard_id, reply_ns = reply[:3]
+            if reply_kind == 'error':
+                print(f"Shard {shard_id} error: {reply[3]}")
+                if reply_ns == current_ns:
+                    expected.discard(shard_id)
+                continue
+            if reply_kind != kind or reply_ns != current_ns:
+                continue  # 이전 분의 늦은 응답은 버림
+            replies[shard_id] = reply[3:]
+        missing = sorted(expected - replies.keys())
+        if missing and record_late:
+            self.late.append((current_ns, missing))
+            print(f"Shards {missing} missed the {kind} deadline")
+        return replies
+
+    def _stop_data(self):
+        for commands in self.commands:
+            commands.put(('stop',))
+        self.stopped = self._collect('stopped', None, timeout=30.0)
+        for worker in self.workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    def _print_fetch_summary(self):
+        for shard_id, (_, _, fetch) in sorted(self.stopped.items()):
+            print(f"Shard {shard_id} fetch summary: {fetch}")
+
+    def _print_strategy_summary(self):
+        for shard_id, (memory, gate, _) in sorted(self.stopped.items()):
+            print(f"Shard {shard_id}: memory={memory}, gate={gate}, "
+                  f"max_seconds={self.shard_seconds.get(shard_id, 0.0):.2f}")
+        print(f"Late shard minutes: {len(self.late)}")
+
+
+if __name__ == "__main__":
+    trader = TraderSharded(num_shards=4)
+
+    file_name = "trader_sharded_maengja"
+    start = datetime.now(pytz.timezone('America/New_York')).strftime("%Y-%m-%d %H:%M:%S")
+    end = (datetime.now(pytz.timezone('America/New_York'))+timedelta(hours=3)).strftime("%Y-%m-%d %H:%M:%S")
+
+    trader.run(start, end, file_name)
+
+    Logger.close_all()
+
+    search_and_export_to_excel(file_name, start.replace(":", "-"), end.replace(":", "-"))
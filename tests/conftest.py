@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 모듈들이 import 시점에 D4 경로를 기본 인자로 읽으므로 먼저 설정
+os.environ.setdefault('D4', ROOT)
+sys.path.insert(0, ROOT)
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pandas_ta')
+pytest.importorskip('scipy')
+pytest.importorskip('alpaca')
+
+from ApiAccess.ApiAccess import ClientManager
+from ApiAccess.FakeAlpaca import FakeMarket
+from Common.Clock import VirtualClock
+from Status.Status import PositionLocal
+from Strategy.Lookback import LookbackPlanner
+from Strategy.Maengja import Maengja
+from Trader.Managers import TimeManager, DataManagerFast, StrategyManagerFast
+
+SYMBOLS = [f"SYN{i:05d}" for i in range(20)]
+MINUTES = 30
+STOP_MOVE_MINUTE = 10
+
+
+@pytest.fixture
+def market():
+    clock = VirtualClock('2024-11-04 09:31:00', speed=None)
+    ClientManager.use_fake_market(FakeMarket(symbols=SYMBOLS, now=clock.now))
+    yield clock
+    ClientManager.use_fake_market(None)
+
+
+def held_row(prophecy, symbol):
+    return prophecy[prophecy['symbol'] == symbol].reset_index(drop=True)
+
+
+def test_held_symbol_rows_match_across_stop_move(market):
+    clock = market
+    time_manager = TimeManager(clock=clock)
+    time_manager.sync_current()
+    start = time_manager.current
+    history_param = LookbackPlanner().history_param(Maengja)
+    sides = {gated: (DataManagerFast(history_param=history_param, max_workers=4), StrategyManagerFast(gated=gated))
+             for gated in (False, True)}
+    try:
+        for data_manager, strategy_manager in sides.values():
+            symbols = list(data_manager.fetch_history(SYMBOLS, start, time_manager.timezone))
+            strategy_manager.initialize_strategies(symbols)
+        held = symbols[0]
+        price = float(sides[False][0].history[held]['close'].iloc[-1])
+        positions = PositionLocal()
+        positions.assets = {held: dict(time=start, price=price, avg_price=price, qty=10.0, market_value=price * 10,
+                                       cost=price * 10, stop_value=0.0, stop_key='', stop_trailing=price * 0.9)}
+
+        for minute in range(MINUTES):
+            if minute == STOP_MOVE_MINUTE:
+                # 보유 중 손절 지표 교체 (Maengja의 keep_profit과 같은 경로)
+                positions.assets[held]['stop_key'] = 'bb1_lower'
+                positions.notify_stop(held)
+            clock.set(start.floor('min') + pd.Timedelta(minutes=minute + 1, seconds=5))
+            time_manager.sync_current()
+            rows = {}
+            for gated, (data_manager, strategy_manager) in sides.items():
+                recent = data_manager.update_recent_data(list(strategy_manager.sages), time_manager.current,
+                                                         time_manager.timezone)
+                rows[gated] = held_row(strategy_manager.evaluate(data_manager.history, recent, {held}), held)
+            assert len(rows[True]) == 1, f"held symbol skipped by the gate at minute {minute}"
+            pd.testing.assert_frame_equal(rows[False], rows[True])
+    finally:
+        for data_manager, _ in sides.values():
+            data_manager.close()
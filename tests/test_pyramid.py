@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from Fetch.Pyramid import BarPyramid
+
+FIELDS = BarPyramid.FIELDS
+
+
+def bar(open, high, low, close, volume, trade_count, trading_value):
+    return [open, high, low, close, volume, trade_count, trading_value / volume, trading_value]
+
+
+def utc(text):
+    return pd.Timestamp(text, tz='UTC')
+
+
+def expected(rows):
+    """(time, bar) rows as the frame `BarPyramid.frame` returns."""
+    times = np.array([utc(time).value for time, _ in rows], dtype=np.int64)
+    index = pd.DatetimeIndex(times.astype('datetime64[ns]'), name='timestamp').tz_localize('UTC')
+    return pd.DataFrame([values for _, values in rows], index=index, columns=FIELDS, dtype=np.float64)
+
+
+def test_five_minute_buckets_from_minute_pushes():
+    pyramid = BarPyramid(['A', 'B'], levels={'1m': 1, '5m': 5})
+    minutes = {
+        '2024-11-04 14:33': {'A': bar(10.0, 10.5, 9.8, 10.2, 100, 5, 1020.0), 'B': bar(50.0, 50.2, 49.9, 50.1, 10, 1, 501.0)},
+        '2024-11-04 14:34': {'A': bar(10.2, 10.9, 10.1, 10.8, 200, 7, 2150.0)},
+        '2024-11-04 14:35': {'A': bar(10.8, 10.8, 9.5, 9.7, 300, 9, 2940.0), 'B': bar(50.1, 51.0, 50.0, 50.9, 20, 2, 1014.0)},
+        '2024-11-04 14:36': {'A': bar(9.7, 10.0, 9.6, 9.9, 100, 4, 985.0), 'B': bar(50.9, 50.9, 50.3, 50.4, 30, 3, 1515.0)},
+    }
+    opened = []
+    for minute, bars in minutes.items():
+        symbols = list(bars)
+        pushed, new = pyramid.push(symbols, [utc(minute).value] * len(symbols), list(bars.values()))
+        assert pushed == symbols
+        opened.append(dict(zip(symbols, new['5m'])))
+
+    # 14:30~14:34 버킷과 14:35~14:39 버킷 (에포크 기준 정렬, 버킷 시작 시각으로 표시)
+    assert opened == [{'A': True, 'B': True}, {'A': False}, {'A': True, 'B': True}, {'A': False, 'B': False}]
+    pd.testing.assert_frame_equal(pyramid.frame('A', '5m'), expected([
+        ('2024-11-04 14:30', bar(10.0, 10.9, 9.8, 10.8, 300, 12, 3170.0)),
+        ('2024-11-04 14:35', bar(10.8, 10.8, 9.5, 9.9, 400, 13, 3925.0)),
+    ]))
+    pd.testing.assert_frame_equal(pyramid.frame('B', '5m'), expected([
+        ('2024-11-04 14:30', bar(50.0, 50.2, 49.9, 50.1, 10, 1, 501.0)),
+        ('2024-11-04 14:35', bar(50.1, 51.0, 50.0, 50.4, 50, 5, 2529.0)),
+    ]))
+    assert len(pyramid.frame('A', '1m')) == 4
+
+
+def test_repeated_minute_is_not_counted_twice():
+    pyramid = BarPyramid(['A'], levels={'1m': 1, '5m': 5})
+    minute = utc('2024-11-04 14:31').value
+    pyramid.push(['A'], [minute], [bar(10.0, 10.5, 9.8, 10.2, 100, 5, 1020.0)])
+    pushed, _ = pyramid.push(['A'], [minute], [bar(10.0, 10.5, 9.8, 10.2, 100, 5, 1020.0)])
+    assert pushed == []
+    assert pyramid.last('A', '5m')[1][FIELDS.index('volume')] == 100
+
+
+def test_two_hour_buckets_are_epoch_aligned_not_row_counted():
+    hours = ['2024-11-04 14:00', '2024-11-04 15:00', '2024-11-04 16:00', '2024-11-04 17:00', '2024-11-04 18:00']
+    values = [bar(10.0, 11.0, 9.0, 10.5, 100, 10, 1000.0),
+              bar(10.5, 12.0, 10.0, 11.5, 200, 20, 2200.0),
+              bar(11.5, 11.8, 11.0, 11.2, 150, 15, 1700.0),
+              bar(11.2, 11.4, 10.2, 10.4, 250, 25, 2700.0),
+              bar(10.4, 10.9, 10.3, 10.8, 50, 5, 530.0)]
+    frame = expected(list(zip(hours, values)))
+    pyramid = BarPyramid(['A'], levels={'1h': 60, '2h': 120})
+    pyramid.seed({'A': frame}, source=60)
+
+    # 이전의 행 개수 병합(merge_to_a_single_bar)은 최신 봉부터 (17, 18), (15, 16), (14)로 묶었음
+    pd.testing.assert_frame_equal(pyramid.frame('A', '2h'), expected([
+        ('2024-11-04 14:00', bar(10.0, 12.0, 9.0, 11.5, 300, 30, 3200.0)),
+        ('2024-11-04 16:00', bar(11.5, 11.8, 10.2, 10.4, 400, 40, 4400.0)),
+        ('2024-11-04 18:00', bar(10.4, 10.9, 10.3, 10.8, 50, 5, 530.0)),
+    ]))
+    pd.testing.assert_frame_equal(pyramid.frame('A', '1h'), frame)
+
+    # 시딩 이후의 분봉은 열린 18:00 버킷에 합쳐지고, 20:00부터 새 버킷
+    pushed, opened = pyramid.push(['A'], [utc('2024-11-04 19:59').value], [bar(10.8, 11.6, 10.7, 11.5, 50, 5, 560.0)])
+    assert pushed == ['A'] and not opened['2h'][0] and opened['1h'][0]
+    pushed, opened = pyramid.push(['A'], [utc('2024-11-04 20:00').value], [bar(11.5, 11.5, 11.1, 11.2, 10, 1, 113.0)])
+    assert opened['2h'][0]
+    pd.testing.assert_frame_equal(pyramid.frame('A', '2h').iloc[-2:], expected([
+        ('2024-11-04 18:00', bar(10.4, 11.6, 10.3, 11.5, 100, 10, 1090.0)),
+        ('2024-11-04 20:00', bar(11.5, 11.5, 11.1, 11.2, 10, 1, 113.0)),
+    ]))
+
+
+def test_day_buckets_follow_the_local_session_day():
+    # 2024-11-04 뉴욕은 UTC-5: 04:00 UTC는 전날 23:00, 05:00 UTC부터 다음 날
+    frame = expected([('2024-11-04 23:00', bar(10.0, 10.4, 9.9, 10.1, 100, 10, 1010.0)),
+                      ('2024-11-05 04:00', bar(10.1, 10.2, 9.7, 9.8, 100, 10, 990.0)),
+                      ('2024-11-05 05:00', bar(9.8, 9.9, 9.6, 9.7, 100, 10, 975.0))])
+    pyramid = BarPyramid(['A'], levels={'1h': 60, '1d': BarPyramid.DAY})
+    pyramid.seed({'A': frame}, source=60)
+    pd.testing.assert_frame_equal(pyramid.frame('A', '1d'), expected([
+        ('2024-11-04 05:00', bar(10.0, 10.4, 9.7, 9.8, 200, 20, 2000.0)),
+        ('2024-11-05 05:00', bar(9.8, 9.9, 9.6, 9.7, 100, 10, 975.0)),
+    ]))